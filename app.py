@@ -6,10 +6,20 @@ Streamlit 기반 간단한 GUI
 """
 
 import streamlit as st
+import os
 import shutil
 import time
+from urllib.parse import urlsplit
 from pathlib import Path
-from utils import process_youtube_to_text
+from utils import (
+    ModelRegistry, DEFAULT_MODEL_MEMORY_BUDGET_MB, create_youtube_pipeline,
+    get_archive_catalog, ARCHIVE_ROOT, ArtifactServer, ARTIFACT_PUBLIC_URL, JobManager,
+    MAX_CONCURRENT_JOBS, default_metrics, prewarm, PREWARM_MODEL, import_times, get_download_cache,
+    is_local_media, find_local_media, process_local_media, save_uploaded_media,
+    LOCAL_VIDEO_EXTENSIONS, LOCAL_AUDIO_EXTENSIONS, default_model_speed, AUTO_MODEL_LATENCY_BUDGET_SECONDS,
+    ASR_BACKENDS, DEFAULT_ASR_BACKEND, available_asr_backends, BatchTranscriber,
+    DOWNLOADS_ROOT, UPLOADS_ROOT, LOCAL_MEDIA_ROOT, resolve_local_media_path, get_upload_cache
+)
 
 # 페이지 설정
 st.set_page_config(
@@ -18,6 +28,70 @@ st.set_page_config(
     layout="wide"
 )
 
+@st.cache_resource
+def get_model_registry():
+    """모든 세션과 재실행이 공유하는 Whisper 모델 레지스트리"""
+    return ModelRegistry(memory_budget_mb=DEFAULT_MODEL_MEMORY_BUDGET_MB)
+
+@st.cache_resource
+def get_batch_transcriber():
+    """모든 세션이 공유하는 변환 워커 (짧은 클립은 모아 한 번에 디코딩, 나머지는 동시 작업 수만큼 병렬 변환)"""
+    return BatchTranscriber(model_registry=get_model_registry(), single_workers=MAX_CONCURRENT_JOBS)
+
+@st.cache_resource
+def get_pipeline():
+    """모든 세션이 공유하는 단계별 처리 파이프라인 (여러 변환 요청이 단계별로 겹쳐 실행)"""
+    return create_youtube_pipeline(batch_transcriber=get_batch_transcriber())
+
+@st.cache_resource
+def get_job_manager():
+    """서버 전체가 공유하는 백그라운드 작업 관리자 (동시 실행 수 제한)"""
+    return JobManager(max_concurrent_jobs=MAX_CONCURRENT_JOBS)
+
+@st.cache_resource
+def get_artifact_server():
+    """영상/음성을 디스크에서 청크 단위로 제공하는 파일 서버 (서버당 하나)"""
+    # 업로드 원본과 서버 경로로 변환한 원본도 메모리에 올리지 않고 제공
+    roots = (DOWNLOADS_ROOT, ARCHIVE_ROOT, UPLOADS_ROOT) + ((LOCAL_MEDIA_ROOT,) if LOCAL_MEDIA_ROOT else ())
+    server = ArtifactServer(roots=roots)
+    server.start()
+    return server
+
+@st.cache_resource
+def get_downloads():
+    """downloads 폴더 캐시 (백그라운드에서 오래되거나 예산을 넘는 폴더 정리, 서버당 하나)"""
+    cache = get_download_cache()
+    cache.start()
+    get_upload_cache().start()  # 업로드 원본도 같은 방식으로 정리
+    return cache
+
+@st.cache_resource
+def start_prewarm():
+    """서버가 뜨면 백그라운드에서 Whisper 임포트와 기본 모델 로드 시작 (서버당 한 번)"""
+    return prewarm(PREWARM_MODEL or None, registry=get_model_registry())
+
+start_prewarm()
+get_downloads()
+
+def artifact_url(file_path, download=False):
+    """브라우저에서 접근할 산출물 URL (파일 서버를 쓸 수 없으면 None)"""
+    server = get_artifact_server()
+    if not server.running:
+        return None
+    base_url = ARTIFACT_PUBLIC_URL
+    if not base_url:
+        # 공개 주소가 없으면 같은 컴퓨터에서 접속한 경우에만 파일 서버 포트로 직접 연결
+        # (Streamlit Cloud, Cloud Run처럼 HTTPS 포트 하나만 열린 곳에서는 None → 지연 다운로드만 제공)
+        host = "localhost"
+        try:
+            host = urlsplit("//" + st.context.headers.get("Host", host)).hostname or host
+        except AttributeError:
+            pass
+        if host not in ("localhost", "127.0.0.1", "::1"):
+            return None
+        base_url = f"http://{'[::1]' if host == '::1' else host}:{server.port}"
+    return server.url_for(file_path, base_url=base_url, download=download)
+
 # 현대적이고 세련된 디자인 CSS
 st.markdown("""
 <style>
@@ -461,7 +535,7 @@ st.markdown("<hr style='margin: 2rem 0; border: none; height: 1px; background-co
 # 사용 방법
 st.markdown("""
 ### 📋 간편한 사용 방법
-1. 유튜브 URL을 입력하세요
+1. 유튜브 URL을 입력하거나 미디어 파일을 올리세요 (서버 폴더 경로도 가능)
 2. 원하는 AI 모델을 선택하세요
 3. 변환 시작 버튼을 클릭하세요
 4. 완료 후 파일을 다운로드하세요
@@ -478,7 +552,8 @@ with st.sidebar:
         "base": "Base (권장, 균형적인 성능)",
         "small": "Small (높은 정확도)",
         "medium": "Medium (매우 높은 정확도)",
-        "large": "Large (최고 정확도, 느림)"
+        "large": "Large (최고 정확도, 느림)",
+        "auto": "Auto (제한 시간 안에 가장 정확한 모델 자동 선택)"
     }
     
     model_size = st.selectbox(
@@ -488,6 +563,33 @@ with st.sidebar:
         format_func=lambda x: model_options[x]
     )
     
+    # 음성 인식 엔진 선택 (설치되지 않은 엔진은 표시만 하고 선택하면 안내)
+    backend_options = {
+        "whisper": "Whisper (기본, fp32)",
+        "faster-whisper": "Faster-Whisper (int8 CPU, 빠르고 메모리 적음)"
+    }
+    installed_backends = available_asr_backends()
+    asr_backend = st.selectbox(
+        "음성 인식 엔진",
+        options=list(ASR_BACKENDS),
+        index=list(ASR_BACKENDS).index(DEFAULT_ASR_BACKEND),
+        format_func=lambda x: backend_options[x] + ("" if x in installed_backends else " - 미설치"),
+        help="같은 모델 크기로 변환하며 결과 형식(텍스트, 자막)은 엔진과 관계없이 같습니다"
+    )
+    if asr_backend not in installed_backends:
+        st.warning(f"⚠️ {asr_backend} 엔진이 설치되어 있지 않습니다 (pip install {asr_backend})")
+    
+    latency_budget = None
+    if model_size == "auto":
+        # 영상 길이와 이 서버에서 측정한 모델별 속도로 예산 안에 끝날 모델을 고름
+        latency_budget = 60 * st.number_input(
+            "제한 시간 (분)",
+            min_value=1,
+            max_value=24 * 60,
+            value=max(1, int(AUTO_MODEL_LATENCY_BUDGET_SECONDS // 60)),
+            help="다운로드부터 저장까지 이 시간 안에 끝날 것으로 예상되는 가장 정확한 모델을 사용합니다"
+        )
+    
     # 영구 저장 옵션
     st.markdown("<hr style='margin: 1.5rem 0; border: none; height: 1px; background-color: #dee2e6;'>", unsafe_allow_html=True)
     st.markdown("<p style='color: #6c757d; font-size: 0.9rem; margin-bottom: 1rem;'>파일 저장 설정</p>", unsafe_allow_html=True)
@@ -497,6 +599,66 @@ with st.sidebar:
         value=True,
         help="변환된 파일을 영구 보관함(archives 폴더)에 저장합니다"
     )
+    
+    archive_policy_options = {
+        "link": "링크 (디스크 추가 사용 없음, 권장)",
+        "move": "이동 (임시 폴더에서 옮김)",
+        "copy": "복사 (별도 사본 보관)"
+    }
+    archive_policy = st.selectbox(
+        "보관 방법",
+        options=list(archive_policy_options.keys()),
+        index=0,
+        format_func=lambda x: archive_policy_options[x],
+        disabled=not save_to_archive
+    )
+    
+    audio_only = st.checkbox(
+        "텍스트만 변환 (음성만 다운로드)",
+        value=False,
+        help="영상 파일 없이 음성 스트림만 받아 더 빠르게 텍스트로 변환합니다"
+    )
+    
+    refresh_cache = st.checkbox(
+        "캐시 무시하고 다시 변환",
+        value=False,
+        help="이전에 같은 영상/모델로 변환한 결과가 있어도 처음부터 다시 변환합니다"
+    )
+    
+    # 처리 통계 (서버 시작 이후 누적)
+    with st.expander("📊 처리 통계"):
+        snapshot = default_metrics.snapshot()
+        jobs = {item['labels'].get('status'): item['value'] for item in snapshot['counters'].get('jobs_total', [])}
+        stat_col1, stat_col2, stat_col3 = st.columns(3)
+        stat_col1.metric("성공", jobs.get('ok', 0))
+        stat_col2.metric("캐시", jobs.get('cached', 0))
+        stat_col3.metric("실패", jobs.get('failed', 0))
+        
+        stage_rows = [
+            {"단계": item['labels'].get('stage'), "횟수": item['count'], "평균(초)": round(item['mean'], 2)}
+            for item in snapshot['histograms'].get('stage_seconds', [])
+        ]
+        if stage_rows:
+            st.dataframe(stage_rows, hide_index=True, use_container_width=True)
+        for item in snapshot['histograms'].get('real_time_factor', []):
+            st.caption(f"⚡ {item['labels'].get('model')} 모델 실시간 배율 평균 {item['mean']:.2f}x ({item['count']}건)")
+        
+        st.caption(f"🏎️ 모델별 실시간 배율 ({asr_backend}): " + ", ".join(
+            f"{model} {estimate['real_time_factor']}{'' if estimate['source'] != 'default' else '(추정)'}"
+            for model, estimate in default_model_speed.estimates(asr_backend).items()))
+        registry_stats = get_model_registry().stats()
+        batch_stats = get_batch_transcriber().stats()
+        if batch_stats['batches']:
+            st.caption(f"📦 묶음 변환: {batch_stats['batches']}번에 클립 {batch_stats['batched_clips']}개 "
+                       f"(평균 {batch_stats['mean_batch_size']}개, 최대 {batch_stats['max_batch_size']}개)")
+        st.caption(f"🧠 모델 캐시: 적중 {registry_stats['hits']} / 로드 {registry_stats['misses']} / 해제 {registry_stats['evictions']}, "
+                   f"메모리 {registry_stats['memory_used_mb']:.0f}/{registry_stats['memory_budget_mb']} MB")
+        download_stats = get_downloads().stats()
+        st.caption(f"📂 임시 파일: {download_stats['folders']}개 폴더, "
+                   f"{download_stats['size_bytes'] / (1024 * 1024):.0f}/{download_stats['budget_bytes'] / (1024 * 1024):.0f} MB "
+                   f"(정리 {download_stats['evictions']}회, {download_stats['evicted_bytes'] / (1024 * 1024):.0f} MB)")
+        if import_times:
+            st.caption("📦 모듈 임포트: " + ", ".join(f"{name} {seconds}초" for name, seconds in import_times.items()))
 
 # 메인 인터페이스
 col1, col2 = st.columns([4, 1])
@@ -572,59 +734,125 @@ with col2:
     
     with col1:
         # 임시 파일 정리 버튼
-        if st.button("🗑️ 파일 정리", help="다운로드된 모든 임시 파일을 삭제합니다", type="secondary"):
+        if st.button("🗑️ 파일 정리", help="처리 중인 작업의 파일을 제외한 임시 파일을 삭제합니다", type="secondary"):
             try:
-                downloads_path = Path("downloads")
-                if downloads_path.exists():
-                    shutil.rmtree(downloads_path)
-                    st.success("✅ 임시 파일 정리 완료!")
+                removed, skipped = get_downloads().clear()
+                if removed or skipped:
+                    st.success(f"✅ 임시 파일 정리 완료! ({removed}개 폴더 삭제"
+                               f"{f', 처리 중인 {skipped}개는 유지' if skipped else ''})")
                 else:
                     st.info("📁 정리할 임시 파일이 없습니다.")
             except Exception as e:
                 st.error(f"❌ 오류: {e}")
     
     with col2:
-        # 영구 보관함 관리 버튼 (강제 업데이트)
+        # 영구 보관함 관리 버튼 (페이지 이동 등 재실행에도 열린 상태 유지)
         if st.button("⚙️ 보관함관리", help="영구 보관함 관리 옵션을 표시합니다"):
-            archives_path = Path("archives")
-            if archives_path.exists() and any(archives_path.iterdir()):
-                # 관리 옵션 표시
-                st.success("📚 영구 보관함 관리")
-                
-                # 비디오 폴더 목록 가져오기
-                video_folders = [f for f in archives_path.iterdir() if f.is_dir() and f.name.startswith("video_")]
-                
-                if video_folders:
-                    # 삭제할 비디오 선택
-                    options = {folder.name.replace("video_", ""): folder.name for folder in video_folders}
-                    selected_video = st.selectbox("삭제할 비디오 선택", options=list(options.keys()), format_func=lambda x: f"비디오 ID: {x}")
-                    
-                    if st.button("🗑️ 선택한 비디오 삭제", type="secondary"):
-                        try:
-                            folder_to_delete = archives_path / options[selected_video]
-                            if folder_to_delete.exists():
-                                shutil.rmtree(folder_to_delete)
-                                st.success(f"✅ 비디오 ID: {selected_video} 삭제 완료!")
-                                st.rerun()  # 페이지 새로고침
-                        except Exception as e:
-                            st.error(f"❌ 삭제 오류: {e}")
-                    
-                    # 전체 삭제 버튼
-                    if st.button("🗑️ 모든 보관 파일 삭제", type="secondary"):
-                        try:
-                            shutil.rmtree(archives_path)
-                            st.success("✅ 모든 보관 파일 삭제 완료!")
-                            st.rerun()  # 페이지 새로고침
-                        except Exception as e:
-                            st.error(f"❌ 삭제 오류: {e}")
+            st.session_state.show_archive_manager = not st.session_state.get('show_archive_manager', False)
+
+# 영구 보관함 관리 (카탈로그 조회)
+if st.session_state.get('show_archive_manager', False):
+    catalog = get_archive_catalog()
+    total_videos = catalog.count_videos()
+    
+    st.success("📚 영구 보관함 관리")
+    
+    if st.button("🔄 카탈로그 다시 만들기", help="archives 폴더를 다시 훑어 보관함 목록을 재구성합니다"):
+        rebuilt = catalog.rebuild()
+        st.info(f"📋 {rebuilt}개 실행 기록을 다시 색인했습니다.")
+        total_videos = catalog.count_videos()
+    
+    if total_videos:
+        sort_options = {
+            "last_run": "최근 변환순",
+            "total_size": "용량순",
+            "duration": "길이순",
+            "runs": "변환 횟수순",
+            "video_id": "비디오 ID순"
+        }
+        page_size = 20
+        sort_col, page_col = st.columns(2)
+        with sort_col:
+            order_by = st.selectbox("정렬", options=list(sort_options.keys()),
+                                    format_func=lambda x: sort_options[x])
+        with page_col:
+            page_count = (total_videos + page_size - 1) // page_size
+            page = st.number_input("페이지", min_value=1, max_value=page_count, value=1, step=1)
+        
+        videos = catalog.list_videos(limit=page_size, offset=(page - 1) * page_size,
+                                     order_by=order_by, descending=order_by != "video_id")
+        st.dataframe([
+            {
+                "비디오 ID": v['video_id'],
+                "제목": v['title'] or "",
+                "변환 횟수": v['runs'],
+                "최근 변환": time.strftime("%Y-%m-%d %H:%M", time.localtime(v['last_run'])),
+                "길이(초)": v['duration'],
+                "용량(MB)": round((v['total_size'] or 0) / (1024 * 1024), 1),
+                "모델": v['models'] or ""
+            }
+            for v in videos
+        ], use_container_width=True)
+        st.caption(f"총 {total_videos}개 비디오 · {page}/{page_count} 페이지")
+        
+        # 삭제할 비디오 선택
+        selected_video = st.selectbox("삭제할 비디오 선택", options=[v['video_id'] for v in videos],
+                                      format_func=lambda x: f"비디오 ID: {x}")
+        
+        if st.button("🗑️ 선택한 비디오 삭제", type="secondary"):
+            try:
+                folder_to_delete = Path(ARCHIVE_ROOT) / f"video_{selected_video}"
+                if folder_to_delete.exists():
+                    shutil.rmtree(folder_to_delete)
+                catalog.delete_video(selected_video)
+                st.success(f"✅ 비디오 ID: {selected_video} 삭제 완료!")
+                st.rerun()  # 페이지 새로고침
+            except Exception as e:
+                st.error(f"❌ 삭제 오류: {e}")
+        
+        # 전체 삭제 버튼
+        if st.button("🗑️ 모든 보관 파일 삭제", type="secondary"):
+            try:
+                for folder in Path(ARCHIVE_ROOT).glob("video_*"):
+                    shutil.rmtree(folder)
+                catalog.clear()
+                st.success("✅ 모든 보관 파일 삭제 완료!")
+                st.rerun()  # 페이지 새로고침
+            except Exception as e:
+                st.error(f"❌ 삭제 오류: {e}")
+    else:
+        st.info("📁 보관된 파일이 없습니다.")
+
+# 보관함 검색 (전문 검색 색인)
+with st.expander("🔍 보관함 텍스트 검색"):
+    search_query = st.text_input("검색어", placeholder="찾고 싶은 단어나 문장을 입력하세요")
+    if search_query.strip():
+        catalog = get_archive_catalog()
+        total_hits = catalog.count_search(search_query)
+        if total_hits:
+            hits_per_page = 10
+            hit_pages = (total_hits + hits_per_page - 1) // hits_per_page
+            hit_page = st.number_input("결과 페이지", min_value=1, max_value=hit_pages, value=1, step=1)
+            st.caption(f"검색 결과 {total_hits}건 · {hit_page}/{hit_pages} 페이지")
+            for hit in catalog.search(search_query, limit=hits_per_page, offset=(hit_page - 1) * hits_per_page):
+                if hit['start_time'] is not None:
+                    start = int(hit['start_time'])
+                    position = f"[{start // 60:02d}:{start % 60:02d}]"
+                    link = f"https://youtu.be/{hit['video_id']}?t={start}"
                 else:
-                    st.info("보관된 비디오가 없습니다.")
-            else:
-                st.info("📁 보관된 파일이 없습니다.")
+                    position = ""
+                    link = f"https://youtu.be/{hit['video_id']}"
+                if hit['video_id'].startswith("local_"):
+                    # 로컬 파일은 유튜브 링크가 없음
+                    st.markdown(f"**{hit['video_id']}** {position} {hit['snippet']}")
+                else:
+                    st.markdown(f"**{hit['video_id']}** {position} {hit['snippet']} · [영상 열기]({link})")
+        else:
+            st.info("검색 결과가 없습니다.")
 
 # 세션 상태 초기화
-if 'is_processing' not in st.session_state:
-    st.session_state.is_processing = False
+if 'job_id' not in st.session_state:
+    st.session_state.job_id = None
 
 # 미디어 보기 상태 초기화
 if 'show_video' not in st.session_state:
@@ -634,24 +862,56 @@ if 'show_audio' not in st.session_state:
 if 'show_text' not in st.session_state:
     st.session_state.show_text = False
 
+job_manager = get_job_manager()
+current_job = job_manager.get(st.session_state.job_id) if st.session_state.job_id else None
+is_processing = bool(current_job and current_job['state'] in ('queued', 'running'))
+
+# 변환할 원본 선택 (폼 안의 위젯은 제출 전까지 화면을 다시 그리지 않으므로 폼 밖에 둠)
+source_options = {
+    "url": "🔗 유튜브 URL",
+    "upload": "📤 파일 업로드",
+}
+if LOCAL_MEDIA_ROOT:
+    # 서버 경로 변환은 관리자가 지정한 폴더 안에서만 허용
+    source_options["path"] = "🗂️ 서버 파일/폴더 경로"
+source_type = st.radio("변환할 원본", options=list(source_options.keys()),
+                       format_func=lambda x: source_options[x], horizontal=True)
+
 # 변환 폼 (안정적인 버튼 처리)
 with st.form("conversion_form"):
-    st.markdown("<p style='color: #495057; font-weight: 500; margin-bottom: 1rem;'>변환할 유튜브 영상 URL을 입력하세요</p>", unsafe_allow_html=True)
+    source_prompts = {
+        "url": "변환할 유튜브 영상 URL을 입력하세요",
+        "upload": "변환할 영상/음성 파일을 올리세요",
+        "path": f"{LOCAL_MEDIA_ROOT} 안의 미디어 파일이나 폴더 경로를 입력하세요 (폴더는 하위 폴더까지 모두 변환)",
+    }
+    st.markdown(f"<p style='color: #495057; font-weight: 500; margin-bottom: 1rem;'>{source_prompts[source_type]}</p>", unsafe_allow_html=True)
     col1, col2 = st.columns([5, 1])
     
     with col1:
-        # URL 입력
-        youtube_url = st.text_input(
-            "유튜브 URL",
-            placeholder="https://youtube.com/watch?v=xxxx 또는 https://youtu.be/xxxx"
-        )
+        youtube_url = uploaded_file = local_path = None
+        if source_type == "url":
+            # URL 입력
+            youtube_url = st.text_input(
+                "유튜브 URL",
+                placeholder="https://youtube.com/watch?v=xxxx 또는 https://youtu.be/xxxx"
+            )
+        elif source_type == "upload":
+            uploaded_file = st.file_uploader(
+                "미디어 파일",
+                type=[ext.lstrip(".") for ext in LOCAL_VIDEO_EXTENSIONS + LOCAL_AUDIO_EXTENSIONS]
+            )
+        else:
+            local_path = st.text_input(
+                "파일/폴더 경로",
+                placeholder="lectures 또는 lectures/week1.mp4"
+            )
     
     with col2:
         # 빈 공간 (정렬용)
         st.write("")
         
         # 변환 시작 버튼 (상태에 따라 텍스트 변경)
-        if st.session_state.is_processing:
+        if is_processing:
             start_button = st.form_submit_button(
                 "⏳ 처리 중...", 
                 type="secondary",
@@ -665,147 +925,321 @@ with st.form("conversion_form"):
                 use_container_width=True
             )
 
-# 변환 프로세스
+def convert_local_folder(url, progress_callback=None, segment_callback=None, **options):
+    """
+    서버 폴더의 미디어 파일 일괄 변환 (작업 관리자에서 실행)
+
+    파일마다 끝날 때 완료 수를 진행률로 전달하고, 파일별 요약 기록을 모아 반환합니다.
+    여러 파일의 세그먼트가 섞이므로 진행 중 텍스트(segment_callback)는 쓰지 않습니다.
+    """
+    files = find_local_media([url])
+    records = []
+    
+    def on_result(record, result):
+        records.append(record)
+        if progress_callback:
+            progress_callback({'stage': 'batch', 'progress': len(records) / len(files),
+                               'overall': len(records) / len(files),
+                               'done': len(records), 'total': len(files)})
+    
+    process_local_media(files, on_result=on_result, **options)
+    records.sort(key=lambda record: record['index'])
+    succeeded = sum(1 for record in records if record['status'] != "failed")
+    return {
+        'success': bool(succeeded),
+        'error': None if succeeded else "변환할 수 있는 미디어 파일이 없거나 모두 실패했습니다",
+        'batch': records,
+    }
+
+# 변환 작업 제출 (실행은 작업 관리자의 워커가 담당)
 if start_button:
-    if not youtube_url.strip():
-        st.error("❌ 유튜브 URL을 입력해주세요!")
+    if asr_backend not in installed_backends:
+        st.error(f"❌ {asr_backend} 엔진이 설치되어 있지 않습니다. 다른 음성 인식 엔진을 선택해주세요!")
         st.stop()
     
+    job_options = dict(
+        output_path="downloads",
+        model_size=model_size,
+        save_to_archive=save_to_archive,
+        archive_policy=archive_policy,
+        model_registry=get_model_registry(),
+        audio_only=audio_only,
+        refresh_cache=refresh_cache,
+        resume=True,  # 서버가 재시작되어 끊긴 작업은 다시 요청하면 체크포인트부터 이어서 실행
+        latency_budget=latency_budget,
+        asr_backend=asr_backend,
+        batch_transcriber=get_batch_transcriber(),
+    )
+    
+    if source_type == "url":
+        if not youtube_url.strip():
+            st.error("❌ 유튜브 URL을 입력해주세요!")
+            st.stop()
+        
+        # URL 유효성 간단 검사
+        if not ("youtube.com" in youtube_url or "youtu.be" in youtube_url):
+            st.error("❌ 올바른 유튜브 URL을 입력해주세요!")
+            st.stop()
+        source, func = youtube_url.strip(), None
+    elif source_type == "upload":
+        if uploaded_file is None:
+            st.error("❌ 변환할 파일을 올려주세요!")
+            st.stop()
+        source, func = save_uploaded_media(uploaded_file.name, uploaded_file.getvalue()), None
+    else:
+        resolved = resolve_local_media_path((local_path or "").strip())
+        if resolved is None:
+            st.error(f"❌ {LOCAL_MEDIA_ROOT} 안의 경로만 변환할 수 있습니다!")
+            st.stop()
+        source = str(resolved)
+        if os.path.isdir(source):
+            if not find_local_media([source]):
+                st.error("❌ 폴더에 변환할 수 있는 미디어 파일이 없습니다!")
+                st.stop()
+            func = convert_local_folder
+        elif is_local_media(source):
+            func = None
+        else:
+            st.error("❌ 서버에 있는 미디어 파일이나 폴더 경로를 입력해주세요!")
+            st.stop()
+    
     # 미디어 보기 상태 초기화
     st.session_state.show_video = False
     st.session_state.show_audio = False
     st.session_state.show_text = False
     
-    # URL 유효성 간단 검사
-    if not ("youtube.com" in youtube_url or "youtu.be" in youtube_url):
-        st.error("❌ 올바른 유튜브 URL을 입력해주세요!")
-        st.stop()
+    if func is None:
+        st.session_state.job_id = job_manager.submit(url=source, pipeline=get_pipeline(), **job_options)
+    else:
+        # 폴더는 음성 추출 워커를 늘린 전용 파이프라인에서 파일들을 함께 처리
+        st.session_state.job_id = job_manager.submit(func, url=source, **job_options)
+    st.rerun()
+
+def _format_seconds(seconds):
+    seconds = int(seconds or 0)
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+def describe_progress(event):
+    """진행 이벤트를 상태 문구로 변환"""
+    stage = event.get('stage')
+    progress = event.get('progress')
+    if stage == 'download':
+        text = "🔄 영상 다운로드 중..."
+        if event.get('total_bytes'):
+            text += f" {event.get('downloaded_bytes', 0) / (1024 * 1024):.1f}/{event['total_bytes'] / (1024 * 1024):.1f} MB"
+        if event.get('eta') is not None:
+            text += f" · 남은 시간 {_format_seconds(event['eta'])}"
+        return text
+    if stage == 'extract':
+        return f"🎵 음성 추출 중... {int((progress or 0) * 100)}%"
+    if stage == 'transcribe':
+        if event.get('chunks_total'):
+            return f"📝 텍스트 변환 중... 구간 {event['chunks_done']}/{event['chunks_total']}"
+        if event.get('duration'):
+            return f"📝 텍스트 변환 중... {_format_seconds(event.get('processed_seconds'))} / {_format_seconds(event['duration'])}"
+        return "📝 텍스트 변환 중..."
+    if stage == 'persist':
+        return "💾 파일 저장 중..."
+    if stage == 'batch':
+        return f"📂 폴더 변환 중... {event['done']}/{event['total']}개 파일 완료"
+    return "🔄 영상 처리 중..."
+
+def render_batch_result(result):
+    """폴더 일괄 변환 결과 표시 (파일별 상태와 텍스트 파일 경로)"""
+    records = result['batch']
+    failed = sum(1 for record in records if record['status'] == "failed")
+    st.success(f"🎉 {len(records) - failed}개 파일 변환 완료" + (f" (실패 {failed}개)" if failed else ""))
+    status_labels = {"ok": "✅ 완료", "cached": "⚡ 캐시", "failed": "❌ 실패"}
+    st.dataframe([
+        {
+            "파일": Path(record['url']).name,
+            "상태": status_labels[record['status']],
+            "모델": record['model_size'],
+            "소요(초)": record['elapsed'],
+            "텍스트 파일": record['text_file'] or "",
+            "오류": record['error'] or "",
+        }
+        for record in records
+    ], hide_index=True, use_container_width=True)
+
+def is_original_source(result, file_path):
+    """업로드/서버 경로로 변환한 원본 파일 자체인지 (원본은 통째로 메모리에 읽어 보내지 않음)"""
+    return file_path == (result.get('metadata') or {}).get('source_path')
+
+def render_result(result):
+    """저장된 변환 결과 표시 (재실행해도 다시 계산하지 않음)"""
+    # 성공 메시지 (영구 저장 여부에 따라 다르게 표시)
+    if result.get('archived_files'):
+        st.success("🎉 모든 파일이 성공적으로 변환되었고 영구 보관함에 저장되었습니다!")
+    else:
+        st.success("🎉 모든 파일이 성공적으로 변환되었습니다!")
+    
+    # 결과 표시
+    st.markdown("### 📁 변환 결과")
+    st.markdown("<p style='color: #495057; margin-bottom: 1.5rem;'>다음 파일들이 성공적으로 생성되었습니다</p>", unsafe_allow_html=True)
+    if result.get('model_selection'):
+        selection = result['model_selection']
+        estimate = f", 예상 {selection['estimated_seconds']}초" if selection['estimated_seconds'] is not None else ""
+        st.info(f"🤖 자동 선택 모델: **{selection['model']}** (제한 {selection['latency_budget'] / 60:.0f}분{estimate})"
+                + ("" if selection['meets_budget'] is not False else " · 제한 시간 안에 끝날 모델이 없어 가장 빠른 모델 사용"))
+    if result.get('timings'):
+        first_text = (result.get('metrics') or {}).get('time_to_first_text')
+        st.caption("⏱️ " + ", ".join(f"{name} {seconds}초" for name, seconds in result['timings'].items())
+                   + (f" · 첫 텍스트까지 {first_text}초" if first_text is not None else ""))
+    
+    # 다운로드 버튼들
+    col1, col2, col3 = st.columns(3)
+    
+    # MP4 다운로드 및 보기
+    if result['video_file'] and Path(result['video_file']).exists():
+        with col1:
+            # 다운로드 버튼 (파일 서버에서 바로 받도록 링크 제공)
+            video_url = artifact_url(result['video_file'], download=True)
+            video_original = is_original_source(result, result['video_file'])
+            if video_url:
+                st.link_button("📹 영상 다운로드", video_url)
+            elif video_original:
+                st.caption(f"📁 원본 영상: {result['video_file']}")
+            else:
+                # 파일 서버에 닿지 않는 브라우저: 눌렀을 때만 파일을 읽도록 data를 함수로 넘김
+                st.download_button(
+                    "📹 영상 다운로드",
+                    Path(result['video_file']).read_bytes,
+                    file_name=Path(result['video_file']).name,
+                    mime="video/mp4"
+                )
+            # 영상 보기 버튼 (파일 서버 URL이 있을 때만; 경로를 넘기면 파일 전체가 세션 메모리에 올라감)
+            if video_url and st.button("🎬 영상보기", key="view_video"):
+                st.session_state.show_video = True
+    
+    # MP3 다운로드 및 듣기
+    if result['audio_file'] and Path(result['audio_file']).exists():
+        with col2:
+            # 다운로드 버튼 (파일 서버에서 바로 받도록 링크 제공)
+            audio_url = artifact_url(result['audio_file'], download=True)
+            audio_original = is_original_source(result, result['audio_file'])
+            if audio_url:
+                st.link_button("🎵 오디오 다운로드", audio_url)
+            elif audio_original:
+                st.caption(f"📁 원본 음성: {result['audio_file']}")
+            else:
+                st.download_button(
+                    "🎵 오디오 다운로드",
+                    Path(result['audio_file']).read_bytes,
+                    file_name=Path(result['audio_file']).name,
+                    mime="audio/mpeg"
+                )
+            # 오디오 듣기 버튼 (영상과 같은 이유로 파일 서버 URL이 있을 때만)
+            if audio_url and st.button("🔊 음성듣기", key="listen_audio"):
+                st.session_state.show_audio = True
+    
+    # TXT 다운로드 및 보기
+    if result['text_file'] and Path(result['text_file']).exists():
+        with col3:
+            # 다운로드 버튼
+            st.download_button(
+                "📄 텍스트 다운로드",
+                result['text_content'],
+                file_name=Path(result['text_file']).name,
+                mime="text/plain"
+            )
+            # 텍스트 보기 버튼
+            if st.button("📝 텍스트보기", key="view_text"):
+                st.session_state.show_text = True
+    
+    # 자막 다운로드 (Whisper 세그먼트 시각 포함)
+    subtitle_files = {ext: path for ext, path in (result.get('subtitle_files') or {}).items()
+                      if ext in ("srt", "vtt") and Path(path).exists()}
+    if subtitle_files:
+        subtitle_cols = st.columns(3)
+        for col, (ext, path) in zip(subtitle_cols, subtitle_files.items()):
+            with col:
+                with open(path, 'r', encoding='utf-8') as f:
+                    st.download_button(
+                        f"🎞️ 자막 다운로드 (.{ext})",
+                        f.read(),
+                        file_name=Path(path).name,
+                        mime="application/x-subrip" if ext == "srt" else "text/vtt",
+                        key=f"download_{ext}"
+                    )
+    
+    # 미디어 표시 섹션
+    st.markdown("<hr style='margin: 2rem 0; border: none; height: 1px; background-color: #dee2e6;'>", unsafe_allow_html=True)
+    st.markdown("### 🎬 미디어 보기")
+    
+    media_urls = {
+        kind: artifact_url(result[key]) if result[key] and Path(result[key]).exists() else None
+        for kind, key in (("video", 'video_file'), ("audio", 'audio_file'))
+    }
+    if not any(media_urls.values()) and (result['video_file'] or result['audio_file']):
+        st.caption("ℹ️ 이 주소에서는 파일 서버에 접속할 수 없어 브라우저 재생을 건너뜁니다. "
+                   "다운로드 버튼을 쓰거나 ARTIFACT_PUBLIC_URL을 설정하세요.")
+    
+    # 영상 보기
+    if st.session_state.show_video and media_urls["video"]:
+        st.markdown("#### 📹 영상")
+        # URL을 넘기면 브라우저가 Range 요청으로 필요한 부분만 받음
+        st.video(media_urls["video"])
     
-    # 처리 시작 - 상태 변경
-    st.session_state.is_processing = True
+    # 오디오 듣기
+    if st.session_state.show_audio and media_urls["audio"]:
+        st.markdown("#### 🔊 오디오")
+        st.audio(media_urls["audio"])
     
-    # 진행 상황 표시
+    # 텍스트 미리보기
+    if (st.session_state.show_text or result['text_content']) and result['text_file'] and Path(result['text_file']).exists():
+        st.markdown("<h4 id='text_preview'>📄 텍스트 미리보기</h4>", unsafe_allow_html=True)
+        st.markdown("<p style='color: #495057; margin-bottom: 1rem;'>AI가 변환한 텍스트 내용입니다</p>", unsafe_allow_html=True)
+        st.text_area(
+            "변환 결과",
+            result['text_content'],
+            height=200
+        )
+
+@st.fragment(run_every=1)
+def render_job_progress(job_id):
+    """진행 중인 작업 상태만 1초마다 다시 그림 (페이지 전체를 다시 실행하지 않음)"""
+    job = job_manager.get(job_id)
+    if job is None or job['state'] not in ('queued', 'running'):
+        # 끝났거나 정리된 작업이면 전체 화면을 다시 그려 결과나 안내를 표시
+        st.rerun()
+    if job['state'] == 'queued':
+        st.progress(0.0)
+        st.markdown(f"<p style='color: #495057; font-size: 0.9rem;'>⏳ 대기 중... (실행 중인 작업 {job_manager.active_count()}개)</p>", unsafe_allow_html=True)
+    else:
+        event = job['progress'] or {}
+        st.progress(min(1.0, event.get('overall') or 0.0))
+        st.markdown(f"<p style='color: #495057; font-size: 0.9rem;'>{describe_progress(event)}</p>", unsafe_allow_html=True)
+        if job.get('partial_text'):
+            # 변환된 부분까지 바로 보여 줌 (세그먼트가 나올 때마다 늘어남)
+            st.text_area("변환 중인 텍스트", job['partial_text'], height=200)
+
+# 작업 상태 및 결과 표시
+if st.session_state.job_id and not current_job:
+    # 끝난 작업이 많아 JobManager가 정리했거나 서버가 재시작되어 더 이상 조회할 수 없음
+    st.session_state.job_id = None
+    st.warning("이전 작업 기록이 정리되어 결과를 더 이상 표시할 수 없습니다. 보관함에서 찾거나 다시 변환해 주세요.")
+
+if current_job and is_processing:
+    render_job_progress(st.session_state.job_id)
+
+elif current_job:
     progress_container = st.container()
     with progress_container:
         progress_bar = st.progress(0)
         status_text = st.empty()
     
-    # 변환 중 표시
-    with st.spinner("🎬 영상 처리 중입니다..."):
-        try:
-            # 단계별 진행 상황 업데이트
-            progress_bar.progress(0.25)
-            status_text.markdown("<p style='color: #495057; font-size: 0.9rem;'>🔄 영상 다운로드 중...</p>", unsafe_allow_html=True)
-            
-            # 변환 실행
-            result = process_youtube_to_text(
-                url=youtube_url.strip(),
-                output_path="downloads",
-                model_size=model_size,
-                save_to_archive=save_to_archive
-            )
-            
-            # 결과 처리
-            if result['success']:
-                progress_bar.progress(1.0)
-                status_text.markdown("<p style='color: #2b8a3e; font-size: 0.9rem; font-weight: 500;'>✅ 변환 완료!</p>", unsafe_allow_html=True)
-                
-                # 성공 메시지 (영구 저장 여부에 따라 다르게 표시)
-                if save_to_archive and result.get('archived_files'):
-                    st.success("🎉 모든 파일이 성공적으로 변환되었고 영구 보관함에 저장되었습니다!")
-                else:
-                    st.success("🎉 모든 파일이 성공적으로 변환되었습니다!")
-                
-                # 결과 표시
-                st.markdown("### 📁 변환 결과")
-                st.markdown("<p style='color: #495057; margin-bottom: 1.5rem;'>다음 파일들이 성공적으로 생성되었습니다</p>", unsafe_allow_html=True)
-                
-                # 다운로드 버튼들
-                col1, col2, col3 = st.columns(3)
-                
-                # MP4 다운로드 및 보기
-                if result['video_file'] and Path(result['video_file']).exists():
-                    with col1:
-                        # 다운로드 버튼
-                        with open(result['video_file'], 'rb') as f:
-                            video_data = f.read()
-                            st.download_button(
-                                "📹 영상 다운로드",
-                                video_data,
-                                file_name=Path(result['video_file']).name,
-                                mime="video/mp4"
-                            )
-                        # 영상 보기 버튼
-                        if st.button("🎬 영상보기", key="view_video"):
-                            st.session_state.show_video = True
-                
-                # MP3 다운로드 및 듣기
-                if result['audio_file'] and Path(result['audio_file']).exists():
-                    with col2:
-                        # 다운로드 버튼
-                        with open(result['audio_file'], 'rb') as f:
-                            audio_data = f.read()
-                            st.download_button(
-                                "🎵 오디오 다운로드",
-                                audio_data,
-                                file_name=Path(result['audio_file']).name,
-                                mime="audio/mpeg"
-                            )
-                        # 오디오 듣기 버튼
-                        if st.button("🔊 음성듣기", key="listen_audio"):
-                            st.session_state.show_audio = True
-                
-                # TXT 다운로드 및 보기
-                if result['text_file'] and Path(result['text_file']).exists():
-                    with col3:
-                        # 다운로드 버튼
-                        st.download_button(
-                            "📄 텍스트 다운로드",
-                            result['text_content'],
-                            file_name=Path(result['text_file']).name,
-                            mime="text/plain"
-                        )
-                        # 텍스트 보기 버튼
-                        if st.button("📝 텍스트보기", key="view_text"):
-                            st.session_state.show_text = True
-                
-                # 미디어 표시 섹션
-                st.markdown("<hr style='margin: 2rem 0; border: none; height: 1px; background-color: #dee2e6;'>", unsafe_allow_html=True)
-                st.markdown("### 🎬 미디어 보기")
-                
-                # 영상 보기
-                if st.session_state.show_video and result['video_file'] and Path(result['video_file']).exists():
-                    st.markdown("#### 📹 영상")
-                    st.video(result['video_file'])
-                
-                # 오디오 듣기
-                if st.session_state.show_audio and result['audio_file'] and Path(result['audio_file']).exists():
-                    st.markdown("#### 🔊 오디오")
-                    st.audio(result['audio_file'])
-                
-                # 텍스트 미리보기
-                if (st.session_state.show_text or result['text_content']) and result['text_file'] and Path(result['text_file']).exists():
-                    st.markdown("<h4 id='text_preview'>📄 텍스트 미리보기</h4>", unsafe_allow_html=True)
-                    st.markdown("<p style='color: #495057; margin-bottom: 1rem;'>AI가 변환한 텍스트 내용입니다</p>", unsafe_allow_html=True)
-                    st.text_area(
-                        "변환 결과",
-                        result['text_content'],
-                        height=200
-                    )
-            
-            else:
-                # 오류 처리
-                progress_bar.progress(0)
-                status_text.markdown("<p style='color: #c92a2a; font-size: 0.9rem; font-weight: 500;'>❌ 변환 실패</p>", unsafe_allow_html=True)
-                st.error(f"변환에 실패했습니다: {result['error']}")
-                st.markdown("<p style='color: #495057; font-size: 0.9rem; margin-top: 1rem;'>다른 URL을 시도하거나 나중에 다시 시도해보세요.</p>", unsafe_allow_html=True)
-                
-        except Exception as e:
-            progress_bar.progress(0)
-            status_text.markdown("<p style='color: #c92a2a; font-size: 0.9rem; font-weight: 500;'>❌ 오류 발생</p>", unsafe_allow_html=True)
-            st.error(f"처리 중 오류가 발생했습니다: {str(e)}")
-            st.markdown("<p style='color: #495057; font-size: 0.9rem; margin-top: 1rem;'>URL이 올바른지 확인하고 다시 시도해보세요.</p>", unsafe_allow_html=True)
-        
-        finally:
-            # 처리 완료 - 상태 재설정
-            st.session_state.is_processing = False
\ No newline at end of file
+    if current_job['state'] == 'done':
+        progress_bar.progress(1.0)
+        status_text.markdown("<p style='color: #2b8a3e; font-size: 0.9rem; font-weight: 500;'>✅ 변환 완료!</p>", unsafe_allow_html=True)
+        if current_job['result'].get('batch') is not None:
+            render_batch_result(current_job['result'])
+        else:
+            render_result(current_job['result'])
+    
+    else:
+        # 오류 처리
+        progress_bar.progress(0)
+        status_text.markdown("<p style='color: #c92a2a; font-size: 0.9rem; font-weight: 500;'>❌ 변환 실패</p>", unsafe_allow_html=True)
+        st.error(f"변환에 실패했습니다: {current_job['error']}")
+        st.markdown("<p style='color: #495057; font-size: 0.9rem; margin-top: 1rem;'>다른 URL을 시도하거나 나중에 다시 시도해보세요.</p>", unsafe_allow_html=True)
@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+변환 파이프라인 오프라인 벤치마크
+
+ffmpeg로 매번 똑같이 만들어지는 로컬 미디어(음 신호, 말소리 비슷한 잡음, 무음)를
+음성 추출, 텍스트 변환, 전체 파이프라인(다운로드는 로컬 파일 복사로 대체)에 통과시켜
+단계별 지연 시간, 처리량, 최대 메모리(RSS), 실시간 배율(RTF)을 측정하고 JSON으로 저장합니다.
+음성 인식 엔진을 여러 개 주면 같은 미디어/모델에서 엔진끼리 속도와 메모리를 비교합니다.
+
+사용 예:
+    python bench.py --models tiny,base --durations 15,60 --output bench.json
+    python bench.py --output after.json --compare before.json
+    python bench.py --models base --durations 60 --benchmarks transcribe --backends whisper,faster-whisper
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import utils
+
+BENCHMARKS = ("extract", "transcribe", "pipeline")
+FIXTURE_KINDS = ("tone", "speech", "silence")
+FIXTURE_DURATIONS = (15, 60, 600, 3600)
+
+# 종류별 lavfi 음원 (잡음은 시드를 고정해 매번 같은 파일 생성)
+FIXTURE_SOURCES = {
+    "tone": "sine=frequency=440:sample_rate=44100:duration={duration}",
+    # 전화 대역 분홍 잡음을 음절 속도(4 Hz)로 흔들고 5초마다 1초씩 쉬는 말소리 흉내
+    "speech": ("anoisesrc=color=pink:sample_rate=44100:seed=1234:duration={duration},"
+               "highpass=f=300,lowpass=f=3400,tremolo=f=4:d=0.9,"
+               "volume='if(lt(mod(t,5),4),1,0)':eval=frame"),
+    "silence": "anullsrc=channel_layout=mono:sample_rate=44100,atrim=duration={duration}",
+}
+
+def parse_args():
+    """명령행 인자 파싱"""
+    parser = argparse.ArgumentParser(description="유튜브 → 텍스트 변환 파이프라인 오프라인 벤치마크")
+    parser.add_argument("--models", default="tiny,base", help="측정할 Whisper 모델 크기 (쉼표 구분, 기본: tiny,base)")
+    parser.add_argument("--backends", default="whisper",
+                        help=f"측정할 음성 인식 엔진 (쉼표 구분, 가능한 값: {','.join(utils.ASR_BACKENDS)}, 기본: whisper)")
+    parser.add_argument("--kinds", default=",".join(FIXTURE_KINDS),
+                        help=f"테스트 미디어 종류 (쉼표 구분, 기본: {','.join(FIXTURE_KINDS)})")
+    parser.add_argument("--durations", default=",".join(str(d) for d in FIXTURE_DURATIONS),
+                        help="테스트 미디어 길이(초, 쉼표 구분, 기본: 15,60,600,3600)")
+    parser.add_argument("--benchmarks", default=",".join(BENCHMARKS),
+                        help=f"실행할 측정 (쉼표 구분, 기본: {','.join(BENCHMARKS)})")
+    parser.add_argument("--repeat", type=int, default=1, help="측정 반복 횟수, 중앙값을 보고 (기본: 1)")
+    parser.add_argument("--long-audio-workers", type=int, default=None,
+                        help="파이프라인 측정 시 긴 음성 분할 병렬 변환 프로세스 수")
+    parser.add_argument("--fixture-dir", default="bench_fixtures", help="테스트 미디어 저장 폴더")
+    parser.add_argument("--work-dir", default="bench_work", help="측정 중 생기는 파일을 둘 임시 폴더")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON (느려진 항목이 있으면 종료 코드 1)")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="비교 시 느려졌다고 볼 비율(%%, 기본: 10)")
+    return parser.parse_args()
+
+def _split(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+def generate_fixture(kind, duration, fixture_dir="bench_fixtures"):
+    """검은 화면 + 음원으로 된 mp4 테스트 미디어 생성 (이미 있으면 재사용)"""
+    path = Path(fixture_dir) / f"{kind}_{duration}s.mp4"
+    if path.exists() and path.stat().st_size > 0:
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    partial = path.with_name(path.stem + ".part.mp4")
+    command = [
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-f', 'lavfi', '-i', f"color=c=black:size=320x240:rate=5:duration={duration}",
+        '-f', 'lavfi', '-i', FIXTURE_SOURCES[kind].format(duration=duration),
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-tune', 'stillimage',
+        '-c:a', 'aac', '-b:a', '128k', '-ac', '1', '-shortest',
+        '-map_metadata', '-1', '-fflags', '+bitexact', '-flags:v', '+bitexact', '-flags:a', '+bitexact',
+        str(partial),
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"❌ 테스트 미디어 생성 실패 ({path.name}): {result.stderr.strip()[-500:]}")
+        return None
+    os.replace(partial, path)
+    print(f"🎞️ 테스트 미디어 생성: {path}")
+    return path
+
+def _maxrss_mb():
+    """getrusage 기준 최대 RSS(MB), 지원하지 않는 플랫폼이면 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    # Linux는 KB, macOS는 바이트 단위
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(usage.ru_maxrss / divisor, 1)
+
+def _current_rss_mb():
+    """현재 RSS(MB), /proc를 읽을 수 없으면 None"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+class PeakMemory:
+    """
+    구간 동안의 최대 RSS 측정기
+
+    /proc에서 주기적으로 현재 RSS를 읽어 구간별 최대값을 구하고, 읽을 수 없으면
+    프로세스 전체 최대값(getrusage)으로 대신합니다.
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            rss = _current_rss_mb()
+            if rss is not None:
+                self.peak_mb = max(self.peak_mb or 0, rss)
+
+    def __enter__(self):
+        self.peak_mb = _current_rss_mb()
+        if self.peak_mb is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            rss = _current_rss_mb()
+            self.peak_mb = round(max(self.peak_mb, rss or 0), 1)
+        else:
+            self.peak_mb = _maxrss_mb()
+        return False
+
+def measure(func, *args, **kwargs):
+    """함수 한 번 실행하여 (반환값, 소요 시간, 최대 RSS) 측정"""
+    with PeakMemory() as memory:
+        started = time.perf_counter()
+        value = func(*args, **kwargs)
+        seconds = time.perf_counter() - started
+    return value, round(seconds, 3), memory.peak_mb
+
+def _summarize_runs(runs, duration, extra=None):
+    """반복 측정 결과를 중앙값 기준 기록 하나로 요약"""
+    seconds = statistics.median(run['seconds'] for run in runs)
+    record = {
+        'runs': [run['seconds'] for run in runs],
+        'seconds': round(seconds, 3),
+        'peak_rss_mb': max((run['peak_rss_mb'] or 0) for run in runs) or None,
+        'media_seconds_per_second': round(duration / seconds, 2) if seconds else None,
+        'rtf': round(seconds / duration, 4) if duration else None,
+    }
+    record.update(extra or {})
+    return record
+
+def bench_extract(fixture, duration, repeat, work_dir):
+    """extract_audio_to_mp3 측정 (처리량은 초당 처리한 미디어 길이와 MB)"""
+    runs = []
+    audio_path = Path(work_dir) / f"{fixture.stem}.mp3"
+    for _ in range(repeat):
+        if audio_path.exists():
+            audio_path.unlink()
+        value, seconds, peak = measure(utils.extract_audio_to_mp3, str(fixture), str(audio_path))
+        if not value:
+            return None
+        runs.append({'seconds': seconds, 'peak_rss_mb': peak})
+
+    record = _summarize_runs(runs, duration)
+    if record['seconds']:
+        record['input_mb_per_second'] = round(fixture.stat().st_size / (1024 * 1024) / record['seconds'], 2)
+    record['audio_file'] = str(audio_path)
+    return record
+
+def bench_transcribe(audio_path, duration, model_size, registry, repeat, backend=None):
+    """convert_audio_to_text 측정 (모델 로드 시간과 로드로 늘어난 RSS는 따로 기록)"""
+    info = {}
+    rss_before = _current_rss_mb()
+    registry.get(model_size, info, backend)
+    rss_after = _current_rss_mb()
+    runs = []
+    for _ in range(repeat):
+        _, seconds, peak = measure(utils.convert_audio_to_text, audio_path, model_size, registry,
+                                   backend=backend)
+        runs.append({'seconds': seconds, 'peak_rss_mb': peak})
+    return _summarize_runs(runs, duration, {
+        'model_load_seconds': info.get('load_seconds'),
+        'model_cache_hit': info.get('cache_hit'),
+        'model_rss_mb': (round(rss_after - rss_before, 1)
+                         if rss_before is not None and rss_after is not None and not info.get('cache_hit') else None),
+    })
+
+def _fixture_video_id(fixture):
+    """테스트 미디어별 고정 가짜 비디오 ID (11자)"""
+    return hashlib.sha1(fixture.stem.encode('utf-8')).hexdigest()[:11]
+
+@contextmanager
+def local_download(fixture, duration):
+    """download_youtube_video를 로컬 파일 복사로 대체 (네트워크 없이 파이프라인 측정)"""
+    original = utils.download_youtube_video
+
+    def fake_download(url, output_path="downloads", audio_only=False, return_info=False,
+                      progress_callback=None, timings=None):
+        video_id = utils.extract_video_id(url)
+        dest = Path(output_path) / f"video_{video_id}" / f"{video_id}{fixture.suffix}"
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(fixture, dest)
+        if timings is not None:
+            timings['metadata'] = 0.0
+        metadata = {'id': video_id, 'title': fixture.stem, 'duration': duration, 'ext': fixture.suffix[1:]}
+        return (str(dest), metadata) if return_info else str(dest)
+
+    utils.download_youtube_video = fake_download
+    try:
+        yield
+    finally:
+        utils.download_youtube_video = original
+
+def bench_pipeline(fixture, duration, model_size, registry, repeat, work_dir, long_audio_workers=None,
+                   backend=None):
+    """process_youtube_to_text 전체 측정 (캐시와 산출물 재사용 없이, 단계별 시간은 중앙값)"""
+    url = f"https://www.youtube.com/watch?v={_fixture_video_id(fixture)}"
+    registry.get(model_size, backend=backend)
+    runs = []
+    with local_download(fixture, duration):
+        for _ in range(repeat):
+            result, seconds, peak = measure(
+                utils.process_youtube_to_text, url,
+                output_path=str(Path(work_dir) / "downloads"),
+                model_size=model_size, model_registry=registry, use_cache=False,
+                refresh_cache=True,  # 이전 반복의 산출물을 재사용하지 않고 모든 단계를 다시 측정
+                long_audio_workers=long_audio_workers, asr_backend=backend,
+                # 합성 음성의 측정값이 자동 모델 선택용 기록(cache/model_speed.json)에 섞이지 않도록
+                speed_profile=utils.ModelSpeedProfile(path=Path(work_dir) / "model_speed.json"),
+                allow_empty_text=True,  # 무음/톤 음성은 빈 텍스트가 정상
+            )
+            if not result['success']:
+                print(f"❌ 파이프라인 실패: {result['error']}")
+                return None
+            runs.append({'seconds': seconds, 'peak_rss_mb': peak,
+                         'timings': result['timings'], 'metrics': result['metrics']})
+
+    stages = sorted({name for run in runs for name in run['timings']})
+    stage_seconds = {
+        name: round(statistics.median(run['timings'][name] for run in runs if name in run['timings']), 3)
+        for name in stages
+    }
+    return _summarize_runs(runs, duration, {
+        'stages': stage_seconds,
+        'transcribe_rtf': runs[-1]['metrics'].get('real_time_factor'),
+        'bytes_written': runs[-1]['metrics'].get('bytes_written'),
+    })
+
+def environment_info():
+    """결과 비교 시 참고할 실행 환경"""
+    info = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+    try:
+        output = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True).stdout
+        info['ffmpeg'] = output.splitlines()[0] if output else None
+    except OSError:
+        info['ffmpeg'] = None
+    try:
+        import torch
+        info['torch'] = torch.__version__
+        info['cuda'] = torch.cuda.is_available()
+    except ImportError:
+        pass
+    from importlib.metadata import version
+    for key, package in (('whisper', "openai-whisper"), ('faster_whisper', "faster-whisper"),
+                         ('ctranslate2', "ctranslate2")):
+        try:
+            info[key] = version(package)
+        except Exception:
+            pass
+    return info
+
+def _result_key(record):
+    # 엔진 구분이 없던 이전 결과는 기본 엔진(whisper) 결과로 봄
+    return record['benchmark'], record['fixture'], record.get('model'), record.get('backend') or "whisper"
+
+def compare_results(results, baseline_path, threshold=10.0):
+    """이전 결과와 중앙값 시간을 비교해 출력, 느려진 항목 수 반환"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {_result_key(r): r for r in json.load(f).get('results', [])}
+
+    regressions = 0
+    print(f"\n📊 이전 결과와 비교 ({baseline_path})")
+    for record in results:
+        before = baseline.get(_result_key(record))
+        if not before or not before.get('seconds'):
+            continue
+        change = (record['seconds'] - before['seconds']) / before['seconds'] * 100
+        slower = change > threshold
+        regressions += slower
+        model = f" [{record['model']}/{record['backend']}]" if record.get('model') else ""
+        print(f"  {'🐢' if slower else '✅'} {record['benchmark']} {record['fixture']}{model}: "
+              f"{before['seconds']}초 → {record['seconds']}초 ({change:+.1f}%)")
+    return regressions
+
+def compare_backends(results, baseline_backend="whisper"):
+    """같은 측정/미디어/모델에서 엔진별 속도와 메모리를 기준 엔진과 비교해 출력하고 목록 반환"""
+    baselines = {(r['benchmark'], r['fixture'], r['model']): r for r in results
+                 if r.get('backend') == baseline_backend}
+    comparisons = []
+    for record in results:
+        base = baselines.get((record['benchmark'], record['fixture'], record.get('model')))
+        if not base or record.get('backend') in (None, baseline_backend):
+            continue
+        comparison = {
+            'benchmark': record['benchmark'],
+            'fixture': record['fixture'],
+            'model': record['model'],
+            'backend': record['backend'],
+            'baseline': baseline_backend,
+            'speedup': round(base['seconds'] / record['seconds'], 2) if record['seconds'] else None,
+            'peak_rss_ratio': (round(record['peak_rss_mb'] / base['peak_rss_mb'], 2)
+                               if record.get('peak_rss_mb') and base.get('peak_rss_mb') else None),
+            'model_rss_mb': record.get('model_rss_mb'),
+            'baseline_model_rss_mb': base.get('model_rss_mb'),
+        }
+        comparisons.append(comparison)
+    if comparisons:
+        print(f"\n⚖️ 엔진 비교 (기준: {baseline_backend})")
+        for c in comparisons:
+            memory = f", 최대 RSS {c['peak_rss_ratio']}배" if c['peak_rss_ratio'] is not None else ""
+            if c['model_rss_mb'] is not None and c['baseline_model_rss_mb'] is not None:
+                memory += f", 모델 메모리 {c['baseline_model_rss_mb']:.0f} → {c['model_rss_mb']:.0f} MB"
+            print(f"  {c['benchmark']} {c['fixture']} [{c['model']}] {c['backend']}: {c['speedup']}배 빠름{memory}")
+    return comparisons
+
+def run_benchmarks(args):
+    """선택한 테스트 미디어와 모델 조합으로 측정 실행"""
+    benchmarks = _split(args.benchmarks)
+    models = _split(args.models)
+    backends = []
+    for backend in _split(args.backends):
+        if backend not in utils.ASR_BACKENDS or not utils.ASR_BACKEND_CLASSES[backend].available():
+            print(f"⚠️ 음성 인식 엔진을 쓸 수 없어 건너뜀: {backend}")
+            continue
+        backends.append(backend)
+    durations = [int(d) for d in _split(args.durations)]
+    work_dir = Path(args.work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    registry = utils.ModelRegistry()
+
+    # 첫 측정에 임포트 시간이 섞이지 않도록 먼저 불러오고 따로 기록
+    for name in ("numpy",) + tuple(utils.ASR_BACKEND_CLASSES[backend].module for backend in backends):
+        utils.lazy_import(name)
+    print("📦 모듈 임포트: " + ", ".join(f"{name} {sec}초" for name, sec in utils.import_times.items()))
+
+    results = []
+    for duration in durations:
+        for kind in _split(args.kinds):
+            fixture = generate_fixture(kind, duration, args.fixture_dir)
+            if fixture is None:
+                continue
+            base = {'fixture': fixture.stem, 'kind': kind, 'duration': duration}
+
+            print(f"⏱️ {fixture.stem}: 음성 추출 측정")
+            extracted = bench_extract(fixture, duration, args.repeat, work_dir)
+            if extracted is None:
+                print(f"❌ 음성 추출 실패: {fixture}")
+                continue
+            audio_file = extracted.pop('audio_file')
+            if "extract" in benchmarks:
+                results.append(dict(base, benchmark="extract", **extracted))
+
+            for model_size, backend in ((m, b) for m in models for b in backends):
+                if len(backends) > 1:
+                    # 엔진끼리 메모리를 비교할 수 있도록 다른 엔진의 모델은 내려놓고 측정
+                    registry.clear()
+                    gc.collect()
+                label = f"{fixture.stem} [{model_size}/{backend}]"
+                if "transcribe" in benchmarks:
+                    print(f"⏱️ {label}: 텍스트 변환 측정")
+                    record = bench_transcribe(audio_file, duration, model_size, registry, args.repeat, backend)
+                    results.append(dict(base, benchmark="transcribe", model=model_size, backend=backend, **record))
+                if "pipeline" in benchmarks:
+                    print(f"⏱️ {label}: 전체 파이프라인 측정")
+                    record = bench_pipeline(fixture, duration, model_size, registry, args.repeat,
+                                            work_dir, args.long_audio_workers, backend)
+                    if record:
+                        results.append(dict(base, benchmark="pipeline", model=model_size, backend=backend,
+                                            **record))
+    return results
+
+def print_results(results):
+    """측정 결과 요약 표 출력"""
+    print("\n" + "=" * 96)
+    print(f"{'측정':<11}{'미디어':<15}{'모델':<8}{'엔진':<16}{'시간(초)':>10}{'RTF':>9}{'배속':>9}{'RSS(MB)':>10}")
+    print("-" * 96)
+    for r in results:
+        rtf = f"{r['rtf']:.3f}" if r.get('rtf') is not None else "-"
+        speed = f"{r['media_seconds_per_second']:.1f}x" if r.get('media_seconds_per_second') else "-"
+        print(f"{r['benchmark']:<11}{r['fixture']:<15}{r.get('model') or '-':<8}{r.get('backend') or '-':<16}"
+              f"{r['seconds']:>10.3f}{rtf:>9}{speed:>9}{r['peak_rss_mb'] or 0:>10.0f}")
+        if r.get('stages'):
+            print("           └ " + ", ".join(f"{name} {sec}초" for name, sec in r['stages'].items()))
+
+def main():
+    """벤치마크 메인 함수"""
+    args = parse_args()
+
+    print("🏁 변환 파이프라인 벤치마크")
+    print("=" * 50)
+
+    if not shutil.which("ffmpeg"):
+        print("❌ ffmpeg를 찾을 수 없습니다. 테스트 미디어를 만들 수 없습니다.")
+        sys.exit(1)
+
+    results = run_benchmarks(args)
+    print_results(results)
+    backend_comparison = compare_backends(results)
+
+    report = {
+        'created_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'environment': environment_info(),
+        'options': {
+            'models': _split(args.models),
+            'backends': _split(args.backends),
+            'kinds': _split(args.kinds),
+            'durations': [int(d) for d in _split(args.durations)],
+            'repeat': args.repeat,
+        },
+        'import_seconds': dict(utils.import_times),
+        'results': results,
+        'backend_comparison': backend_comparison,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n📄 결과 저장: {args.output}")
+
+    if args.compare and compare_results(results, args.compare, args.threshold):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
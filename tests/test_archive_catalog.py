@@ -0,0 +1,28 @@
+"""ArchiveCatalog 테스트"""
+
+import time
+
+from utils import ArchiveCatalog
+
+
+def test_archive_catalog_keeps_same_second_runs(tmp_path):
+    catalog = ArchiveCatalog(tmp_path / "catalog.sqlite3")
+    run_timestamp = float(int(time.time()))
+    for offset, model_size in ((0.1, "tiny"), (0.2, "base"), (0.2, "small")):
+        catalog.record_run("abc", run_timestamp + offset, model_size=model_size)
+    catalog.record_run("abc", run_timestamp + 0.2, model_size="base", title="다시 실행")
+
+    runs = catalog.list_runs(video_id="abc")
+    assert catalog.count_runs() == 3
+    assert sorted(run['model_size'] for run in runs) == ["base", "small", "tiny"]
+    assert [run['title'] for run in runs if run['model_size'] == "base"] == ["다시 실행"]
+
+
+def test_archive_catalog_search(tmp_path):
+    catalog = ArchiveCatalog(tmp_path / "catalog.sqlite3")
+    catalog.index_transcript("abc", 1.5, text="안녕하세요 테스트 문장", text_path=str(tmp_path / "abc.txt"))
+    if not catalog.fts_enabled:
+        assert catalog.search("테스트") == []
+        return
+    assert catalog.count_search("테스트") == 1
+    assert catalog.search("테스트")[0]['video_id'] == "abc"
@@ -0,0 +1,99 @@
+"""archive_file 보관 정책과 이동 정책의 임대 확인 테스트"""
+
+import os
+import time
+
+import pytest
+
+import utils
+from utils import ArchiveCatalog, DownloadCache, archive_file
+
+
+@pytest.fixture
+def src(tmp_path):
+    path = tmp_path / "audio.mp3"
+    path.write_bytes(b"audio")
+    return path
+
+
+def test_copy_policy_keeps_source(src, tmp_path):
+    dest = tmp_path / "copy.mp3"
+    assert archive_file(src, dest, "copy") == "copy"
+    assert dest.read_bytes() == b"audio" and src.exists()
+    assert not os.path.samefile(src, dest)
+
+
+def test_link_policy_shares_data_when_possible(src, tmp_path):
+    dest = tmp_path / "link.mp3"
+    method = archive_file(src, dest, "link")
+    assert method in ("reflink", "hardlink", "copy")
+    assert dest.read_bytes() == b"audio" and src.exists()
+    if method == "hardlink":
+        assert os.path.samefile(src, dest)
+
+
+def test_move_policy_removes_source(src, tmp_path):
+    dest = tmp_path / "moved.mp3"
+    assert archive_file(src, dest, "move") in ("rename", "move")
+    assert dest.read_bytes() == b"audio" and not src.exists()
+
+
+def test_unknown_policy(src, tmp_path):
+    with pytest.raises(ValueError):
+        archive_file(src, tmp_path / "x.mp3", "symlink")
+
+
+def test_reflink_keeps_existing_dest(src, tmp_path):
+    dest = tmp_path / "archived.mp3"
+    dest.write_bytes(b"archived by another job")
+    assert utils._try_reflink(src, dest) is False
+    assert dest.read_bytes() == b"archived by another job"
+
+
+def _archive_job(tmp_path, downloads, video_id):
+    """다운로드 폴더를 임대한 채 보관 단계에 이른 이동 정책 작업"""
+    folder = downloads / f"video_{video_id}"
+    folder.mkdir(parents=True)
+    audio = folder / f"{video_id}.mp3"
+    audio.write_bytes(b"audio")
+    cache = DownloadCache(downloads)
+    cache.acquire(video_id)
+    return {
+        'video_id': video_id,
+        'local_path': None,
+        'archive_policy': "move",
+        'leased_id': video_id,
+        'download_cache': cache,
+        'catalog': ArchiveCatalog(tmp_path / "catalog.sqlite3"),
+        'model_size': "base",
+        'asr_backend': "whisper",
+        'created_at': time.time(),
+        'result': {
+            'video_file': None, 'audio_file': str(audio), 'text_file': None, 'subtitle_files': {},
+            'metadata': {}, 'segments': [], 'text_content': "",
+        },
+    }
+
+
+def test_move_policy_links_while_another_job_holds_the_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "ARCHIVE_ROOT", str(tmp_path / "archives"))
+    job = _archive_job(tmp_path, tmp_path / "downloads", "abc")
+    audio = job['result']['audio_file']
+    job['download_cache'].acquire("abc")  # 같은 영상을 처리 중인 다른 작업
+
+    utils._archive_job_files(job)
+
+    assert os.path.exists(audio)
+    assert job['result']['audio_file'] == audio
+    assert (tmp_path / "archives" / "video_abc" / "abc.mp3").read_bytes() == b"audio"
+
+
+def test_move_policy_moves_when_only_this_job_holds_the_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "ARCHIVE_ROOT", str(tmp_path / "archives"))
+    job = _archive_job(tmp_path, tmp_path / "downloads", "abc")
+    audio = job['result']['audio_file']
+
+    utils._archive_job_files(job)
+
+    assert not os.path.exists(audio)
+    assert job['result']['audio_file'] == str(tmp_path / "archives" / "video_abc" / "abc.mp3")
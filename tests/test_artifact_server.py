@@ -0,0 +1,45 @@
+"""ArtifactServer 테스트 (루프백에서 실제 HTTP 요청)"""
+
+import urllib.error
+import urllib.request
+
+import pytest
+
+from utils import ArtifactServer
+
+
+@pytest.fixture
+def artifact_server(tmp_path):
+    root = tmp_path / "downloads"
+    root.mkdir()
+    (root / "abc.txt").write_text("transcript", encoding="utf-8")
+    (root / "catalog.sqlite3").write_bytes(b"SQLite format 3")
+    (tmp_path / "secret.txt").write_text("secret", encoding="utf-8")
+    server = ArtifactServer(roots=(root,), host="127.0.0.1", port=0, public_url=None)
+    assert server.start()
+    yield server, root
+    server.stop()
+
+
+def _get(server, path):
+    port = server._server.server_address[1]
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=5) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, None
+
+
+def test_artifact_server_url_allow_list(artifact_server):
+    server, root = artifact_server
+    assert server.url_for(root / "abc.txt", base_url="http://host").endswith("/downloads/abc.txt")
+    assert server.url_for(root / "catalog.sqlite3") is None
+    assert server.url_for(root.parent / "secret.txt") is None
+
+
+def test_artifact_server_serves_only_allowed_files(artifact_server):
+    server, _ = artifact_server
+    assert _get(server, "/downloads/abc.txt") == (200, b"transcript")
+    assert _get(server, "/downloads/catalog.sqlite3")[0] == 404
+    assert _get(server, "/downloads/../secret.txt")[0] == 404
+    assert _get(server, "/downloads/%2E%2E/secret.txt")[0] == 404
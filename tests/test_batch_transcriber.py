@@ -0,0 +1,143 @@
+"""
+BatchTranscriber 테스트 (Whisper/torch 없이 실행)
+
+실제 묶음 디코딩(_decode)과 하나씩 변환(transcribe_audio)을 가짜로 바꿔
+묶는 방식과 실패 전달만 확인합니다.
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+import utils
+from utils import BatchTranscriber, MetricsRegistry, ModelSpeedProfile
+
+
+def _clip(seconds):
+    return np.zeros(int(seconds * utils.WHISPER_SAMPLE_RATE), dtype=np.float32)
+
+
+@pytest.fixture
+def whisper_available(monkeypatch):
+    """Whisper가 설치되지 않은 환경에서도 whisper 엔진을 고를 수 있게 함"""
+    monkeypatch.setattr(utils.WhisperBackend, "available", classmethod(lambda cls: True))
+
+
+@pytest.fixture
+def batcher(whisper_available):
+    batcher = BatchTranscriber(max_batch_size=8, max_wait=0.3, metrics=MetricsRegistry())
+    yield batcher
+    batcher.shutdown()
+
+
+def _fake_decode(calls):
+    def decode(items):
+        calls.append([item['model_size'] for item in items])
+        return ([{'segments': [{'id': None, 'start': 0.0, 'end': 1.0, 'text': f" clip{i}"}], 'language': "ko"}
+                 for i, _ in enumerate(items)], {'cache_hit': True, 'load_seconds': 0.0})
+    return decode
+
+
+def test_batch_transcriber_groups_short_clips(batcher, monkeypatch):
+    calls = []
+    monkeypatch.setattr(batcher, "_decode", _fake_decode(calls))
+    futures = [batcher.submit(_clip(5)) for _ in range(5)]
+    results = [future.result(timeout=5) for future in futures]
+
+    assert calls == [["base"] * 5]
+    assert [result['batch_size'] for result in results] == [5] * 5
+    assert [result['text'] for result in results] == [f"clip{i}" for i in range(5)]
+    assert batcher.stats()['batches'] == 1
+
+
+def test_batch_transcriber_separates_models(batcher, monkeypatch):
+    calls = []
+    monkeypatch.setattr(batcher, "_decode", _fake_decode(calls))
+    futures = [batcher.submit(_clip(5), model_size) for model_size in ("base", "tiny", "base")]
+    for future in futures:
+        future.result(timeout=5)
+
+    assert sorted(calls) == [["base", "base"], ["tiny"]]
+
+
+def test_batch_transcriber_runs_long_clips_separately(batcher, monkeypatch):
+    calls = []
+    monkeypatch.setattr(batcher, "_decode", _fake_decode(calls))
+    monkeypatch.setattr(utils, "transcribe_audio", lambda audio, *args, **kwargs: {'text': "long"})
+
+    assert not batcher.batchable(_clip(utils.SHORT_CLIP_MAX_SECONDS + 1))
+    assert batcher.submit(_clip(utils.SHORT_CLIP_MAX_SECONDS + 1)).result(timeout=5)['text'] == "long"
+    assert calls == []
+    assert batcher.stats()['single_runs'] == 1
+
+
+def test_batch_transcriber_propagates_retry_failure(batcher, monkeypatch):
+    def broken_decode(items):
+        raise RuntimeError("decode failed")
+
+    def broken_transcribe(*args, **kwargs):
+        raise ValueError("transcribe failed")
+
+    monkeypatch.setattr(batcher, "_decode", broken_decode)
+    monkeypatch.setattr(utils, "transcribe_audio", broken_transcribe)
+
+    with pytest.raises(ValueError, match="transcribe failed"):
+        batcher.submit(_clip(5)).result(timeout=5)
+
+
+def test_batch_transcriber_survives_worker_error(batcher, monkeypatch):
+    calls = []
+    run_batch = batcher._run_batch
+
+    def run_batch_once_broken(items):
+        if not calls:
+            calls.append("broken")
+            raise RuntimeError("bookkeeping failed")
+        run_batch(items)
+
+    monkeypatch.setattr(batcher, "_decode", _fake_decode(calls))
+    monkeypatch.setattr(batcher, "_run_batch", run_batch_once_broken)
+    with pytest.raises(RuntimeError, match="bookkeeping failed"):
+        batcher.submit(_clip(5)).result(timeout=5)
+
+    # 워커가 살아 있어 다음 요청도 처리
+    assert batcher.submit(_clip(5)).result(timeout=5)['text'] == "clip0"
+
+
+def test_batch_transcriber_reports_decode_time_without_queue_wait(batcher, monkeypatch):
+    calls = []
+    fake_decode = _fake_decode(calls)
+
+    def slow_decode(items):
+        time.sleep(0.05)
+        return fake_decode(items)
+
+    monkeypatch.setattr(batcher, "_decode", slow_decode)
+    batched = batcher.submit(_clip(5)).result(timeout=5)
+    # 묶음 대기(max_wait 0.3초)는 빠지고 디코딩 시간만 남음
+    assert 0.05 <= batched['decode_seconds'] < 0.3
+
+    def slow_transcribe(*args, **kwargs):
+        time.sleep(0.05)
+        return {'text': "long", 'model_load_seconds': 0.03}
+
+    monkeypatch.setattr(utils, "transcribe_audio", slow_transcribe)
+    single = batcher.submit(_clip(utils.SHORT_CLIP_MAX_SECONDS + 1)).result(timeout=5)
+    # 모델 로드 시간은 빠짐
+    assert 0.015 <= single['decode_seconds'] < 0.05
+
+
+def test_finish_job_records_batched_speed(batcher, tmp_path):
+    profile = ModelSpeedProfile(tmp_path / "model_speed.json")
+    job = utils._create_job("https://youtu.be/abcdefghijk", output_path=str(tmp_path), use_cache=False,
+                            batch_transcriber=batcher, speed_profile=profile)
+    job['result'].update(success=True, timings={'transcribe': 5.0})
+    job['audio_duration'] = 20.0
+    job['model_info'] = {'decode_seconds': 2.0, 'batch_size': 4}
+
+    utils._finish_job(job, MetricsRegistry())
+
+    # 단계 시간(대기 포함 5초)이 아니라 워커가 잰 디코딩 시간으로 기록
+    assert job['result']['metrics']['decode_seconds'] == 2.0
+    assert profile.estimate("base") == (0.1, "job")
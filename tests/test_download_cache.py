@@ -0,0 +1,87 @@
+"""DownloadCache 임대와 정리 테스트"""
+
+import os
+import time
+
+from utils import DownloadCache
+
+
+def _make_folder(root, name, size, age):
+    """size 바이트 파일 하나가 든 폴더를 age초 전에 마지막으로 쓴 것처럼 만듦"""
+    folder = root / name
+    folder.mkdir()
+    (folder / "audio.mp3").write_bytes(b"x" * size)
+    stamp = time.time() - age
+    for path in (folder / "audio.mp3", folder):
+        os.utime(path, (stamp, stamp))
+    return folder
+
+
+def _cache(root, budget_bytes, **options):
+    options.setdefault('min_idle_seconds', 0)
+    return DownloadCache(root, budget_mb=budget_bytes / (1024 * 1024), max_age_hours=None, **options)
+
+
+def test_sweep_evicts_least_recently_used_over_budget(tmp_path):
+    for name, age in (("video_old", 300), ("video_mid", 200), ("video_new", 100)):
+        _make_folder(tmp_path, name, 1000, age)
+    cache = _cache(tmp_path, 2000)
+
+    evicted = cache.sweep()
+
+    assert [os.path.basename(path) for path in evicted] == ["video_old"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["video_mid", "video_new"]
+    assert cache.stats()['evicted_bytes'] == 1000
+
+
+def test_sweep_skips_leased_and_recent_folders(tmp_path):
+    _make_folder(tmp_path, "video_leased", 1000, 300)
+    _make_folder(tmp_path, "video_recent", 1000, 10)
+    _make_folder(tmp_path, "video_idle", 1000, 200)
+    cache = _cache(tmp_path, 0, min_idle_seconds=60)
+    cache.acquire("leased")
+
+    evicted = cache.sweep()
+
+    assert [os.path.basename(path) for path in evicted] == ["video_idle"]
+    assert cache.stats()['skipped_in_use'] == 2
+
+    cache.release("leased")
+    # 해제하면 방금 쓴 폴더가 되므로 min_idle_seconds 동안은 그대로 둠
+    assert cache.sweep() == []
+    assert cache.stats()['leased'] == 0
+
+
+def test_sweep_expires_old_folders(tmp_path):
+    _make_folder(tmp_path, "video_old", 10, 3 * 3600)
+    _make_folder(tmp_path, "video_new", 10, 60)
+    cache = DownloadCache(tmp_path, budget_mb=100, max_age_hours=1, min_idle_seconds=0)
+
+    assert [os.path.basename(path) for path in cache.sweep()] == ["video_old"]
+
+
+def test_lease_by_path_only_inside_root(tmp_path):
+    folder = _make_folder(tmp_path, "video_abc", 10, 300)
+    cache = _cache(tmp_path, 0)
+
+    assert cache.acquire_path(folder / "audio.mp3") == "video_abc"
+    assert cache.acquire_path(tmp_path.parent / "elsewhere.mp3") is None
+    assert cache.clear() == (0, 1)
+
+    cache.release_path(folder / "audio.mp3")
+    assert cache.clear() == (1, 0)
+
+
+def test_stats_keeps_running_totals(tmp_path, monkeypatch):
+    _make_folder(tmp_path, "video_a", 1000, 300)
+    _make_folder(tmp_path, "video_b", 500, 200)
+    cache = _cache(tmp_path, 1000)
+
+    assert (cache.stats()['folders'], cache.stats()['size_bytes']) == (2, 1500)
+    cache.sweep()
+
+    def no_scan():
+        raise AssertionError("stats가 폴더를 다시 훑음")
+
+    monkeypatch.setattr(cache, "_folders", no_scan)
+    assert (cache.stats()['folders'], cache.stats()['size_bytes']) == (1, 500)
@@ -0,0 +1,50 @@
+"""JobManifest 체크포인트 재개 테스트"""
+
+from utils import JobManifest
+
+CHUNKS = [{'start': 0, 'end': 10, 'keep_from': 0.0, 'keep_until': 30.0},
+          {'start': 5, 'end': 20, 'keep_from': 30.0, 'keep_until': 60.0}]
+
+
+def test_resume_restores_stages_and_chunks(tmp_path):
+    path = tmp_path / "abc_base.manifest.json"
+    manifest = JobManifest(path, "key-1")
+    manifest.complete_stage("download", source_file="abc.mp4")
+    manifest.chunk_results_for(CHUNKS)
+    manifest.complete_chunk(1, {'segments': [], 'language': "ko"})
+
+    resumed = JobManifest(path, "key-1", resume=True)
+    assert resumed.stage("download")['source_file'] == "abc.mp4"
+    assert resumed.stage("extract") is None
+    assert resumed.chunk_results_for(CHUNKS) == {1: {'segments': [], 'language': "ko"}}
+
+
+def test_without_resume_starts_fresh(tmp_path):
+    path = tmp_path / "abc_base.manifest.json"
+    JobManifest(path, "key-1").complete_stage("download", source_file="abc.mp4")
+
+    assert JobManifest(path, "key-1").stage("download") is None
+
+
+def test_different_key_is_ignored(tmp_path):
+    path = tmp_path / "abc_base.manifest.json"
+    JobManifest(path, "key-1").complete_stage("download", source_file="abc.mp4")
+
+    assert JobManifest(path, "key-2", resume=True).stage("download") is None
+
+
+def test_changed_split_discards_chunk_results(tmp_path):
+    path = tmp_path / "abc_base.manifest.json"
+    manifest = JobManifest(path, "key-1")
+    manifest.chunk_results_for(CHUNKS)
+    manifest.complete_chunk(0, {'segments': [], 'language': "ko"})
+
+    resumed = JobManifest(path, "key-1", resume=True)
+    assert resumed.chunk_results_for(CHUNKS[:1]) == {}
+
+
+def test_broken_manifest_starts_fresh(tmp_path):
+    path = tmp_path / "abc_base.manifest.json"
+    path.write_text("{", encoding="utf-8")
+
+    assert JobManifest(path, "key-1", resume=True).stage("download") is None
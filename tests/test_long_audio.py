@@ -0,0 +1,73 @@
+"""긴 음성 분할(split_audio_on_silence)과 구간 결과 합치기(stitch_chunk_results) 테스트"""
+
+import numpy as np
+
+from utils import WHISPER_SAMPLE_RATE, find_silence_boundaries, split_audio_on_silence, stitch_chunk_results
+
+
+def _speech_with_gaps(total_seconds, silences):
+    """silences(초) 지점에 0.5초 무음이 있는 잡음 신호"""
+    rng = np.random.default_rng(0)
+    pcm = rng.uniform(-0.5, 0.5, int(total_seconds * WHISPER_SAMPLE_RATE)).astype(np.float32)
+    for second in silences:
+        start = int(second * WHISPER_SAMPLE_RATE)
+        pcm[start:start + WHISPER_SAMPLE_RATE // 2] = 0.0
+    return pcm
+
+
+def test_boundaries_land_in_silence():
+    silences = (27, 58, 89)
+    pcm = _speech_with_gaps(100, silences)
+    boundaries = find_silence_boundaries(pcm, chunk_seconds=30, search_seconds=5)
+
+    assert boundaries[0] == 0 and boundaries[-1] == len(pcm)
+    assert len(boundaries) == len(silences) + 2
+    for boundary, silence in zip(boundaries[1:-1], silences):
+        assert silence <= boundary / WHISPER_SAMPLE_RATE <= silence + 0.5
+
+
+def test_short_audio_is_one_chunk():
+    pcm = _speech_with_gaps(10, silences=())
+    assert split_audio_on_silence(pcm, chunk_seconds=30) == [
+        {'start': 0, 'end': len(pcm), 'keep_from': 0.0, 'keep_until': 10.0}]
+
+
+def test_chunks_overlap_and_cover_audio():
+    pcm = _speech_with_gaps(100, silences=(27, 58))
+    chunks = split_audio_on_silence(pcm, chunk_seconds=30, overlap_seconds=2)
+
+    assert chunks[0]['keep_from'] == 0.0 and chunks[-1]['keep_until'] == 100.0
+    for left, right in zip(chunks, chunks[1:]):
+        assert left['keep_until'] == right['keep_from']
+        assert right['start'] == left['keep_until'] * WHISPER_SAMPLE_RATE - 2 * WHISPER_SAMPLE_RATE
+
+
+def test_stitch_drops_overlap_duplicates():
+    rate = WHISPER_SAMPLE_RATE
+    chunks = [
+        {'start': 0, 'end': 32 * rate, 'keep_from': 0.0, 'keep_until': 30.0},
+        {'start': 28 * rate, 'end': 60 * rate, 'keep_from': 30.0, 'keep_until': 60.0},
+    ]
+    chunk_results = [
+        {'language': "ko", 'segments': [
+            {'start': 0.0, 'end': 10.0, 'text': " 하나"},
+            {'start': 29.0, 'end': 31.5, 'text': " 겹침"},   # 중심 30.25초 → 두 번째 구간 몫
+        ]},
+        {'language': "en", 'segments': [
+            {'start': 1.0, 'end': 3.5, 'text': " 겹침"},     # 29~31.5초
+            {'start': 10.0, 'end': 12.0, 'text': " 둘"},
+        ]},
+    ]
+
+    result = stitch_chunk_results(chunks, chunk_results)
+
+    assert [(s['start'], s['end'], s['text']) for s in result['segments']] == [
+        (0.0, 10.0, " 하나"), (29.0, 31.5, " 겹침"), (38.0, 40.0, " 둘")]
+    assert [s['id'] for s in result['segments']] == [0, 1, 2]
+    assert result['text'] == "하나 겹침 둘"
+    assert result['language'] == "ko"
+
+
+def test_stitch_skips_missing_chunks():
+    chunks = [{'start': 0, 'end': 10, 'keep_from': 0.0, 'keep_until': 30.0}]
+    assert stitch_chunk_results(chunks, [None]) == {'text': "", 'segments': [], 'language': None}
@@ -0,0 +1,52 @@
+"""MetricsRegistry 집계와 내보내기 테스트"""
+
+import json
+
+from utils import MetricsRegistry
+
+
+def test_prometheus_exposition():
+    metrics = MetricsRegistry(namespace="test")
+    metrics.inc("jobs_total", status="ok")
+    metrics.inc("jobs_total", 2, status="ok")
+    metrics.observe("stage_seconds", 0.3, buckets=(0.5, 1), stage="download")
+    metrics.observe("stage_seconds", 0.8, buckets=(0.5, 1), stage="download")
+    metrics.observe("stage_seconds", 5, buckets=(0.5, 1), stage="download")
+
+    assert metrics.to_prometheus().splitlines() == [
+        '# TYPE test_jobs_total counter',
+        'test_jobs_total{status="ok"} 3',
+        '# TYPE test_stage_seconds histogram',
+        'test_stage_seconds_bucket{stage="download",le="0.5"} 1',
+        'test_stage_seconds_bucket{stage="download",le="1"} 2',
+        'test_stage_seconds_bucket{stage="download",le="+Inf"} 3',
+        'test_stage_seconds_sum{stage="download"} 6.1',
+        'test_stage_seconds_count{stage="download"} 3',
+    ]
+
+
+def test_prometheus_escapes_label_values():
+    metrics = MetricsRegistry(namespace="test")
+    metrics.inc("errors_total", error='bad "quote"\\path\nline')
+
+    assert 'test_errors_total{error="bad \\"quote\\"\\\\path\\nline"} 1' in metrics.to_prometheus()
+
+
+def test_unlabelled_series_and_reset():
+    metrics = MetricsRegistry(namespace="test")
+    metrics.inc("runs_total")
+    assert "test_runs_total 1" in metrics.to_prometheus().splitlines()
+
+    metrics.reset()
+    assert metrics.to_prometheus() == "\n"
+
+
+def test_snapshot_is_json_with_cumulative_buckets():
+    metrics = MetricsRegistry()
+    metrics.observe("rtf", 0.2, buckets=(0.1, 0.5, 1), model="base")
+    metrics.observe("rtf", 0.4, buckets=(0.1, 0.5, 1), model="base")
+
+    histogram = json.loads(metrics.to_json())['histograms']['rtf'][0]
+    assert histogram['labels'] == {'model': "base"}
+    assert histogram['buckets'] == {'0.1': 0, '0.5': 2, '1': 2}
+    assert (histogram['count'], histogram['mean']) == (2, 0.3)
@@ -0,0 +1,32 @@
+"""ModelSpeedProfile과 select_model 테스트"""
+
+from utils import ModelSpeedProfile, select_model
+
+
+def test_model_speed_profile_record(tmp_path):
+    profile = ModelSpeedProfile(tmp_path / "model_speed.json", smoothing=0.5, min_audio_seconds=10.0)
+    profile.record("base", 0.4, audio_seconds=60)
+    profile.record("base", 0.2, audio_seconds=60)
+    profile.record("base", 5.0, audio_seconds=3)  # 너무 짧은 음성은 무시
+    assert profile.estimate("base") == (0.3, "job")
+
+    profile.record("base", 0.1, source="calibration")
+    assert profile.estimate("base") == (0.1, "calibration")
+
+    # 파일에 저장되어 새 인스턴스에서도 읽힘
+    assert ModelSpeedProfile(tmp_path / "model_speed.json").estimate("base") == (0.1, "calibration")
+
+
+def test_select_model(tmp_path):
+    profile = ModelSpeedProfile(tmp_path / "model_speed.json")
+    for model_size, rtf in (("tiny", 0.05), ("base", 0.1), ("small", 0.5)):
+        profile.record(model_size, rtf, source="calibration")
+    models = ("tiny", "base", "small")
+
+    choice = select_model(100, 20, profile, models=models)
+    assert (choice['model'], choice['estimated_seconds'], choice['meets_budget']) == ("base", 10.0, True)
+    assert select_model(100, 60, profile, models=models)['model'] == "small"
+
+    fallback = select_model(100, 1, profile, models=models)
+    assert (fallback['model'], fallback['meets_budget']) == ("tiny", False)
+    assert select_model(None, 20, profile, models=models)['model'] == "base"
@@ -0,0 +1,45 @@
+"""TranscriptCache 키와 캐시 항목 복원 테스트"""
+
+import utils
+from utils import TranscriptCache
+
+
+def test_key_changes_with_inputs():
+    key = TranscriptCache.make_key("abc", "base", {'language': "ko"})
+
+    assert key == TranscriptCache.make_key("abc", "base", {'language': "ko"})
+    assert key != TranscriptCache.make_key("xyz", "base", {'language': "ko"})
+    assert key != TranscriptCache.make_key("abc", "small", {'language': "ko"})
+    assert key != TranscriptCache.make_key("abc", "base-int8", {'language': "ko"})
+    assert key != TranscriptCache.make_key("abc", "base", {'language': "en"})
+    assert TranscriptCache.make_key("abc", "base") == TranscriptCache.make_key("abc", "base", {})
+
+
+def test_key_ignores_option_order():
+    assert (TranscriptCache.make_key("abc", "base", {'language': "ko", 'task': "transcribe"})
+            == TranscriptCache.make_key("abc", "base", {'task': "transcribe", 'language': "ko"}))
+
+
+def test_pipeline_version_invalidates_entries(tmp_path, monkeypatch):
+    cache = TranscriptCache(tmp_path)
+    cache.put(TranscriptCache.make_key("abc", "base"), {'text_content': "안녕"})
+    assert cache.get(TranscriptCache.make_key("abc", "base")) == {'text_content': "안녕"}
+
+    monkeypatch.setattr(utils, "PIPELINE_VERSION", utils.PIPELINE_VERSION + "-next")
+    assert cache.get(TranscriptCache.make_key("abc", "base")) is None
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'bypasses': 0}
+
+
+def test_entry_without_artifacts_is_a_miss(tmp_path):
+    text = tmp_path / "abc_base.txt"
+    text.write_text("안녕", encoding="utf-8")
+    (tmp_path / "abc_base.srt").write_text("1", encoding="utf-8")
+    entry = {'text_content': "안녕", 'segments': [], 'metadata': None,
+             'artifacts': {'video': [str(tmp_path / "abc.mp4")], 'audio': [], 'text': [str(text)]}}
+
+    # 영상이 지워졌으면 영상이 필요한 작업에는 쓸 수 없음
+    assert utils._result_from_cache(entry, audio_only=False) is None
+
+    result = utils._result_from_cache(entry, audio_only=True)
+    assert result['cache_hit'] and result['text_file'] == str(text)
+    assert result['subtitle_files'] == {'srt': str(tmp_path / "abc_base.srt")}
@@ -0,0 +1,121 @@
+"""TranscriptWriter(.partial 이어 쓰기와 완성본 교체)와 세그먼트 스트리밍 테스트"""
+
+import json
+import os
+import threading
+
+import numpy as np
+
+import utils
+from utils import TranscriptWriter, WHISPER_SAMPLE_RATE, iter_transcribe_segments
+
+SEGMENTS = [{'id': 0, 'start': 0.0, 'end': 1.5, 'text': " 안녕하세요"},
+            {'id': 1, 'start': 1.5, 'end': 3.0, 'text': " 반갑습니다"}]
+
+
+def _write(base, segments, complete=True):
+    writer = TranscriptWriter(base)
+    for segment in segments:
+        writer.add(segment)
+    writer.close(complete=complete, language="ko")
+    return writer
+
+
+def test_partial_files_until_complete(tmp_path):
+    base = tmp_path / "abc_base"
+    writer = TranscriptWriter(base)
+    writer.add(SEGMENTS[0])
+
+    assert not os.path.exists(writer.paths['txt'])
+    with open(f"{writer.paths['txt']}.partial", encoding='utf-8') as f:
+        assert f.read() == "안녕하세요"
+
+    writer.add(SEGMENTS[1])
+    writer.close(language="ko")
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "abc_base.json", "abc_base.srt", "abc_base.txt", "abc_base.vtt"]
+    with open(writer.paths['txt'], encoding='utf-8') as f:
+        assert f.read() == "안녕하세요 반갑습니다"
+    with open(writer.paths['srt'], encoding='utf-8') as f:
+        assert f.read().startswith("1\n00:00:00,000 --> 00:00:01,500\n안녕하세요\n\n2\n")
+    with open(writer.paths['vtt'], encoding='utf-8') as f:
+        assert f.read().startswith("WEBVTT\n\n00:00:00.000 --> 00:00:01.500\n")
+    with open(writer.paths['json'], encoding='utf-8') as f:
+        assert json.load(f) == {'language': "ko", 'complete': True, 'segments': SEGMENTS}
+
+
+def test_failed_rerun_keeps_complete_files(tmp_path):
+    base = tmp_path / "abc_base"
+    writer = _write(base, SEGMENTS)
+    _write(base, [{'id': 0, 'start': 0.0, 'end': 1.0, 'text': " 끊긴"}], complete=False)
+
+    with open(writer.paths['txt'], encoding='utf-8') as f:
+        assert f.read() == "안녕하세요 반갑습니다"
+    with open(f"{writer.paths['txt']}.partial", encoding='utf-8') as f:
+        assert f.read() == "끊긴"
+    with open(f"{writer.paths['json']}.partial", encoding='utf-8') as f:
+        assert json.load(f)['complete'] is False
+
+
+def test_rerun_does_not_change_hardlinked_archive(tmp_path):
+    base = tmp_path / "abc_base"
+    writer = _write(base, SEGMENTS)
+    archived = tmp_path / "archived.txt"
+    os.link(writer.paths['txt'], archived)
+
+    _write(base, [{'id': 0, 'start': 0.0, 'end': 1.0, 'text': " 새 결과"}])
+
+    assert archived.read_text(encoding='utf-8') == "안녕하세요 반갑습니다"
+    with open(writer.paths['txt'], encoding='utf-8') as f:
+        assert f.read() == "새 결과"
+
+
+def test_writers_for_same_path_take_turns(tmp_path):
+    base = tmp_path / "abc_base"
+    first = TranscriptWriter(base)
+    second_opened = threading.Event()
+
+    def open_second():
+        _write(base, SEGMENTS[1:])
+        second_opened.set()
+
+    thread = threading.Thread(target=open_second)
+    thread.start()
+    assert not second_opened.wait(0.2)
+
+    first.add(SEGMENTS[0])
+    first.close()
+    first.close()  # 두 번째 호출은 무시
+    thread.join(timeout=5)
+
+    assert second_opened.is_set()
+    with open(first.paths['txt'], encoding='utf-8') as f:
+        assert f.read() == "반갑습니다"
+
+
+def test_segments_stream_before_transcription_ends(monkeypatch):
+    """Whisper 세그먼트는 창이 끝날 때마다 전달됨 (다음 창 변환을 기다리지 않음)"""
+    first_received = threading.Event()
+
+    class BlockingModel:
+        calls = 0
+
+        def transcribe(self, audio, **options):
+            BlockingModel.calls += 1
+            if BlockingModel.calls > 1:
+                assert first_received.wait(5), "첫 세그먼트가 변환이 끝나기 전에 전달되지 않음"
+            seconds = len(audio) / WHISPER_SAMPLE_RATE
+            return {'text': f" 창{BlockingModel.calls}", 'language': "ko",
+                    'segments': [{'start': 0.0, 'end': seconds, 'text': f" 창{BlockingModel.calls}"}]}
+
+    monkeypatch.setattr(utils.WhisperBackend, "available", classmethod(lambda cls: True))
+    monkeypatch.setattr(utils, "get_whisper_model", lambda *args, **kwargs: BlockingModel())
+    pcm = np.random.default_rng(0).uniform(-0.5, 0.5, 50 * WHISPER_SAMPLE_RATE).astype(np.float32)
+
+    stream = iter_transcribe_segments(pcm, backend="whisper")
+    assert next(stream)['text'] == " 창1"
+    first_received.set()
+    texts = [segment['text'] for segment in stream]
+
+    assert texts == [" 창2"]
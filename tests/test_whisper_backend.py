@@ -0,0 +1,73 @@
+"""WhisperBackend 창 단위 변환 테스트 (가짜 모델로 실행)"""
+
+import numpy as np
+
+from utils import WHISPER_SAMPLE_RATE, WhisperBackend
+
+
+class FakeModel:
+    """창마다 받은 옵션을 기록하고, 창 길이 중간에 세그먼트 하나를 돌려주는 가짜 Whisper 모델"""
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, **options):
+        self.calls.append(dict(options, seconds=len(audio) / WHISPER_SAMPLE_RATE))
+        number = len(self.calls)
+        seconds = len(audio) / WHISPER_SAMPLE_RATE
+        return {'text': f" 창{number}", 'language': "ko",
+                'segments': [{'id': 0, 'start': 1.0, 'end': seconds - 1.0, 'text': f" 창{number}"}]}
+
+
+def _audio(seconds, silences):
+    rng = np.random.default_rng(0)
+    pcm = rng.uniform(-0.5, 0.5, int(seconds * WHISPER_SAMPLE_RATE)).astype(np.float32)
+    for second in silences:
+        start = int(second * WHISPER_SAMPLE_RATE)
+        pcm[start:start + WHISPER_SAMPLE_RATE // 2] = 0.0
+    return pcm
+
+
+def test_windows_stream_segments_and_progress():
+    model, events = FakeModel(), []
+    result = WhisperBackend().transcribe(
+        model, _audio(70, silences=(24, 50)), {'initial_prompt': "용어"},
+        progress_callback=lambda event: events.append(("progress", round(event['processed_seconds']))),
+        segment_callback=lambda segment: events.append(("segment", segment['text'])))
+
+    assert all(call['seconds'] <= 30 for call in model.calls)
+    assert len(model.calls) == 3
+    # 구간마다 세그먼트가 먼저, 이어서 진행률이 전달됨
+    assert [kind for kind, _ in events] == ["segment", "progress"] * 3
+    assert events[-1] == ("progress", 70)
+    assert [s['text'] for s in result['segments']] == [" 창1", " 창2", " 창3"]
+    assert [s['id'] for s in result['segments']] == [0, 1, 2]
+    assert result['segments'][1]['start'] == round(model.calls[0]['seconds'] + 1.0, 3)
+    assert result['text'] == "창1 창2 창3"
+
+
+def test_windows_condition_on_previous_text():
+    model = FakeModel()
+    WhisperBackend().transcribe(model, _audio(70, silences=(24, 50)), {'initial_prompt': "용어"},
+                                segment_callback=lambda segment: None)
+
+    assert [call['initial_prompt'] for call in model.calls] == ["용어", " 창1", " 창2"]
+    assert [call.get('language') for call in model.calls] == [None, "ko", "ko"]
+
+
+def test_windows_without_conditioning_use_prompt_once():
+    model = FakeModel()
+    WhisperBackend().transcribe(model, _audio(70, silences=(24, 50)),
+                                {'initial_prompt': "용어", 'condition_on_previous_text': False, 'language': "en"},
+                                segment_callback=lambda segment: None)
+
+    assert [call['initial_prompt'] for call in model.calls] == ["용어", None, None]
+    assert {call['language'] for call in model.calls} == {"en"}
+
+
+def test_no_callbacks_transcribes_in_one_call():
+    model = FakeModel()
+    result = WhisperBackend().transcribe(model, _audio(70, silences=()), {'language': "ko"})
+
+    assert len(model.calls) == 1 and model.calls[0]['seconds'] == 70
+    assert result['text'] == "창1"
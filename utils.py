@@ -5,205 +5,3658 @@
 """
 
 import os
+import re
+import json
+import hashlib
+import sqlite3
 import subprocess
 import shutil
+import sys
+import tempfile
+import importlib
+import importlib.util
+import threading
+import mimetypes
+import filecmp
+from collections import OrderedDict
+from contextlib import closing, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote, urlsplit
 from pathlib import Path
 import time
-import yt_dlp
-import whisper
+import uuid
+import queue
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, as_completed
 
-def download_youtube_video(url, output_path="downloads"):
-    """유튜브 영상 다운로드"""
+# Whisper 입력 샘플레이트 (16 kHz 모노)
+WHISPER_SAMPLE_RATE = 16000
+
+# 변환 결과에 영향을 주는 코드 변경 시 올려서 기존 캐시를 무효화
+PIPELINE_VERSION = "1"
+
+# 모델 크기별 대략적인 메모리 사용량 (MB, fp32 가중치 기준)
+MODEL_MEMORY_ESTIMATES_MB = {
+    "tiny": 150,
+    "base": 300,
+    "small": 1000,
+    "medium": 3000,
+    "large": 6000,
+}
+
+# 정확도 순서 (앞일수록 빠르고 뒤일수록 정확)
+MODEL_SIZES = ("tiny", "base", "small", "medium", "large")
+
+# 측정값이 없을 때 쓰는 모델별 실시간 배율 추정치 (변환 시간 / 음성 길이, CPU 기준)
+DEFAULT_REAL_TIME_FACTORS = {
+    "tiny": 0.1,
+    "base": 0.2,
+    "small": 0.6,
+    "medium": 1.8,
+    "large": 3.5,
+}
+
+# model_size="auto"일 때 지연 예산을 주지 않으면 쓰는 기본값 (초)
+AUTO_MODEL_LATENCY_BUDGET_SECONDS = float(os.environ.get("AUTO_MODEL_LATENCY_BUDGET_SECONDS", "300"))
+
+# 음성 인식 엔진 (whisper: openai-whisper fp32, faster-whisper: CTranslate2 int8 CPU 추론)
+ASR_BACKENDS = ("whisper", "faster-whisper")
+DEFAULT_ASR_BACKEND = os.environ.get("ASR_BACKEND", "whisper").strip().lower() or "whisper"
+if DEFAULT_ASR_BACKEND not in ASR_BACKENDS:
+    # 잘못된 값이면 미리 로드나 첫 작업에서 KeyError로 죽지 않도록 기본 엔진 사용
+    print(f"⚠️ 알 수 없는 ASR_BACKEND={DEFAULT_ASR_BACKEND!r} (가능한 값: {', '.join(ASR_BACKENDS)}), whisper를 사용합니다")
+    DEFAULT_ASR_BACKEND = "whisper"
+
+# 로드된 모델들이 함께 사용할 수 있는 메모리 예산 (MB)
+DEFAULT_MODEL_MEMORY_BUDGET_MB = int(os.environ.get("WHISPER_MODEL_BUDGET_MB", "4096"))
+
+# 긴 음성 분할 변환 설정 (이 길이 이상이면 무음 구간에서 나눠 병렬 변환)
+LONG_AUDIO_THRESHOLD_SECONDS = 600
+LONG_AUDIO_CHUNK_SECONDS = 120
+LONG_AUDIO_OVERLAP_SECONDS = 2.0
+
+# 진행/세그먼트 콜백이 있을 때 Whisper 변환 창 (약 이 길이마다 앞뒤 탐색 범위 안의 무음 지점에서 잘라
+# 창 하나가 30초를 넘지 않게 함)
+STREAMING_WINDOW_SECONDS = 25
+STREAMING_WINDOW_SEARCH_SECONDS = 5
+
+# 짧은 영상(쇼츠) 묶음 변환 설정: 30초 창 하나에 들어가는 여러 작업의 클립을 모아 한 번에 디코딩
+# (30~60초 클립은 둘째 창을 첫 창 텍스트로 이어 디코딩해야 하는데 whisper.decode는 묶음 전체에
+#  프롬프트 하나만 받으므로 묶지 않고 따로 변환)
+SHORT_CLIP_MAX_SECONDS = 30
+SHORT_CLIP_BATCH_SIZE = int(os.environ.get("SHORT_CLIP_BATCH_SIZE", "8"))
+SHORT_CLIP_BATCH_WAIT_SECONDS = float(os.environ.get("SHORT_CLIP_BATCH_WAIT_MS", "200")) / 1000
+
+# 보관 정책 (archive_file 참고)
+ARCHIVE_POLICIES = ("link", "move", "copy")
+
+# 영구 보관소 경로와 보관함 카탈로그(SQLite) 경로
+ARCHIVE_ROOT = "archives"
+CATALOG_DB_PATH = os.path.join(ARCHIVE_ROOT, "catalog.sqlite3")
+
+# 산출물 파일 서버 설정 (브라우저가 큰 파일을 디스크에서 조금씩 받아 가도록)
+# 인증이 없으므로 기본은 이 컴퓨터에서만 접속 가능. 외부에 열 때는 ARTIFACT_SERVER_HOST=0.0.0.0과
+# 그 주소로 접근할 ARTIFACT_PUBLIC_URL을 함께 설정
+ARTIFACT_SERVER_HOST = os.environ.get("ARTIFACT_SERVER_HOST", "127.0.0.1")
+ARTIFACT_SERVER_PORT = int(os.environ.get("ARTIFACT_SERVER_PORT", "8502"))
+ARTIFACT_PUBLIC_URL = os.environ.get("ARTIFACT_PUBLIC_URL")
+ARTIFACT_CHUNK_SIZE = 256 * 1024
+
+# 앱 시작 시 백그라운드에서 미리 로드할 모델 (빈 값이면 미리 로드하지 않음)
+PREWARM_MODEL = os.environ.get("WHISPER_PREWARM_MODEL", "base")
+
+# 산출물 파일 이름: {비디오 ID}{접미사}.확장자 (텍스트는 {비디오 ID}_{모델}.txt)
+ARTIFACT_SUFFIXES = {
+    'video': "",        # 영상 다운로드
+    'audio': "_audio",  # 음성 스트림만 다운로드
+}
+
+# 다운로드 작업 폴더(downloads)를 캐시로 관리하는 설정 (용량 예산, 최대 보관 기간, 정리 주기)
+DOWNLOADS_ROOT = "downloads"
+DOWNLOAD_CACHE_BUDGET_MB = int(os.environ.get("DOWNLOAD_CACHE_BUDGET_MB", "2048"))
+DOWNLOAD_CACHE_MAX_AGE_HOURS = float(os.environ.get("DOWNLOAD_CACHE_MAX_AGE_HOURS", "24"))
+DOWNLOAD_CACHE_SWEEP_SECONDS = 300
+
+# 로컬 미디어 파일 변환 설정 (지원 확장자, 업로드 저장 폴더, 음성 추출 동시 실행 상한)
+LOCAL_VIDEO_EXTENSIONS = (".mp4", ".mkv", ".webm", ".mov", ".avi", ".m4v", ".flv", ".wmv", ".ts")
+LOCAL_AUDIO_EXTENSIONS = (".mp3", ".m4a", ".wav", ".flac", ".ogg", ".opus", ".aac", ".wma")
+UPLOADS_ROOT = "uploads"
+# NFS 같은 공유 저장소에서 동시에 너무 많은 파일을 읽지 않도록 CPU 수와 별도로 제한
+LOCAL_EXTRACT_IO_LIMIT = int(os.environ.get("LOCAL_EXTRACT_IO_LIMIT", "8"))
+# 웹 화면에서 서버 경로로 변환할 수 있는 폴더 (설정하지 않으면 경로 입력 방식을 쓰지 않음)
+LOCAL_MEDIA_ROOT = os.environ.get("LOCAL_MEDIA_ROOT")
+# 업로드 폴더(uploads)도 다운로드 폴더처럼 용량 예산과 최대 보관 기간을 넘으면 정리
+UPLOAD_CACHE_BUDGET_MB = int(os.environ.get("UPLOAD_CACHE_BUDGET_MB", str(DOWNLOAD_CACHE_BUDGET_MB)))
+
+# 파일 서버가 제공하는 산출물 확장자 (카탈로그 DB, 체크포인트, 메타데이터 JSON 등은 제공하지 않음)
+ARTIFACT_SERVED_EXTENSIONS = LOCAL_VIDEO_EXTENSIONS + LOCAL_AUDIO_EXTENSIONS + (".txt", ".srt", ".vtt")
+
+# 서버 전체에서 동시에 실행할 변환 작업 수
+MAX_CONCURRENT_JOBS = int(os.environ.get("MAX_CONCURRENT_JOBS", "2"))
+
+# MP3 인코딩 등 작업과 병렬로 돌리는 보조 작업용 스레드 풀
+_background_executor = ThreadPoolExecutor(max_workers=max(2, (os.cpu_count() or 2) // 2),
+                                          thread_name_prefix="background")
+
+# 무거운 의존성(whisper/torch, yt_dlp, numpy)은 처음 쓸 때 임포트 (모듈 이름 → 임포트 시간(초))
+import_times = {}
+_import_lock = threading.Lock()
+
+
+def lazy_import(name):
+    """
+    모듈을 처음 쓸 때 임포트하고 걸린 시간을 import_times와 처리 지표에 기록
+
+    CLI 시작, 캐시 적중, 잘못된 URL 처리처럼 변환이 필요 없는 경로는
+    whisper/torch를 불러오는 비용을 치르지 않습니다.
+    """
+    module = sys.modules.get(name)
+    if module is not None and name in import_times:
+        return module
+    with _import_lock:
+        if name not in import_times:
+            started = time.perf_counter()
+            importlib.import_module(name)
+            import_times[name] = round(time.perf_counter() - started, 3)
+            default_metrics.observe("import_seconds", import_times[name], module=name)
+    return sys.modules[name]
+
+
+def prewarm(model_size="base", registry=None, modules=None, backend=None):
+    """
+    백그라운드 스레드에서 무거운 모듈 임포트와 모델 로드를 미리 시작
+
+    앱이 뜨자마자 호출하면 첫 변환 요청이 모델 로드를 기다리지 않습니다.
+    model_size가 None이면 모듈 임포트만 합니다. modules를 주지 않으면 numpy, yt_dlp와
+    음성 인식 엔진(backend, 기본값 DEFAULT_ASR_BACKEND) 모듈을 불러옵니다. 시작한 스레드를 반환합니다.
+    """
+    def warm():
+        try:
+            for name in modules or ("numpy", "yt_dlp", asr_backend_class(backend).module):
+                lazy_import(name)
+            if model_size:
+                get_whisper_model(model_size, registry, backend=backend)
+                print(f"🔥 모델 미리 로드 완료: {model_size}")
+        except Exception as e:
+            print(f"⚠️ 모델 미리 로드 실패: {e}")
+
+    thread = threading.Thread(target=warm, name="prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+class ASRBackend:
+    """
+    음성 인식 엔진 공통 인터페이스
+
+    엔진마다 모델 로드와 변환 방식은 다르지만, transcribe는 모두 같은 구조
+    {'text', 'segments': [{'id', 'start', 'end', 'text'}], 'language'}를 반환하고
+    진행/세그먼트 콜백도 같은 형식으로 전달합니다. 모델 크기 이름은 Whisper와 같습니다.
+    """
+
+    name = None
+    artifact_suffix = ""   # 산출물/캐시/속도 기록 이름에 붙는 구분자 (기본 엔진은 없음)
+    default_speedup = 1.0  # 측정값이 없을 때 기본 실시간 배율 추정치를 나눌 값
+    module = None          # 엔진이 쓰는 파이썬 모듈 (설치 여부 확인, 미리 임포트용)
+
+    def __init__(self, num_threads=None):
+        self.num_threads = num_threads
+
+    @classmethod
+    def available(cls):
+        """엔진 모듈이 설치되어 있는지"""
+        return importlib.util.find_spec(cls.module) is not None
+
+    def model_key(self, model_size):
+        """모델 레지스트리 키 (엔진마다 따로 보관)"""
+        return model_size + self.artifact_suffix
+
+    def load_model(self, model_size):
+        raise NotImplementedError
+
+    def model_memory_mb(self, model, model_size):
+        """로드된 모델 메모리 추정치 (MB)"""
+        base_size = model_size.split(".")[0].split("-")[0]
+        return MODEL_MEMORY_ESTIMATES_MB.get(base_size, MODEL_MEMORY_ESTIMATES_MB["large"])
+
+    def transcribe(self, model, audio, decode_options=None, progress_callback=None, segment_callback=None):
+        raise NotImplementedError
+
+
+class WhisperBackend(ASRBackend):
+    """openai-whisper (PyTorch fp32) 엔진, 기본값"""
+
+    name = "whisper"
+    module = "whisper"
+
+    def load_model(self, model_size):
+        if self.num_threads:
+            lazy_import("torch").set_num_threads(self.num_threads)
+        return lazy_import("whisper").load_model(model_size)
+
+    def model_memory_mb(self, model, model_size):
+        return _estimate_model_memory_mb(model, model_size)
+
+    # 창마다 나눠 변환할 수 없는 옵션 (있으면 한 번에 변환하고 세그먼트는 끝난 뒤 전달)
+    UNWINDOWED_OPTIONS = ("clip_timestamps",)
+
+    def transcribe(self, model, audio, decode_options=None, progress_callback=None, segment_callback=None):
+        options = dict(decode_options or {})
+        if (progress_callback or segment_callback) and not any(key in options for key in self.UNWINDOWED_OPTIONS):
+            return self._transcribe_windows(model, audio, options, progress_callback, segment_callback)
+        result = model.transcribe(audio, **options)
+        segments = [_compact_segment(seg) for seg in result.get("segments", [])]
+        for segment in segments:
+            _emit(segment_callback, segment)
+        return {'text': result["text"].strip(), 'segments': segments, 'language': result.get("language")}
+
+    def _transcribe_windows(self, model, audio, options, progress_callback, segment_callback):
+        """
+        무음 지점에서 30초 창 하나에 들어가게 나눈 구간을 차례로 변환하며 구간마다 진행률과 세그먼트 전달
+
+        앞 구간 텍스트를 다음 구간의 프롬프트로 넘겨(condition_on_previous_text) 문맥을 잇고,
+        첫 구간에서 감지한 언어를 이후 구간에 고정합니다.
+        """
+        pcm = lazy_import("whisper").load_audio(audio) if isinstance(audio, (str, os.PathLike)) else audio
+        duration = len(pcm) / WHISPER_SAMPLE_RATE
+        condition = options.pop('condition_on_previous_text', True)
+        boundaries = find_silence_boundaries(pcm, STREAMING_WINDOW_SECONDS, STREAMING_WINDOW_SEARCH_SECONDS)
+        segments = []
+        for left, right in zip(boundaries[:-1], boundaries[1:]):
+            result = model.transcribe(pcm[left:right], condition_on_previous_text=condition, **options)
+            options['language'] = options.get('language') or result.get("language")
+            offset, end = left / WHISPER_SAMPLE_RATE, right / WHISPER_SAMPLE_RATE
+            for seg in result.get("segments", []):
+                segment = _compact_segment({'id': len(segments), 'start': min(seg['start'] + offset, end),
+                                            'end': min(seg['end'] + offset, end), 'text': seg['text']})
+                segments.append(segment)
+                _emit(segment_callback, segment)
+            if not condition:
+                options['initial_prompt'] = None  # Whisper처럼 처음 프롬프트는 첫 창에만 사용
+            elif result["text"].strip():
+                options['initial_prompt'] = result["text"]
+            _emit(progress_callback, {
+                'stage': 'transcribe',
+                'progress': min(1.0, end / duration) if duration else None,
+                'processed_seconds': end,
+                'duration': duration,
+            })
+        return {'text': "".join(segment['text'] for segment in segments).strip(),
+                'segments': segments, 'language': options.get('language')}
+
+
+class FasterWhisperBackend(ASRBackend):
+    """
+    faster-whisper (CTranslate2) int8 양자화 CPU 엔진 (선택 설치: pip install faster-whisper)
+
+    가중치를 int8로 양자화해 fp32 Whisper보다 메모리를 약 1/4만 쓰고 CPU에서 몇 배 빠릅니다.
+    세그먼트를 생성기로 내주므로 세그먼트가 나올 때마다 진행률과 세그먼트를 전달합니다.
+    """
+
+    name = "faster-whisper"
+    module = "faster_whisper"
+    artifact_suffix = "-int8"
+    default_speedup = 3.0
+    # Whisper의 large는 최신 large 모델을 가리킴
+    MODEL_NAMES = {"large": "large-v3"}
+    # Whisper transcribe에만 있는 옵션 (faster-whisper에 넘기지 않음)
+    UNSUPPORTED_OPTIONS = ("fp16", "verbose")
+
+    def __init__(self, num_threads=None, compute_type="int8"):
+        super().__init__(num_threads)
+        self.compute_type = compute_type
+
+    def load_model(self, model_size):
+        return lazy_import("faster_whisper").WhisperModel(
+            self.MODEL_NAMES.get(model_size, model_size), device="cpu",
+            compute_type=self.compute_type, cpu_threads=self.num_threads or 0)
+
+    def model_memory_mb(self, model, model_size):
+        # int8 가중치는 fp32의 약 1/4
+        return super().model_memory_mb(model, model_size) / 4
+
+    def transcribe(self, model, audio, decode_options=None, progress_callback=None, segment_callback=None):
+        options = {key: value for key, value in (decode_options or {}).items()
+                   if key not in self.UNSUPPORTED_OPTIONS}
+        segment_iter, info = model.transcribe(audio, **options)
+        segments = []
+        for segment in segment_iter:
+            segment = _compact_segment({'id': len(segments), 'start': segment.start,
+                                        'end': segment.end, 'text': segment.text})
+            segments.append(segment)
+            _emit(segment_callback, segment)
+            _emit(progress_callback, {
+                'stage': 'transcribe',
+                'progress': min(1.0, segment['end'] / info.duration) if info.duration else None,
+                'processed_seconds': segment['end'],
+                'duration': info.duration,
+            })
+        return {'text': "".join(segment['text'] for segment in segments).strip(),
+                'segments': segments, 'language': info.language}
+
+
+ASR_BACKEND_CLASSES = {backend.name: backend for backend in (WhisperBackend, FasterWhisperBackend)}
+_asr_backends = {}
+
+
+def asr_backend_class(backend=None):
+    """이름(None이면 DEFAULT_ASR_BACKEND)에 해당하는 음성 인식 엔진 클래스 (없는 이름이면 ValueError)"""
+    name = backend or DEFAULT_ASR_BACKEND
+    if name not in ASR_BACKEND_CLASSES:
+        raise ValueError(f"알 수 없는 음성 인식 엔진: {name} (가능한 값: {', '.join(ASR_BACKENDS)})")
+    return ASR_BACKEND_CLASSES[name]
+
+
+def get_asr_backend(backend=None):
+    """
+    이름(None이면 DEFAULT_ASR_BACKEND)이나 인스턴스로 음성 인식 엔진 반환
+
+    이름으로 찾으면 프로세스에서 같은 인스턴스를 공유합니다. 없는 이름이면 ValueError,
+    설치되지 않은 엔진이면 ImportError를 냅니다.
+    """
+    if isinstance(backend, ASRBackend):
+        return backend
+    name = asr_backend_class(backend).name
+    if not ASR_BACKEND_CLASSES[name].available():
+        raise ImportError(f"{name} 엔진이 설치되어 있지 않습니다 (pip install {name})")
+    if name not in _asr_backends:
+        _asr_backends[name] = ASR_BACKEND_CLASSES[name]()
+    return _asr_backends[name]
+
+
+def available_asr_backends():
+    """설치된 음성 인식 엔진 이름 목록"""
+    return [name for name in ASR_BACKENDS if ASR_BACKEND_CLASSES[name].available()]
+
+
+def model_tag(model_size, backend=None):
+    """엔진까지 구분한 모델 이름 (산출물 파일, 캐시, 속도 기록용: base, base-int8 등, 설치 여부와 무관)"""
+    if isinstance(backend, ASRBackend):
+        return backend.model_key(model_size)
+    return model_size + asr_backend_class(backend).artifact_suffix
+
+
+class ModelRegistry:
+    """
+    프로세스 전역 Whisper 모델 레지스트리
+
+    (엔진, 모델 크기)별로 한 번 로드한 모델을 보관하고, 메모리 예산을 넘으면
+    가장 오래 사용되지 않은 모델부터 해제합니다 (LRU). 기본 엔진 모델의 키는 모델 크기입니다.
+    """
+
+    def __init__(self, memory_budget_mb=DEFAULT_MODEL_MEMORY_BUDGET_MB):
+        self.memory_budget_mb = memory_budget_mb
+        self._models = OrderedDict()  # model_size -> (model, memory_mb)
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _load_lock(self, model_size):
+        with self._lock:
+            return self._load_locks.setdefault(model_size, threading.Lock())
+
+    def get(self, model_size="base", info=None, backend=None):
+        """
+        모델 반환 (없으면 backend 엔진으로 로드 후 등록, backend 기본값은 DEFAULT_ASR_BACKEND)
+
+        info 딕셔너리를 넘기면 캐시 적중 여부(cache_hit)와 로드 시간(load_seconds)을 채웁니다.
+        """
+        backend = get_asr_backend(backend)
+        key = backend.model_key(model_size)
+        if info is not None:
+            info.update(cache_hit=True, load_seconds=0.0)
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return self._models[key][0]
+
+        # 같은 모델을 여러 스레드가 동시에 로드하지 않도록 모델별 잠금 사용
+        with self._load_lock(key):
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    self.hits += 1
+                    return self._models[key][0]
+                self.misses += 1
+
+            started = time.perf_counter()
+            model = backend.load_model(model_size)
+            if info is not None:
+                info.update(cache_hit=False, load_seconds=round(time.perf_counter() - started, 3))
+            memory_mb = backend.model_memory_mb(model, model_size)
+
+            with self._lock:
+                self._models[key] = (model, memory_mb)
+                self._evict_locked(keep=key)
+            return model
+
+    def _evict_locked(self, keep=None):
+        """메모리 예산을 넘는 동안 LRU 순서로 모델 해제"""
+        while self.memory_used_mb() > self.memory_budget_mb:
+            victim = next((size for size in self._models if size != keep), None)
+            if victim is None:
+                break
+            del self._models[victim]
+            self.evictions += 1
+            print(f"♻️ 모델 해제: {victim}")
+
+    def set_memory_budget(self, memory_budget_mb):
+        """메모리 예산 변경 (초과분은 즉시 해제)"""
+        with self._lock:
+            self.memory_budget_mb = memory_budget_mb
+            self._evict_locked()
+
+    def memory_used_mb(self):
+        return sum(memory_mb for _, memory_mb in self._models.values())
+
+    def loaded_models(self):
+        with self._lock:
+            return list(self._models.keys())
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'loaded': list(self._models.keys()),
+                'memory_used_mb': self.memory_used_mb(),
+                'memory_budget_mb': self.memory_budget_mb,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+def _estimate_model_memory_mb(model, model_size):
+    """로드된 모델의 가중치 메모리 계산 (실패 시 추정치 사용)"""
     try:
-        # 비디오 ID 추출
-        with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
-            info = ydl.extract_info(url, download=False)
-            video_id = info.get('id', '')
+        total_bytes = sum(p.numel() * p.element_size() for p in model.parameters())
+        return total_bytes / (1024 * 1024)
+    except Exception:
+        base_size = model_size.split(".")[0].split("-")[0]
+        return MODEL_MEMORY_ESTIMATES_MB.get(base_size, MODEL_MEMORY_ESTIMATES_MB["large"])
+
+
+# 기본 전역 레지스트리
+default_model_registry = ModelRegistry()
+
+
+def get_whisper_model(model_size="base", registry=None, info=None, backend=None):
+    """레지스트리에서 음성 인식 모델 가져오기 (backend 기본값은 DEFAULT_ASR_BACKEND)"""
+    return (registry or default_model_registry).get(model_size, info, backend)
+
+
+class MetricsRegistry:
+    """
+    처리 지표 집계기 (카운터와 고정 구간 히스토그램)
+
+    레이블별로 값을 모아 JSON 스냅샷이나 Prometheus 텍스트 형식으로 내보냅니다.
+    """
+
+    # 초 단위 지표용 기본 히스토그램 구간
+    DEFAULT_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+    def __init__(self, namespace="youtube_to_text"):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._counters = {}    # (이름, 레이블) → 값
+        self._histograms = {}  # (이름, 레이블) → {'buckets', 'counts', 'sum', 'count'}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        """카운터 증가"""
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=None, **labels):
+        """히스토그램에 값 하나 기록"""
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                bounds = tuple(buckets or self.DEFAULT_BUCKETS)
+                histogram = {'buckets': bounds, 'counts': [0] * len(bounds), 'sum': 0.0, 'count': 0}
+                self._histograms[key] = histogram
+            for i, bound in enumerate(histogram['buckets']):
+                if value <= bound:
+                    histogram['counts'][i] += 1
+                    break
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self):
+        """JSON으로 직렬화 가능한 지표 사본 (히스토그램 구간 값은 누적 개수)"""
+        with self._lock:
+            counters = {}
+            for (name, labels), value in sorted(self._counters.items()):
+                counters.setdefault(name, []).append({'labels': dict(labels), 'value': value})
+            histograms = {}
+            for (name, labels), h in sorted(self._histograms.items()):
+                cumulative, buckets = 0, {}
+                for bound, count in zip(h['buckets'], h['counts']):
+                    cumulative += count
+                    buckets[str(bound)] = cumulative
+                histograms.setdefault(name, []).append({
+                    'labels': dict(labels),
+                    'count': h['count'],
+                    'sum': round(h['sum'], 6),
+                    'mean': round(h['sum'] / h['count'], 6) if h['count'] else None,
+                    'buckets': buckets,
+                })
+        return {'counters': counters, 'histograms': histograms}
+
+    def to_json(self, indent=2):
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=indent)
+
+    def to_prometheus(self):
+        """Prometheus 텍스트 노출 형식 (0.0.4)"""
+        def fmt_labels(labels, extra=None):
+            items = dict(labels, **(extra or {}))
+            if not items:
+                return ""
+            escaped = {k: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+                       for k, v in items.items()}
+            return "{" + ",".join(f'{k}="{v}"' for k, v in escaped.items()) + "}"
+
+        snapshot = self.snapshot()
+        lines = []
+        for name, series in snapshot['counters'].items():
+            full_name = f"{self.namespace}_{name}"
+            lines.append(f"# TYPE {full_name} counter")
+            for item in series:
+                lines.append(f"{full_name}{fmt_labels(item['labels'])} {item['value']}")
+        for name, series in snapshot['histograms'].items():
+            full_name = f"{self.namespace}_{name}"
+            lines.append(f"# TYPE {full_name} histogram")
+            for item in series:
+                for bound, count in item['buckets'].items():
+                    lines.append(f"{full_name}_bucket{fmt_labels(item['labels'], {'le': bound})} {count}")
+                lines.append(f"{full_name}_bucket{fmt_labels(item['labels'], {'le': '+Inf'})} {item['count']}")
+                lines.append(f"{full_name}_sum{fmt_labels(item['labels'])} {item['sum']}")
+                lines.append(f"{full_name}_count{fmt_labels(item['labels'])} {item['count']}")
+        return "\n".join(lines) + "\n"
+
+
+# 기본 전역 지표 집계기
+default_metrics = MetricsRegistry()
+
+# 실시간 배율(RTF, 변환 시간 / 음성 길이)용 히스토그램 구간
+REAL_TIME_FACTOR_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8)
+
+def throttle_progress(callback, interval=0.5):
+    """
+    진행 이벤트 콜백을 감싸 같은 단계의 이벤트는 interval초에 한 번만 전달
+
+    단계가 바뀌거나 완료(progress 1.0) 이벤트는 항상 전달합니다.
+    """
+    state = {'stage': None, 'last': 0.0}
+    lock = threading.Lock()
+
+    def throttled(event):
+        now = time.monotonic()
+        with lock:
+            if (event.get('stage') == state['stage'] and event.get('progress') != 1.0
+                    and now - state['last'] < interval):
+                return
+            state['stage'] = event.get('stage')
+            state['last'] = now
+        callback(event)
+
+    return throttled
+
+def _emit(progress_callback, event):
+    """진행 콜백 호출 (콜백 오류가 작업을 멈추지 않도록 무시)"""
+    if progress_callback is None:
+        return
+    try:
+        progress_callback(event)
     except Exception as e:
-        print(f"❌ 영상 정보 추출 실패: {e}")
-        return None
-    
+        print(f"⚠️ 진행 콜백 오류: {e}")
+
+def _ytdlp_progress_hook(progress_callback):
+    """yt-dlp progress_hooks용 함수 (다운로드 바이트, 속도, 남은 시간 전달)"""
+    def hook(d):
+        if d.get('status') == 'downloading':
+            total = d.get('total_bytes') or d.get('total_bytes_estimate')
+            downloaded = d.get('downloaded_bytes') or 0
+            _emit(progress_callback, {
+                'stage': 'download',
+                'progress': min(1.0, downloaded / total) if total else None,
+                'downloaded_bytes': downloaded,
+                'total_bytes': total,
+                'speed': d.get('speed'),
+                'eta': d.get('eta'),
+            })
+        elif d.get('status') == 'finished':
+            _emit(progress_callback, {
+                'stage': 'download',
+                'progress': 1.0,
+                'downloaded_bytes': d.get('downloaded_bytes') or d.get('total_bytes'),
+                'total_bytes': d.get('total_bytes'),
+            })
+    return hook
+
+def download_youtube_video(url, output_path="downloads", audio_only=False, return_info=False,
+                           progress_callback=None, timings=None):
+    """
+    유튜브 영상 다운로드 (audio_only=True면 음성 스트림만 다운로드)
+
+    영상 정보는 한 번만 추출하여 다운로드에 그대로 재사용합니다.
+    return_info=True면 (파일 경로, 메타데이터) 튜플을 반환합니다.
+    progress_callback에는 다운로드 바이트와 남은 시간이 담긴 이벤트가 전달됩니다.
+    timings 딕셔너리를 넘기면 정보 추출(metadata) 소요 시간을 기록합니다.
+    """
+    failure = (None, None) if return_info else None
+
     # 기본 downloads 폴더 생성
     os.makedirs(output_path, exist_ok=True)
     
-    # 각 영상마다 별도 폴더 생성
-    unique_folder = os.path.join(output_path, f"video_{video_id}")
-    os.makedirs(unique_folder, exist_ok=True)
-    
-    print(f"📁 폴더 생성: {unique_folder}")
-    
-    # 타임스탬프 기반 파일명
-    timestamp = int(time.time())
-    
-    # yt-dlp 설정
+    # 비디오 ID와 형식으로 정해지는 파일명 (영상마다 별도 폴더, 같은 요청은 같은 파일)
     ydl_opts = {
-        'format': 'best[height<=720]',
-        'outtmpl': f'{unique_folder}/{timestamp}_%(id)s.%(ext)s',
+        'format': 'bestaudio/best' if audio_only else 'best[height<=720]',
+        'outtmpl': os.path.join(output_path, 'video_%(id)s',
+                                '%(id)s' + ARTIFACT_SUFFIXES['audio' if audio_only else 'video'] + '.%(ext)s'),
+        'overwrites': True,
         'restrictfilenames': True,
         'ignoreerrors': False,
         'cachedir': None,
         'noplaylist': True,
         'quiet': True,
     }
+    if progress_callback:
+        ydl_opts['progress_hooks'] = [_ytdlp_progress_hook(progress_callback)]
+    
+    yt_dlp = lazy_import("yt_dlp")
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        started = time.perf_counter()
+        try:
+            # 영상 정보 추출 (한 번만)
+            info = ydl.extract_info(url, download=False)
+        except Exception as e:
+            print(f"❌ 영상 정보 추출 실패: {e}")
+            return failure
+        finally:
+            if timings is not None:
+                timings['metadata'] = round(time.perf_counter() - started, 3)
+        
+        print(f"📁 폴더 생성: {os.path.join(output_path, 'video_' + info.get('id', ''))}")
+        
+        try:
+            # 추출한 정보를 그대로 사용해 다운로드
+            info = ydl.process_ie_result(info, download=True)
+            downloaded_file = _downloaded_filepath(ydl, info)
+        except Exception as e:
+            print(f"❌ 다운로드 실패: {e}")
+            return failure
     
+    if not downloaded_file or not Path(downloaded_file).exists():
+        print("❌ 다운로드된 파일을 찾을 수 없습니다.")
+        return failure
+    
+    print(f"✅ {'음성' if audio_only else '영상'} 다운로드 완료: {Path(downloaded_file).name}")
+    if return_info:
+        return str(downloaded_file), summarize_video_info(info)
+    return str(downloaded_file)
+
+def _downloaded_filepath(ydl, info):
+    """yt-dlp가 보고한 실제 저장 경로"""
+    requested = info.get('requested_downloads') or []
+    if requested and requested[0].get('filepath'):
+        return requested[0]['filepath']
+    return info.get('filepath') or ydl.prepare_filename(info)
+
+def summarize_video_info(info):
+    """yt-dlp 정보에서 이후 단계와 캐시에 필요한 메타데이터만 추림"""
+    formats = [
+        {
+            'format_id': f.get('format_id'),
+            'ext': f.get('ext'),
+            'vcodec': f.get('vcodec'),
+            'acodec': f.get('acodec'),
+            'height': f.get('height'),
+            'abr': f.get('abr'),
+            'filesize': f.get('filesize') or f.get('filesize_approx'),
+        }
+        for f in info.get('formats') or []
+    ]
+    return {
+        'id': info.get('id'),
+        'title': info.get('title'),
+        'duration': info.get('duration'),
+        'language': info.get('language'),
+        'uploader': info.get('uploader'),
+        'upload_date': info.get('upload_date'),
+        'webpage_url': info.get('webpage_url'),
+        'format_id': info.get('format_id'),
+        'ext': info.get('ext'),
+        'filesize': info.get('filesize') or info.get('filesize_approx'),
+        'formats': formats,
+    }
+
+def probe_media_duration(media_path):
+    """ffprobe로 미디어 길이(초) 조회 (실패 시 None)"""
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
-            
-            # 다운로드된 파일 찾기
-            download_dir = Path(unique_folder)
-            video_files = list(download_dir.glob("*.mp4")) + list(download_dir.glob("*.webm")) + list(download_dir.glob("*.mkv"))
-            
-            if video_files:
-                latest_file = max(video_files, key=lambda f: f.stat().st_mtime)
-                print(f"✅ 영상 다운로드 완료: {latest_file.name}")
-                return str(latest_file)
-            else:
-                print("❌ 다운로드된 파일을 찾을 수 없습니다.")
-                return None
-                    
-    except Exception as e:
-        print(f"❌ 다운로드 실패: {e}")
+        result = subprocess.run(
+            ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+             '-of', 'default=noprint_wrappers=1:nokey=1', str(media_path)],
+            capture_output=True, text=True
+        )
+        return float(result.stdout.strip()) if result.returncode == 0 else None
+    except (OSError, ValueError):
         return None
 
-def extract_audio_to_mp3(video_path, audio_path=None):
-    """영상에서 음성 추출"""
+def _run_ffmpeg_with_progress(command, stage, duration, progress_callback):
+    """
+    ffmpeg를 -progress pipe:1 로 실행하며 처리 시각을 진행률로 전달
+
+    반환값: (종료 코드, 표준에러 문자열)
+    """
+    command = command[:1] + ['-progress', 'pipe:1', '-nostats'] + command[1:]
+    with tempfile.TemporaryFile() as stderr_file:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr_file, text=True)
+        for line in process.stdout:
+            key, _, value = line.strip().partition('=')
+            if key in ('out_time_us', 'out_time_ms') and duration and value.isdigit():
+                # ffmpeg는 out_time_ms도 마이크로초 단위로 출력
+                seconds = int(value) / 1_000_000
+                _emit(progress_callback, {'stage': stage, 'progress': min(1.0, seconds / duration),
+                                          'processed_seconds': seconds, 'duration': duration})
+            elif key == 'progress' and value == 'end':
+                _emit(progress_callback, {'stage': stage, 'progress': 1.0, 'duration': duration})
+        process.wait()
+        stderr_file.seek(0)
+        return process.returncode, stderr_file.read().decode('utf-8', errors='ignore')
+
+def extract_audio_to_mp3(video_path, audio_path=None, progress_callback=None, duration=None):
+    """영상에서 음성 추출 (progress_callback이 있으면 ffmpeg 진행률 전달)"""
     if not audio_path:
         audio_path = Path(video_path).with_suffix('.mp3')
+    # 중간에 멈춰도 반쯤 쓴 파일이 완성본으로 보이지 않도록 임시 파일에 쓴 뒤 교체
+    partial_path = f"{audio_path}.{threading.get_ident()}.part.mp3"
     
     try:
         command = [
-            'ffmpeg', '-i', video_path, '-vn', '-acodec', 'mp3',
-            '-ab', '192k', '-ar', '44100', '-y', str(audio_path)
+            'ffmpeg', '-i', str(video_path), '-vn', '-acodec', 'mp3',
+            '-ab', '192k', '-ar', '44100', '-y', partial_path
         ]
         
-        result = subprocess.run(command, capture_output=True, text=True)
+        if progress_callback:
+            returncode, stderr = _run_ffmpeg_with_progress(
+                command, 'extract', duration or probe_media_duration(video_path), progress_callback)
+        else:
+            result = subprocess.run(command, capture_output=True, text=True)
+            returncode, stderr = result.returncode, result.stderr
         
-        if result.returncode == 0:
+        if returncode == 0:
+            os.replace(partial_path, audio_path)
             return str(audio_path)
         else:
-            print(f"❌ 음성 추출 실패: {result.stderr}")
+            print(f"❌ 음성 추출 실패: {stderr}")
             return None
             
     except Exception as e:
         print(f"❌ 음성 추출 중 오류: {e}")
         return None
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
 
-def convert_audio_to_text(audio_path, model_size="base"):
-    """음성을 텍스트로 변환"""
+def decode_audio_to_pcm(media_path, sample_rate=WHISPER_SAMPLE_RATE, progress_callback=None,
+                        duration=None):
+    """
+    영상/음성 파일을 ffmpeg로 한 번만 디코딩하여 16 kHz 모노 float32 배열로 반환
+
+    MP3 인코딩 → 재디코딩 과정 없이 ffmpeg 표준출력에서 바로 PCM을 읽습니다.
+    progress_callback이 있으면 읽은 PCM 양을 길이 대비 진행률로 전달합니다.
+    """
     try:
-        model = whisper.load_model(model_size)
-        result = model.transcribe(audio_path)
-        return result["text"].strip()
-        
+        command = [
+            'ffmpeg', '-nostdin', '-threads', '0', '-i', str(media_path),
+            '-vn', '-f', 's16le', '-ac', '1', '-acodec', 'pcm_s16le',
+            '-ar', str(sample_rate), '-'
+        ]
+
+        if progress_callback:
+            duration = duration or probe_media_duration(media_path)
+            expected_bytes = duration * sample_rate * 2 if duration else None
+            data = bytearray()
+            with tempfile.TemporaryFile() as stderr_file:
+                process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr_file)
+                while True:
+                    chunk = process.stdout.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    data.extend(chunk)
+                    _emit(progress_callback, {
+                        'stage': 'extract',
+                        'progress': min(1.0, len(data) / expected_bytes) if expected_bytes else None,
+                        'processed_seconds': len(data) / (sample_rate * 2),
+                        'duration': duration,
+                    })
+                returncode = process.wait()
+                stderr_file.seek(0)
+                stderr = stderr_file.read()
+            stdout = bytes(data)
+        else:
+            result = subprocess.run(command, capture_output=True)
+            returncode, stdout, stderr = result.returncode, result.stdout, result.stderr
+
+        if returncode == 0:
+            np = lazy_import("numpy")
+            return np.frombuffer(stdout, np.int16).flatten().astype(np.float32) / 32768.0
+        else:
+            print(f"❌ PCM 디코딩 실패: {stderr.decode('utf-8', errors='ignore')}")
+            return None
+
     except Exception as e:
-        print(f"❌ 텍스트 변환 실패: {e}")
+        print(f"❌ PCM 디코딩 중 오류: {e}")
         return None
 
-def save_text_to_file(text, file_path):
-    """텍스트를 파일로 저장"""
+def transcribe_audio(audio_path, model_size="base", model_registry=None, decode_options=None,
+                     progress_callback=None, segment_callback=None, backend=None):
+    """
+    음성을 텍스트로 변환하여 Whisper 결과(text, segments, language) 반환
+
+    backend는 음성 인식 엔진 이름이나 ASRBackend (None이면 DEFAULT_ASR_BACKEND).
+    어느 엔진이든 결과 구조는 같습니다.
+
+    audio_path는 파일 경로 또는 16 kHz float32 배열.
+    progress_callback이 있으면 디코딩한 구간만큼 진행률을 전달합니다.
+    segment_callback이 있으면 세그먼트({'id', 'start', 'end', 'text'})가 확정되는 대로
+    순서대로 한 번씩 전달합니다.
+    결과에는 모델 캐시 적중 여부(model_cache_hit)와 로드 시간(model_load_seconds)도 담깁니다.
+    """
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(text)
-        return str(file_path)
+        model_info = {}
+        backend = get_asr_backend(backend)
+        model = get_whisper_model(model_size, model_registry, model_info, backend)
+        result = backend.transcribe(model, audio_path, decode_options, progress_callback, segment_callback)
+        return {
+            'text': result['text'],
+            'segments': result['segments'],
+            'language': result['language'],
+            'backend': backend.name,
+            'model_cache_hit': model_info.get('cache_hit'),
+            'model_load_seconds': model_info.get('load_seconds'),
+        }
+        
     except Exception as e:
-        print(f"❌ 파일 저장 실패: {e}")
+        print(f"❌ 텍스트 변환 실패: {e}")
         return None
 
-def process_youtube_to_text(url, output_path="downloads", model_size="base", save_to_archive=False):
+def _compact_segment(segment):
+    """Whisper 세그먼트에서 필요한 필드만 추림"""
+    return {
+        'id': segment.get('id'),
+        'start': round(float(segment['start']), 3),
+        'end': round(float(segment['end']), 3),
+        'text': segment['text'],
+    }
+
+def iter_transcribe_segments(audio_path, model_size="base", model_registry=None, decode_options=None,
+                             progress_callback=None, backend=None):
     """
-    전체 프로세스: 유튜브 URL → 영상 → 음성 → 텍스트
-    
-    Parameters:
-    - url: 유튜브 URL
-    - output_path: 임시 출력 경로
-    - model_size: Whisper 모델 크기
-    - save_to_archive: 영구 보관소에 저장 여부
+    세그먼트가 확정되는 대로 하나씩 내보내는 변환 제너레이터
+
+    변환은 백그라운드 스레드에서 진행되고, 다 돌고 나면 transcribe_audio와 같은
+    최종 결과(실패 시 None)를 반환값으로 돌려줍니다 (result = yield from ...).
     """
-    result = {
-        'video_file': None,
-        'audio_file': None, 
-        'text_file': None,
-        'text_content': None,
-        'archived_files': [],
-        'success': False,
-        'error': None
-    }
-    
-    try:
-        # 1. 영상 다운로드
-        video_file = download_youtube_video(url, output_path)
-        if not video_file:
-            result['error'] = "영상 다운로드 실패"
-            return result
-        result['video_file'] = video_file
-        
-        # 2. 음성 추출
-        audio_file = extract_audio_to_mp3(video_file)
-        if not audio_file:
-            result['error'] = "음성 추출 실패"
-            return result
-        result['audio_file'] = audio_file
-        
-        # 3. 텍스트 변환
-        text = convert_audio_to_text(audio_file, model_size)
-        if not text:
-            result['error'] = "텍스트 변환 실패"
+    segments = queue.Queue()
+    done = object()
+    outcome = {}
+
+    def run():
+        try:
+            outcome['result'] = transcribe_audio(audio_path, model_size, model_registry, decode_options,
+                                                 progress_callback=progress_callback,
+                                                 segment_callback=segments.put, backend=backend)
+        finally:
+            segments.put(done)
+
+    threading.Thread(target=run, name="transcribe-stream", daemon=True).start()
+    while True:
+        segment = segments.get()
+        if segment is done:
+            return outcome.get('result')
+        yield segment
+
+def convert_audio_to_text(audio_path, model_size="base", model_registry=None, decode_options=None,
+                          backend=None):
+    """음성을 텍스트로 변환 (audio_path는 파일 경로 또는 16 kHz float32 배열)"""
+    result = transcribe_audio(audio_path, model_size, model_registry, decode_options, backend=backend)
+    return result['text'] if result else None
+
+# 묶음 크기 히스토그램 구간 (한 번에 디코딩한 클립 수)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32)
+
+class BatchTranscriber:
+    """
+    여러 작업의 짧은 클립을 모아 한 번에 디코딩하는 변환 워커 (쇼츠 일괄 처리용)
+
+    30초 창 하나에 들어가는 클립은 하나씩 변환하면 인코더/디코더를 작은 입력으로
+    여러 번 돌리게 됩니다. 이 워커는 max_batch_size개 클립이 모이거나 max_wait초가 지날
+    때까지 대기 중인 클립을 모아, 멜 스펙트로그램을 쌓아 whisper.decode 한 번으로
+    변환한 뒤 결과를 각 작업에 나눠 줍니다. 언어 감지는 클립마다 따로 합니다.
+
+    묶을 수 없는 작업(30초보다 긴 음성 — 30~60초 쇼츠 포함, whisper가 아닌 엔진, 파일 경로 입력,
+    묶음 디코딩이 지원하지 않는 옵션)은 single_workers개 스레드의 별도 실행기에서
+    transcribe_audio로 변환하므로, 긴 작업이 다른 작업의 짧은 클립을 막지 않습니다.
+    묶어서 디코딩한 결과가 압축률/로그 확률 기준을 넘거나 마지막 세그먼트가 닫히지 않으면
+    그 클립만 transcribe_audio(온도 폴백 포함)로 다시 변환합니다.
+    """
+
+    _STOP = object()
+    # 묶음 디코딩에서 처리하는 transcribe 옵션 (그 밖의 옵션이 있으면 하나씩 변환)
+    BATCHABLE_OPTIONS = ("language", "task", "fp16", "verbose", "initial_prompt")
+    # Whisper transcribe와 같은 품질 기준
+    COMPRESSION_RATIO_THRESHOLD = 2.4
+    LOGPROB_THRESHOLD = -1.0
+    NO_SPEECH_THRESHOLD = 0.6
+
+    def __init__(self, max_batch_size=SHORT_CLIP_BATCH_SIZE, max_wait=SHORT_CLIP_BATCH_WAIT_SECONDS,
+                 model_registry=None, single_workers=1, metrics=None):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self.model_registry = model_registry
+        self.single_workers = max(1, single_workers)
+        self.metrics = metrics or default_metrics
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._executor = ThreadPoolExecutor(max_workers=self.single_workers,
+                                            thread_name_prefix="single-transcribe")
+        self.batches = 0
+        self.batched_clips = 0
+        self.single_runs = 0
+        self.fallbacks = 0
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name="batch-transcribe", daemon=True)
+                self._thread.start()
+
+    def batchable(self, audio, decode_options=None, backend=None):
+        """묶음 디코딩 대상인지 (16 kHz 배열, whisper 엔진, 30초 창 하나 이하, 지원 옵션만)"""
+        if get_asr_backend(backend).name != "whisper" or isinstance(audio, (str, os.PathLike)):
+            return False
+        if len(audio) > SHORT_CLIP_MAX_SECONDS * WHISPER_SAMPLE_RATE:
+            return False
+        return all(key in self.BATCHABLE_OPTIONS for key in (decode_options or {}))
+
+    def submit(self, audio, model_size="base", decode_options=None, backend=None,
+               progress_callback=None, segment_callback=None):
+        """
+        변환 요청 (transcribe_audio와 같은 결과, 실패 시 None을 결과로 갖는 Future 반환)
+
+        묶음 디코딩된 결과에는 함께 디코딩한 클립 수(batch_size)가 담깁니다.
+        결과의 decode_seconds는 대기 시간과 모델 로드 시간을 뺀 변환 시간입니다
+        (묶음이면 그 클립이 들어간 묶음 전체의 디코딩 시간).
+        콜백은 하나씩 변환하는 작업에만 쓰입니다 (묶음 대상의 세그먼트는 transcribe가 전달).
+        """
+        if not self.batchable(audio, decode_options, backend):
+            return self.run(transcribe_audio, audio, model_size, self.model_registry, decode_options,
+                            progress_callback=progress_callback, segment_callback=segment_callback,
+                            backend=backend)
+        item = {
+            'audio': audio,
+            'model_size': model_size,
+            'decode_options': dict(decode_options or {}),
+            'future': Future(),
+        }
+        self._ensure_started()
+        self._queue.put(item)
+        return item['future']
+
+    def run(self, func, *args, **kwargs):
+        """
+        묶지 않는 변환 함수를 별도 실행기에서 실행 (결과를 갖는 Future 반환)
+
+        결과 딕셔너리에는 실행기에서 실제로 돈 시간에서 모델 로드 시간을 뺀 변환 시간
+        (decode_seconds, 실행기 대기 시간 제외)을 담습니다.
+        """
+        with self._lock:
+            self.single_runs += 1
+
+        def timed():
+            started = time.perf_counter()
+            result = func(*args, **kwargs)
+            if isinstance(result, dict):
+                elapsed = time.perf_counter() - started - (result.get('model_load_seconds') or 0)
+                result['decode_seconds'] = round(max(0.0, elapsed), 3)
             return result
-        result['text_content'] = text
+        return self._executor.submit(timed)
+
+    def transcribe(self, audio, model_size="base", decode_options=None, progress_callback=None,
+                   segment_callback=None, backend=None):
+        """
+        submit 후 결과를 기다려 반환 (transcribe_audio 대체용)
+
+        묶음 디코딩된 클립의 세그먼트와 진행률은 묶음이 끝난 뒤 한꺼번에 전달하고,
+        하나씩 변환하는 작업은 transcribe_audio처럼 나오는 대로 전달합니다.
+        """
+        result = self.submit(audio, model_size, decode_options, backend,
+                             progress_callback, segment_callback).result()
+        if result and self.batchable(audio, decode_options, backend):
+            for segment in result['segments']:
+                _emit(segment_callback, segment)
+            duration = len(audio) / WHISPER_SAMPLE_RATE
+            _emit(progress_callback, {'stage': 'transcribe', 'progress': 1.0,
+                                      'processed_seconds': duration, 'duration': duration})
+        return result
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+            items = [item]
+            # 클립이 max_batch_size개 모이거나 max_wait가 지날 때까지 더 모음
+            deadline = time.monotonic() + self.max_wait
+            while len(items) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    next_item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if next_item is self._STOP:
+                    self._queue.put(next_item)
+                    break
+                items.append(next_item)
+            try:
+                self._process(items)
+            except Exception as e:
+                # 워커가 죽지 않도록 이번에 모은 요청만 실패 처리
+                self._fail(items, e)
+
+    @staticmethod
+    def _fail(items, error):
+        for item in items:
+            if not item['future'].done():
+                item['future'].set_exception(error)
+
+    def _process(self, items):
+        groups = {}
+        for item in items:
+            options = item['decode_options']
+            key = (item['model_size'], options.get('language'), options.get('task'),
+                   options.get('initial_prompt'), options.get('fp16', True))
+            groups.setdefault(key, []).append(item)
+        for group in groups.values():
+            try:
+                self._run_batch(group)
+            except Exception as e:
+                self._fail(group, e)
+
+    def _retry(self, item):
+        """묶음 대상 클립을 별도 실행기에서 transcribe_audio로 따로 변환해 결과 전달"""
+        future = self.run(transcribe_audio, item['audio'], item['model_size'], self.model_registry,
+                          item['decode_options'], backend="whisper")
+
+        def forward(done):
+            if done.exception() is not None:
+                item['future'].set_exception(done.exception())
+            else:
+                item['future'].set_result(done.result())
+        future.add_done_callback(forward)
+
+    def _run_batch(self, items):
+        """모인 클립들을 한 번에 디코딩하고 클립별 결과로 나눔"""
+        started = time.perf_counter()
+        try:
+            decoded, model_info = self._decode(items)
+        except Exception as e:
+            print(f"⚠️ 묶음 변환 실패, 하나씩 변환: {e}")
+            for item in items:
+                self._retry(item)
+            return
         
-        # 4. 텍스트 파일 저장
-        text_file = Path(audio_file).with_suffix('.txt')
-        saved_text_file = save_text_to_file(text, text_file)
-        if not saved_text_file:
-            result['error'] = "텍스트 파일 저장 실패"
-            return result
-        result['text_file'] = saved_text_file
+        decode_seconds = round(max(0.0, time.perf_counter() - started - (model_info.get('load_seconds') or 0)), 3)
+        with self._lock:
+            self.batches += 1
+            self.batched_clips += len(items)
+        self.metrics.observe("transcribe_batch_size", len(items), buckets=BATCH_SIZE_BUCKETS,
+                             model=items[0]['model_size'])
         
-        # 5. 영구 보관소에 파일 복사 (선택적)
-        if save_to_archive:
-            archive_path = Path("archives")
-            archive_path.mkdir(exist_ok=True)
-            
-            # 비디오 ID 추출
-            video_path = Path(video_file)
-            video_id = video_path.parent.name.replace("video_", "")
-            
-            # 타임스탬프 추출
-            timestamp = video_path.stem.split("_")[0]
-            
-            # 아카이브 폴더 생성
-            archive_video_path = archive_path / f"video_{video_id}"
-            archive_video_path.mkdir(exist_ok=True)
-            
-            # 파일 복사
-            archived_files = []
-            
-            # 비디오 파일 복사
-            video_dest = archive_video_path / video_path.name
-            if not video_dest.exists():
-                shutil.copy2(video_file, video_dest)
-                archived_files.append(str(video_dest))
-            
-            # 오디오 파일 복사
-            audio_path = Path(audio_file)
-            audio_dest = archive_video_path / audio_path.name
-            if not audio_dest.exists():
-                shutil.copy2(audio_file, audio_dest)
-                archived_files.append(str(audio_dest))
-            
-            # 텍스트 파일 복사
-            text_path = Path(text_file)
-            text_dest = archive_video_path / text_path.name
-            if not text_dest.exists():
-                shutil.copy2(text_file, text_dest)
-                archived_files.append(str(text_dest))
-            
-            result['archived_files'] = archived_files
+        for item, clip in zip(items, decoded):
+            if clip is None:
+                # 품질 기준 미달이면 이 클립만 온도 폴백이 있는 일반 변환으로 다시
+                with self._lock:
+                    self.fallbacks += 1
+                self._retry(item)
+                continue
+            segments = [dict(segment, id=i) for i, segment in enumerate(clip['segments'])]
+            item['future'].set_result({
+                'text': "".join(segment['text'] for segment in segments).strip(),
+                'segments': segments,
+                'language': clip['language'],
+                'backend': "whisper",
+                'model_cache_hit': model_info.get('cache_hit'),
+                'model_load_seconds': model_info.get('load_seconds'),
+                'decode_seconds': decode_seconds,
+                'batch_size': len(items),
+            })
+
+    def _decode(self, items):
+        """
+        클립들의 멜 스펙트로그램(30초로 채움)을 쌓아 한 번에 디코딩
+
+        반환값: 클립 순서대로 {'segments', 'language'} 목록 (다시 변환할 클립은 None)과 모델 정보
+        """
+        whisper = lazy_import("whisper")
+        torch = lazy_import("torch")
+        model_info = {}
+        model = get_whisper_model(items[0]['model_size'], self.model_registry, model_info, "whisper")
+        options = items[0]['decode_options']
+        task = options.get('task') or "transcribe"
         
-        result['success'] = True
+        mels = [whisper.log_mel_spectrogram(whisper.pad_or_trim(item['audio']), model.dims.n_mels)
+                for item in items]
+        mel_batch = torch.stack(mels).to(model.device)
+        fp16 = options.get('fp16', True) and model.device.type != "cpu"
+        results = whisper.decode(model, mel_batch, whisper.DecodingOptions(
+            language=options.get('language'), task=task, prompt=options.get('initial_prompt'), fp16=fp16))
         
-    except Exception as e:
-        result['error'] = f"처리 중 오류: {str(e)}"
+        decoded = []
+        for item, result in zip(items, results):
+            if result.no_speech_prob > self.NO_SPEECH_THRESHOLD and result.avg_logprob < self.LOGPROB_THRESHOLD:
+                decoded.append({'segments': [], 'language': result.language})  # 무음 클립
+                continue
+            if (result.compression_ratio > self.COMPRESSION_RATIO_THRESHOLD
+                    or result.avg_logprob < self.LOGPROB_THRESHOLD):
+                decoded.append(None)
+                continue
+            tokenizer = whisper.tokenizer.get_tokenizer(
+                model.is_multilingual, num_languages=model.num_languages, language=result.language, task=task)
+            segments = self._segments_from_tokens(result.tokens, tokenizer,
+                                                  len(item['audio']) / WHISPER_SAMPLE_RATE)
+            decoded.append(None if segments is None else {'segments': segments, 'language': result.language})
+        return decoded, model_info
+
+    @staticmethod
+    def _segments_from_tokens(tokens, tokenizer, length):
+        """
+        타임스탬프 토큰으로 클립의 세그먼트 목록 구성 (시각은 클립 길이에서 자름)
+
+        마지막 텍스트가 닫는 타임스탬프 없이 끝나면 Whisper transcribe는 그 지점부터 다시
+        디코딩하므로, 여기서는 None을 반환해 일반 변환으로 넘깁니다.
+        """
+        segments, text_tokens, start = [], [], 0.0
+        for token in tokens:
+            if token >= tokenizer.timestamp_begin:
+                seconds = (token - tokenizer.timestamp_begin) * 0.02
+                text = tokenizer.decode(text_tokens) if text_tokens else ""
+                if text.strip():
+                    segments.append(_compact_segment({
+                        'id': None,
+                        'start': min(start, length),
+                        'end': min(max(seconds, start), length),
+                        'text': text,
+                    }))
+                text_tokens = []
+                start = seconds
+            elif token < tokenizer.eot:
+                text_tokens.append(token)
+        if text_tokens and tokenizer.decode(text_tokens).strip():
+            return None
+        return segments
+
+    def stats(self):
+        """묶음 수, 묶어서 변환한 클립 수, 평균 묶음 크기, 따로 변환한 수, 재변환 수"""
+        with self._lock:
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait': self.max_wait,
+                'queue_depth': self._queue.qsize(),
+                'batches': self.batches,
+                'batched_clips': self.batched_clips,
+                'mean_batch_size': round(self.batched_clips / self.batches, 2) if self.batches else None,
+                'single_runs': self.single_runs,
+                'fallbacks': self.fallbacks,
+            }
+
+    def shutdown(self):
+        """대기 중인 요청을 모두 처리한 뒤 워커와 실행기 종료"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._queue.put(self._STOP)
+            thread.join()
+        self._executor.shutdown(wait=True)
+
+def find_silence_boundaries(pcm, chunk_seconds=LONG_AUDIO_CHUNK_SECONDS, search_seconds=10.0,
+                            sample_rate=WHISPER_SAMPLE_RATE, frame_ms=30):
+    """
+    약 chunk_seconds 간격마다 앞뒤 search_seconds 안에서 가장 조용한 지점을 찾아
+    분할 위치(샘플 인덱스) 목록 반환 (처음 0, 마지막 len(pcm) 포함)
+    """
+    np = lazy_import("numpy")
+    frame = int(sample_rate * frame_ms / 1000)
+    n_frames = len(pcm) // frame
+    if n_frames == 0:
+        return [0, len(pcm)]
     
-    return result
\ No newline at end of file
+    # 프레임별 RMS 에너지
+    energy = np.sqrt(np.mean(pcm[:n_frames * frame].reshape(n_frames, frame) ** 2, axis=1))
+    
+    boundaries = [0]
+    chunk_frames = int(chunk_seconds * 1000 / frame_ms)
+    search_frames = int(search_seconds * 1000 / frame_ms)
+    target = chunk_frames
+    while target < n_frames - search_frames:
+        lo = max(target - search_frames, boundaries[-1] // frame + 1)
+        hi = min(target + search_frames, n_frames)
+        quietest = lo + int(np.argmin(energy[lo:hi]))
+        boundaries.append(quietest * frame)
+        target = quietest + chunk_frames
+    boundaries.append(len(pcm))
+    return boundaries
+
+def split_audio_on_silence(pcm, chunk_seconds=LONG_AUDIO_CHUNK_SECONDS,
+                           overlap_seconds=LONG_AUDIO_OVERLAP_SECONDS, sample_rate=WHISPER_SAMPLE_RATE):
+    """
+    무음 지점에서 나눈 겹치는 구간 목록 반환
+
+    각 구간: {'start', 'end'} (샘플 인덱스, 앞뒤로 overlap만큼 확장)와
+    {'keep_from', 'keep_until'} (초, 이 구간이 책임지는 원래 범위)
+    """
+    overlap = int(overlap_seconds * sample_rate)
+    boundaries = find_silence_boundaries(pcm, chunk_seconds, sample_rate=sample_rate)
+    chunks = []
+    for left, right in zip(boundaries[:-1], boundaries[1:]):
+        chunks.append({
+            'start': max(0, left - overlap),
+            'end': min(len(pcm), right + overlap),
+            'keep_from': left / sample_rate,
+            'keep_until': right / sample_rate,
+        })
+    return chunks
+
+# 분할 변환 워커 프로세스의 음성 인식 엔진 (스레드 수를 워커 몫으로 제한한 인스턴스)
+_chunk_backend = None
+
+def _init_chunk_worker(model_size, num_threads, backend_name=None):
+    """분할 변환 워커 프로세스 초기화 (프로세스마다 자체 모델 로드)"""
+    global _chunk_backend
+    _chunk_backend = asr_backend_class(backend_name)(num_threads=num_threads)
+    get_whisper_model(model_size, backend=_chunk_backend)
+
+def _transcribe_chunk(args):
+    """워커 프로세스에서 구간 하나 변환"""
+    pcm_chunk, model_size, decode_options = args
+    return transcribe_audio(pcm_chunk, model_size, decode_options=decode_options, backend=_chunk_backend)
+
+def stitch_chunk_results(chunks, chunk_results, sample_rate=WHISPER_SAMPLE_RATE):
+    """
+    구간별 변환 결과를 전체 시간축으로 합침
+
+    겹치는 부분의 세그먼트는 중심 시각이 해당 구간의 책임 범위 안에 있을 때만 남겨
+    중복을 제거합니다.
+    """
+    segments = []
+    language = None
+    for chunk, chunk_result in zip(chunks, chunk_results):
+        if not chunk_result:
+            continue
+        language = language or chunk_result.get('language')
+        offset = chunk['start'] / sample_rate
+        for segment in chunk_result['segments']:
+            start = segment['start'] + offset
+            end = segment['end'] + offset
+            if chunk['keep_from'] <= (start + end) / 2 < chunk['keep_until']:
+                segments.append({
+                    'id': len(segments),
+                    'start': round(start, 3),
+                    'end': round(end, 3),
+                    'text': segment['text'],
+                })
+    return {
+        'text': "".join(segment['text'] for segment in segments).strip(),
+        'segments': segments,
+        'language': language,
+    }
+
+def transcribe_long_audio(pcm, model_size="base", workers=2, decode_options=None,
+                          chunk_seconds=LONG_AUDIO_CHUNK_SECONDS, overlap_seconds=LONG_AUDIO_OVERLAP_SECONDS,
+                          progress_callback=None, checkpoint=None, segment_callback=None, backend=None,
+                          model_registry=None):
+    """
+    긴 음성을 무음 지점에서 나눠 프로세스 풀에서 병렬 변환한 뒤 순서대로 합침
+
+    워커마다 모델을 따로 로드하므로 메모리는 모델 크기 × workers 만큼 필요합니다.
+    checkpoint(JobManifest)를 넘기면 끝난 구간 결과를 바로 기록하고,
+    이전에 끝낸 구간은 다시 변환하지 않습니다.
+    segment_callback에는 앞에서부터 이어서 끝난 구간의 세그먼트가 시간 순서대로 전달됩니다.
+    구간이 하나뿐이면 현재 프로세스에서 model_registry의 모델로 바로 변환합니다.
+    """
+    chunks = split_audio_on_silence(pcm, chunk_seconds, overlap_seconds)
+    if len(chunks) <= 1:
+        return transcribe_audio(pcm, model_size, model_registry, decode_options=decode_options,
+                                progress_callback=progress_callback, segment_callback=segment_callback,
+                                backend=backend)
+    
+    completed = checkpoint.chunk_results_for(chunks) if checkpoint else {}
+    chunk_results = [completed.get(i) for i in range(len(chunks))]
+    pending = [i for i in range(len(chunks)) if chunk_results[i] is None]
+    if completed:
+        print(f"⏩ 체크포인트에서 이어서 변환: {len(completed)}/{len(chunks)}개 구간 완료")
+    
+    streamed = {'chunks': 0, 'segments': 0}
+
+    def stream_ready_chunks():
+        """앞 구간부터 끊김 없이 끝난 구간까지의 세그먼트를 전달"""
+        while streamed['chunks'] < len(chunks) and chunk_results[streamed['chunks']] is not None:
+            index = streamed['chunks']
+            for segment in stitch_chunk_results([chunks[index]], [chunk_results[index]])['segments']:
+                _emit(segment_callback, dict(segment, id=streamed['segments']))
+                streamed['segments'] += 1
+            streamed['chunks'] += 1
+
+    if segment_callback:
+        stream_ready_chunks()
+    
+    try:
+        if pending:
+            workers = max(1, min(workers, len(pending)))
+            num_threads = max(1, (os.cpu_count() or 1) // workers)
+            print(f"🧩 긴 음성 분할 변환: {len(pending)}개 구간, 워커 {workers}개")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=_init_chunk_worker,
+                                     initargs=(model_size, num_threads, get_asr_backend(backend).name)) as pool:
+                futures = {
+                    pool.submit(_transcribe_chunk,
+                                (pcm[chunks[i]['start']:chunks[i]['end']], model_size, decode_options)): i
+                    for i in pending
+                }
+                for done, future in enumerate(as_completed(futures), len(completed) + 1):
+                    index = futures[future]
+                    chunk_results[index] = future.result()
+                    if checkpoint and chunk_results[index] is not None:
+                        checkpoint.complete_chunk(index, chunk_results[index])
+                    if segment_callback:
+                        stream_ready_chunks()
+                    _emit(progress_callback, {'stage': 'transcribe', 'progress': done / len(chunks),
+                                              'chunks_done': done, 'chunks_total': len(chunks)})
+    except Exception as e:
+        print(f"❌ 분할 변환 실패: {e}")
+        return None
+    
+    if any(chunk_result is None for chunk_result in chunk_results):
+        return None
+    return dict(stitch_chunk_results(chunks, chunk_results), backend=get_asr_backend(backend).name)
+
+def default_long_audio_workers():
+    """CPU 전용 환경에서 긴 음성 분할 변환에 쓸 기본 워커 수 (GPU가 있으면 1)"""
+    try:
+        if lazy_import("torch").cuda.is_available():
+            return 1
+    except ImportError:
+        pass
+    return max(1, min(4, (os.cpu_count() or 1) // 2))
+
+def save_text_to_file(text, file_path):
+    """텍스트를 파일로 저장 (보관소에 하드링크된 파일이 바뀌지 않도록 새 파일로 교체)"""
+    try:
+        tmp_path = f"{file_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, file_path)
+        return str(file_path)
+    except Exception as e:
+        print(f"❌ 파일 저장 실패: {e}")
+        return None
+
+def format_timestamp(seconds, decimal_marker=","):
+    """자막 시각 형식 (SRT: 00:01:02,345 / VTT: 00:01:02.345)"""
+    milliseconds = int(round((seconds or 0) * 1000))
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{decimal_marker}{milliseconds:03d}"
+
+# 변환 텍스트와 함께 만드는 자막/세그먼트 파일 확장자
+TRANSCRIPT_SIDECARS = ("srt", "vtt", "json")
+
+class TranscriptWriter:
+    """
+    세그먼트가 나오는 대로 .txt와 자막(.srt, .vtt), 세그먼트 JSON 파일에 이어 쓰기
+
+    변환 중에는 {이름}.{확장자}.partial 파일에 쓰고, 끝까지 변환했을 때(close(complete=True))만
+    완성본 이름으로 교체합니다. 다시 변환하다 실패해도 캐시와 이전 결과가 가리키는 완성본은
+    그대로 남고, 끊긴 변환의 중간 결과는 .partial 파일에 남습니다. 교체는 새 파일로 하므로
+    보관소에 하드링크된 예전 파일도 바뀌지 않습니다. 같은 경로에 쓰는 작업(같은 영상, 같은 모델)은
+    닫을 때까지 경로별 잠금으로 차례를 기다립니다.
+    JSON은 segments_per_json개 세그먼트마다, 그리고 close 때 새로 씁니다.
+    """
+
+    def __init__(self, base_path, segments_per_json=10):
+        self.base_path = Path(base_path)
+        self.paths = {ext: f"{self.base_path}.{ext}" for ext in ("txt",) + TRANSCRIPT_SIDECARS}
+        self.segments_per_json = segments_per_json
+        self.segments = []
+        self.language = None
+        self._files = {}
+        self._lock = _artifact_lock(f"{self.base_path}.transcript")
+        self._lock.acquire()
+        self._closed = False
+        try:
+            for ext in ("txt", "srt", "vtt"):
+                self._files[ext] = open(self._partial(ext), 'w', encoding='utf-8')
+            self._files['vtt'].write("WEBVTT\n\n")
+            self._write_json(complete=False)
+        except Exception:
+            self.close(complete=False)
+            raise
+
+    def _partial(self, ext):
+        return f"{self.paths[ext]}.partial"
+    def add(self, segment):
+        """세그먼트 하나 추가"""
+        self.segments.append(segment)
+        number = len(self.segments)
+        text = segment['text'].strip()
+        self._files['txt'].write(segment['text'].lstrip() if number == 1 else segment['text'])
+        self._files['srt'].write(f"{number}\n{format_timestamp(segment['start'])} --> "
+                                 f"{format_timestamp(segment['end'])}\n{text}\n\n")
+        self._files['vtt'].write(f"{format_timestamp(segment['start'], '.')} --> "
+                                 f"{format_timestamp(segment['end'], '.')}\n{text}\n\n")
+        for f in self._files.values():
+            f.flush()
+        if number % self.segments_per_json == 0:
+            self._write_json(complete=False)
+
+    def _write_json(self, complete):
+        tmp_path = f"{self.paths['json']}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'language': self.language, 'complete': complete, 'segments': self.segments},
+                      f, ensure_ascii=False)
+        os.replace(tmp_path, self.paths['json'] if complete else self._partial('json'))
+
+    def close(self, complete=True, language=None):
+        """
+        파일을 닫고 잠금 해제 (두 번째 호출부터는 무시)
+
+        complete=True면 .partial 파일을 완성본으로 교체하고, False면 완성본은 두고
+        .partial 파일에 중간 결과로 남깁니다.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self.language = language or self.language
+            for f in self._files.values():
+                f.close()
+            self._files = {}
+            self._write_json(complete)
+            if complete:
+                for ext in ("txt", "srt", "vtt"):
+                    os.replace(self._partial(ext), self.paths[ext])
+                if os.path.exists(self._partial('json')):
+                    os.remove(self._partial('json'))
+        finally:
+            self._lock.release()
+
+    def sidecar_files(self):
+        return {ext: self.paths[ext] for ext in TRANSCRIPT_SIDECARS}
+
+_YOUTUBE_ID_PATTERN = re.compile(
+    r'(?:youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/|live/|v/)|youtu\.be/)([A-Za-z0-9_-]{11})'
+)
+
+def extract_video_id(url):
+    """네트워크 요청 없이 URL에서 유튜브 비디오 ID 추출 (실패 시 None)"""
+    match = _YOUTUBE_ID_PATTERN.search(url or "")
+    return match.group(1) if match else None
+
+def is_local_media(path):
+    """변환할 수 있는 로컬 미디어 파일 경로인지 (URL이거나 지원하지 않는 확장자면 False)"""
+    return (bool(path) and Path(path).suffix.lower() in LOCAL_VIDEO_EXTENSIONS + LOCAL_AUDIO_EXTENSIONS
+            and os.path.isfile(path))
+
+def local_media_id(path):
+    """
+    로컬 파일의 비디오 ID 대용 (local_ + 경로, 크기, 수정 시각의 해시)
+
+    같은 파일은 늘 같은 ID라 변환 캐시와 downloads/archives 폴더 구조를 그대로 쓰고,
+    파일 내용이 바뀌면(크기나 수정 시각이 다르면) 다른 ID가 되어 새로 변환합니다.
+    """
+    stat = os.stat(path)
+    key = f"{os.path.realpath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return "local_" + hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+def find_local_media(paths, recursive=True):
+    """파일/폴더 경로 목록에서 변환할 미디어 파일 목록 (폴더는 하위 폴더까지 이름순으로 훑음)"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            pattern = "**/*" if recursive else "*"
+            found.extend(str(p) for p in sorted(Path(path).glob(pattern)) if is_local_media(p))
+        elif is_local_media(path):
+            found.append(str(path))
+        else:
+            print(f"⚠️ 지원하지 않는 파일이거나 경로가 없음: {path}")
+    return found
+
+def save_uploaded_media(file_name, data, upload_root=UPLOADS_ROOT):
+    """
+    업로드된 미디어를 uploads/{내용 해시}/{파일 이름}에 저장하고 경로 반환
+
+    같은 내용을 다시 올리면 파일을 새로 쓰지 않아 ID가 같게 유지되므로 캐시가 적중합니다.
+    """
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    path = Path(upload_root) / digest / Path(file_name).name
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    get_upload_cache(upload_root).touch(path)  # 다시 올린 파일이 바로 정리되지 않도록
+    return str(path)
+
+def resolve_local_media_path(path, root=LOCAL_MEDIA_ROOT):
+    """
+    웹 화면에서 입력한 서버 경로를 root 안의 실제 경로로 바꿔 반환
+
+    root가 없거나 (심볼릭 링크, .. 를 풀었을 때) root 밖의 경로면 None.
+    """
+    if not root or not path:
+        return None
+    base = Path(root).resolve()
+    target = (base / path).resolve()  # 절대 경로면 그대로, 상대 경로면 root 기준
+    return target if target.is_relative_to(base) else None
+
+def default_extract_workers():
+    """로컬 미디어 음성 추출 동시 실행 수 (CPU 수와 저장소 읽기 상한 중 작은 값)"""
+    return max(1, min(os.cpu_count() or 1, LOCAL_EXTRACT_IO_LIMIT))
+
+class TranscriptCache:
+    """
+    변환 결과 캐시
+
+    (비디오 ID, 모델 크기, 디코딩 옵션, 코드 버전)을 해시한 키로
+    텍스트와 산출물 경로를 JSON 파일로 저장합니다.
+    """
+
+    def __init__(self, cache_dir="cache/transcripts"):
+        self.cache_dir = Path(cache_dir)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+
+    @staticmethod
+    def make_key(video_id, model_size, decode_options=None):
+        """캐시 키 생성"""
+        payload = json.dumps({
+            'video_id': video_id,
+            'model_size': model_size,
+            'decode_options': decode_options or {},
+            'version': PIPELINE_VERSION,
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key):
+        """캐시 항목 조회 (없으면 None)"""
+        try:
+            with open(self._entry_path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = None
+
+        with self._lock:
+            if entry:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry
+
+    def put(self, key, entry):
+        """캐시 항목 저장 (임시 파일에 쓴 뒤 교체)"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            entry_path = self._entry_path(key)
+            tmp_path = entry_path.with_suffix(f".{threading.get_ident()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, entry_path)
+        except Exception as e:
+            print(f"⚠️ 캐시 저장 실패: {e}")
+
+    def record_bypass(self):
+        with self._lock:
+            self.bypasses += 1
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'bypasses': self.bypasses}
+
+# 기본 전역 변환 캐시
+default_transcript_cache = TranscriptCache()
+
+
+class ModelSpeedProfile:
+    """
+    이 서버에서 측정한 모델별 실시간 배율 기록 (cache/model_speed.json)
+
+    보정 실행(calibrate_model_speed)이나 끝난 작업의 지표로 모델별 실시간 배율
+    (변환 시간 / 음성 길이)을 지수 이동 평균으로 누적합니다. 너무 짧은 음성은
+    모델 로드 등 고정 비용 비중이 커서 기록하지 않습니다.
+    """
+
+    def __init__(self, path="cache/model_speed.json", smoothing=0.3, min_audio_seconds=10.0):
+        self.path = Path(path)
+        self.smoothing = smoothing
+        self.min_audio_seconds = min_audio_seconds
+        self._lock = threading.Lock()
+        self._models = None
+
+    def _load_locked(self):
+        if self._models is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._models = json.load(f)
+            except (OSError, ValueError):
+                self._models = {}
+        return self._models
+
+    def record(self, model_size, real_time_factor, audio_seconds=None, source="job"):
+        """측정값 하나 반영 (model_size는 엔진 구분을 포함한 이름, 보정 실행 값은 지금까지의 평균을 대체)"""
+        if real_time_factor is None or (audio_seconds is not None and audio_seconds < self.min_audio_seconds):
+            return
+        with self._lock:
+            models = self._load_locked()
+            entry = models.get(model_size)
+            if entry is None or source == "calibration":
+                rtf = real_time_factor
+            else:
+                rtf = (1 - self.smoothing) * entry['real_time_factor'] + self.smoothing * real_time_factor
+            models[model_size] = {
+                'real_time_factor': round(rtf, 4),
+                'samples': (entry or {}).get('samples', 0) + 1,
+                'source': source,
+                'updated_at': time.time(),
+            }
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_suffix(f".{threading.get_ident()}.tmp")
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(models, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"⚠️ 모델 속도 기록 저장 실패: {e}")
+
+    def estimate(self, model_size, backend=None):
+        """
+        엔진(backend)의 모델 실시간 배율과 출처 반환
+
+        측정값이 없으면 기본 추정치를 엔진의 기본 속도 배수로 나눈 값 (출처 "default")
+        """
+        with self._lock:
+            entry = self._load_locked().get(model_tag(model_size, backend))
+        if entry:
+            return entry['real_time_factor'], entry['source']
+        speedup = (backend if isinstance(backend, ASRBackend)
+                   else asr_backend_class(backend)).default_speedup
+        rtf = DEFAULT_REAL_TIME_FACTORS.get(model_size, DEFAULT_REAL_TIME_FACTORS["large"]) / speedup
+        return round(rtf, 4), "default"
+
+    def estimates(self, backend=None):
+        """모델별 {'real_time_factor', 'source'}"""
+        return {model: dict(zip(('real_time_factor', 'source'), self.estimate(model, backend)))
+                for model in MODEL_SIZES}
+
+# 기본 전역 모델 속도 기록
+default_model_speed = ModelSpeedProfile()
+
+
+def select_model(duration, latency_budget, speed_profile=None, models=MODEL_SIZES, backend=None):
+    """
+    지연 예산 안에 끝날 것으로 보이는 가장 정확한 모델 선택
+
+    예상 변환 시간 = 음성 길이 × 모델의 실시간 배율. 예산을 맞추는 모델이 없으면
+    가장 빠른 모델을, 길이를 모르면 기본 모델(base)을 고릅니다.
+    반환값: {'model', 'estimated_seconds', 'real_time_factor', 'rtf_source', 'meets_budget'}
+    """
+    speed_profile = speed_profile or default_model_speed
+    if not duration:
+        rtf, source = speed_profile.estimate("base", backend)
+        return {'model': "base", 'estimated_seconds': None, 'real_time_factor': rtf,
+                'rtf_source': source, 'meets_budget': None}
+    
+    candidates = []
+    for model in models:
+        rtf, source = speed_profile.estimate(model, backend)
+        candidates.append({'model': model, 'estimated_seconds': round(duration * rtf, 1),
+                           'real_time_factor': rtf, 'rtf_source': source})
+    fitting = [c for c in candidates if c['estimated_seconds'] <= latency_budget]
+    choice = fitting[-1] if fitting else min(candidates, key=lambda c: c['estimated_seconds'])
+    return dict(choice, meets_budget=bool(fitting))
+
+
+def calibrate_model_speed(audio_path, models=MODEL_SIZES, speed_profile=None, model_registry=None,
+                          backend=None):
+    """
+    음성 파일 하나를 모델마다 변환해 이 서버의 실시간 배율 측정 (모델 로드 시간 제외)
+
+    반환값: {모델: 실시간 배율} (변환에 실패한 모델은 None)
+    """
+    speed_profile = speed_profile or default_model_speed
+    pcm = decode_audio_to_pcm(audio_path)
+    if pcm is None:
+        return {}
+    duration = len(pcm) / WHISPER_SAMPLE_RATE
+    measured = {}
+    for model in models:
+        started = time.perf_counter()
+        transcript = transcribe_audio(pcm, model, model_registry, backend=backend)
+        elapsed = time.perf_counter() - started - ((transcript or {}).get('model_load_seconds') or 0)
+        measured[model] = round(elapsed / duration, 4) if transcript and duration else None
+        if measured[model] is not None:
+            speed_profile.record(model_tag(model, backend), measured[model], source="calibration")
+        print(f"⏱️ {model_tag(model, backend)}: 실시간 배율 {measured[model]}")
+    return measured
+
+
+class DownloadCache:
+    """
+    다운로드 작업 폴더 캐시
+
+    root 아래 pattern(기본 video_*)에 맞는 폴더를 단위로 용량 예산과 최대 보관 기간을 넘으면
+    가장 오래 쓰지 않은 폴더부터 지웁니다 (uploads는 업로드마다 만드는 해시 폴더 단위). 처리 중인 작업은 임대(lease)를 잡아
+    해당 폴더가 지워지지 않게 하고, 다른 프로세스가 쓰는 중일 수 있는 최근 폴더
+    (min_idle_seconds 이내에 바뀐 폴더)도 건너뜁니다.
+    폴더 수와 용량은 정리할 때 훑은 값을 누적 관리하므로 stats는 폴더를 다시 훑지 않습니다.
+    """
+
+    def __init__(self, root=DOWNLOADS_ROOT, budget_mb=DOWNLOAD_CACHE_BUDGET_MB,
+                 max_age_hours=DOWNLOAD_CACHE_MAX_AGE_HOURS, min_idle_seconds=300,
+                 sweep_interval=DOWNLOAD_CACHE_SWEEP_SECONDS, pattern="video_*"):
+        self.root = Path(root)
+        self.pattern = pattern
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.max_age_seconds = max_age_hours * 3600 if max_age_hours else None
+        self.min_idle_seconds = min_idle_seconds
+        self.sweep_interval = sweep_interval
+        self._lock = threading.Lock()
+        self._leases = {}  # 폴더 이름 → 임대 수
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.skipped_in_use = 0
+        self.last_sweep = None
+        self.folder_count = 0
+        self.size_bytes = 0
+        self._scanned = False
+
+    def folder_for(self, video_id):
+        return self.root / f"video_{video_id}"
+
+    def acquire(self, video_id):
+        """폴더 임대 (release 전까지 정리 대상에서 제외)"""
+        self.acquire_path(self.folder_for(video_id))
+
+    def release(self, video_id):
+        """폴더 임대 해제 (마지막 사용 시각 갱신)"""
+        self.release_path(self.folder_for(video_id))
+
+    def _folder_name(self, path):
+        """path가 속한 캐시 폴더 이름 (root 밖이면 None)"""
+        try:
+            relative = Path(path).resolve().relative_to(self.root.resolve())
+        except (OSError, ValueError):
+            return None
+        return relative.parts[0] if relative.parts else None
+
+    def acquire_path(self, path):
+        """path가 속한 폴더 임대 (임대한 폴더 이름, root 밖이면 None 반환)"""
+        name = self._folder_name(path)
+        if name:
+            with self._lock:
+                self._leases[name] = self._leases.get(name, 0) + 1
+        return name
+
+    def release_path(self, path):
+        """path가 속한 폴더 임대 해제 (마지막 사용 시각 갱신)"""
+        name = self._folder_name(path)
+        if not name:
+            return
+        with self._lock:
+            count = self._leases.get(name, 0) - 1
+            if count > 0:
+                self._leases[name] = count
+            else:
+                self._leases.pop(name, None)
+        self.touch(path)
+
+    def lease_count(self, path):
+        """path가 속한 폴더의 임대 수 (root 밖이면 0)"""
+        name = self._folder_name(path)
+        with self._lock:
+            return self._leases.get(name, 0) if name else 0
+
+    def touch(self, path):
+        """path가 속한 캐시 폴더를 방금 사용한 것으로 표시"""
+        name = self._folder_name(path)
+        if name:
+            try:
+                os.utime(self.root / name)
+            except OSError:
+                pass
+
+    def _folders(self):
+        """(폴더, 크기, 마지막 사용 시각) 목록"""
+        folders = []
+        for folder in self.root.glob(self.pattern):
+            if not folder.is_dir():
+                continue
+            size, last_used = 0, folder.stat().st_mtime
+            for entry in folder.rglob("*"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                size += stat.st_size if entry.is_file() else 0
+                last_used = max(last_used, stat.st_mtime)
+            folders.append((folder, size, last_used))
+        return folders
+
+    def _set_totals_locked(self, folders):
+        """훑은 결과로 폴더 수와 용량 갱신 (self._lock을 잡은 상태에서 호출)"""
+        self.folder_count = len(folders)
+        self.size_bytes = sum(size for _, size, _ in folders)
+        self._scanned = True
+
+    def _remove_locked(self, folder, size):
+        shutil.rmtree(folder, ignore_errors=True)
+        self.evictions += 1
+        self.evicted_bytes += size
+        self.folder_count = max(0, self.folder_count - 1)
+        self.size_bytes = max(0, self.size_bytes - size)
+
+    def sweep(self):
+        """기간이 지났거나 예산을 넘는 폴더를 오래된 순서로 정리하고 지운 폴더 목록 반환"""
+        now = time.time()
+        folders = sorted(self._folders(), key=lambda item: item[2])
+        total = sum(size for _, size, _ in folders)
+        evicted = []
+        with self._lock:
+            self._set_totals_locked(folders)
+            for folder, size, last_used in folders:
+                expired = self.max_age_seconds is not None and now - last_used > self.max_age_seconds
+                if not expired and total <= self.budget_bytes:
+                    continue
+                if folder.name in self._leases or now - last_used < self.min_idle_seconds:
+                    self.skipped_in_use += 1
+                    continue
+                self._remove_locked(folder, size)
+                total -= size
+                evicted.append(str(folder))
+            self.last_sweep = now
+        if evicted:
+            print(f"♻️ 다운로드 캐시 정리: {len(evicted)}개 폴더")
+        return evicted
+
+    def clear(self):
+        """임대 중이 아닌 폴더 모두 삭제, (삭제 수, 건너뛴 수) 반환"""
+        removed = skipped = 0
+        with self._lock:
+            folders = self._folders()
+            self._set_totals_locked(folders)
+            for folder, size, _ in folders:
+                if folder.name in self._leases:
+                    skipped += 1
+                    continue
+                self._remove_locked(folder, size)
+                removed += 1
+        return removed, skipped
+
+    def notify(self):
+        """백그라운드 정리 스레드를 깨워 바로 한 번 정리"""
+        self._wakeup.set()
+
+    def start(self):
+        """백그라운드 정리 스레드 시작 (이미 실행 중이면 무시)"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        def loop():
+            while True:
+                self._wakeup.wait(self.sweep_interval)
+                self._wakeup.clear()
+                try:
+                    self.sweep()
+                except Exception as e:
+                    print(f"⚠️ 다운로드 캐시 정리 실패: {e}")
+
+        self._thread = threading.Thread(target=loop, name="download-cache", daemon=True)
+        self._thread.start()
+        self.notify()
+
+    def stats(self):
+        """캐시 현황 (폴더 수와 용량은 마지막 정리 시점 기준, 아직 훑은 적이 없을 때만 훑음)"""
+        folders = None if self._scanned else self._folders()
+        with self._lock:
+            if folders is not None and not self._scanned:
+                self._set_totals_locked(folders)
+            return {
+                'root': str(self.root),
+                'folders': self.folder_count,
+                'size_bytes': self.size_bytes,
+                'budget_bytes': self.budget_bytes,
+                'max_age_seconds': self.max_age_seconds,
+                'leased': sum(self._leases.values()),
+                'evictions': self.evictions,
+                'evicted_bytes': self.evicted_bytes,
+                'skipped_in_use': self.skipped_in_use,
+                'last_sweep': self.last_sweep,
+            }
+
+
+# 폴더 경로별 다운로드 캐시 (같은 폴더는 같은 인스턴스가 임대를 관리)
+_download_caches = {}
+_download_caches_lock = threading.Lock()
+
+
+def get_download_cache(root=DOWNLOADS_ROOT, **options):
+    """폴더 경로에 해당하는 다운로드 캐시 반환 (처음이면 options로 생성)"""
+    key = os.path.abspath(root)
+    with _download_caches_lock:
+        if key not in _download_caches:
+            _download_caches[key] = DownloadCache(root, **options)
+        return _download_caches[key]
+
+def get_upload_cache(root=UPLOADS_ROOT):
+    """업로드 폴더 캐시 (uploads/{해시} 폴더 단위로 정리)"""
+    return get_download_cache(root, budget_mb=UPLOAD_CACHE_BUDGET_MB, pattern="*")
+
+# 같은 산출물을 여러 작업이 동시에 만들지 않도록 쓰는 경로별 잠금
+_artifact_locks = {}
+_artifact_locks_lock = threading.Lock()
+
+
+def _artifact_lock(path):
+    with _artifact_locks_lock:
+        return _artifact_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+def artifact_record_path(folder, video_id):
+    """영상 폴더의 산출물 기록 파일 경로 ({비디오 ID}.info.json)"""
+    return Path(folder) / f"{video_id}.info.json"
+
+
+def load_artifact_record(folder, video_id):
+    """
+    산출물 기록 읽기 (없거나 깨졌으면 빈 기록)
+
+    기록 내용: metadata(영상 정보), sources(종류별 다운로드 파일 이름),
+    files(파일 이름 → 완성 당시 크기)
+    """
+    try:
+        with open(artifact_record_path(folder, video_id), 'r', encoding='utf-8') as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        record = {}
+    record.setdefault('metadata', None)
+    record.setdefault('sources', {})
+    record.setdefault('files', {})
+    return record
+
+
+def record_artifact(folder, video_id, path, metadata=None, source=None):
+    """완성된 산출물 크기(와 다운로드 파일이면 영상 정보)를 기록 파일에 추가"""
+    record_path = artifact_record_path(folder, video_id)
+    with _artifact_lock(record_path):
+        record = load_artifact_record(folder, video_id)
+        name = Path(path).name
+        record['files'][name] = _file_size(path)
+        if metadata is not None:
+            record['metadata'] = metadata
+        if source is not None:
+            record['sources'][source] = name
+        try:
+            tmp_path = record_path.with_suffix(f".{threading.get_ident()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(record, f, ensure_ascii=False)
+            os.replace(tmp_path, record_path)
+        except OSError as e:
+            print(f"⚠️ 산출물 기록 실패: {e}")
+
+
+def valid_artifact(record, path):
+    """기록된 크기와 같은 완성본이 있으면 True (중간에 끊긴 파일이나 바뀐 파일은 False)"""
+    if not path:
+        return False
+    size = _file_size(path)
+    return bool(size) and record['files'].get(Path(path).name) == size
+
+
+class JobManifest:
+    """
+    작업 체크포인트 기록 (영상 폴더의 {비디오 ID}_{모델}.manifest.json)
+
+    완료한 단계와 그 산출물, 긴 음성의 구간별 변환 결과를 남겨 두었다가
+    다시 실행할 때(resume=True) 마지막 체크포인트부터 이어 갑니다.
+    key(비디오 ID, 모델, 디코딩 옵션, 코드 버전)가 다른 기록은 무시합니다.
+    """
+
+    def __init__(self, path, key, resume=False):
+        self.path = Path(path)
+        self.key = key
+        self._lock = threading.Lock()
+        data = self._load() if resume else None
+        if not data or data.get('key') != key:
+            data = {'key': key, 'stages': {}, 'chunks': None, 'chunk_results': {}}
+        self.data = data
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_locked(self):
+        try:
+            tmp_path = self.path.with_suffix(f".{threading.get_ident()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ 체크포인트 저장 실패: {e}")
+
+    def stage(self, name):
+        """완료한 단계의 기록 (없으면 None)"""
+        with self._lock:
+            return self.data['stages'].get(name)
+
+    def complete_stage(self, name, **outputs):
+        """단계 완료와 산출물 기록"""
+        with self._lock:
+            self.data['stages'][name] = dict(outputs, completed_at=time.time())
+            self._save_locked()
+
+    def chunk_results_for(self, chunks):
+        """같은 구간 분할로 끝낸 구간 결과 {번호: 결과} (분할이 달라졌으면 비우고 새로 시작)"""
+        with self._lock:
+            if self.data['chunks'] != chunks:
+                self.data['chunks'] = chunks
+                self.data['chunk_results'] = {}
+                self._save_locked()
+            return {int(index): chunk_result for index, chunk_result in self.data['chunk_results'].items()}
+
+    def complete_chunk(self, index, chunk_result):
+        """구간 하나의 변환 결과 기록"""
+        with self._lock:
+            self.data['chunk_results'][str(index)] = chunk_result
+            self._save_locked()
+
+
+def _first_existing(paths):
+    return next((p for p in paths if p and Path(p).exists()), None)
+
+def _result_from_cache(entry, audio_only):
+    """캐시 항목을 결과 딕셔너리로 변환 (필요한 산출물이 없으면 None)"""
+    artifacts = entry.get('artifacts', {})
+    video_file = _first_existing(artifacts.get('video', []))
+    if not audio_only and not video_file:
+        return None
+    result = _new_result()
+    result.update({
+        'video_file': None if audio_only else video_file,
+        'audio_file': _first_existing(artifacts.get('audio', [])),
+        'text_file': _first_existing(artifacts.get('text', [])),
+        'text_content': entry.get('text_content'),
+        'segments': entry.get('segments', []),
+        'metadata': entry.get('metadata'),
+        'cache_hit': True,
+        'success': True,
+    })
+    if result['text_file']:
+        base = Path(result['text_file']).with_suffix('')
+        result['subtitle_files'] = {ext: f"{base}.{ext}" for ext in TRANSCRIPT_SIDECARS
+                                    if os.path.exists(f"{base}.{ext}")}
+    return result
+
+def _cache_entry_from_result(result):
+    """결과 딕셔너리에서 캐시 항목 생성"""
+    archived = result['archived_files']
+
+    def _paths(current, suffix):
+        return [current] + [p for p in archived if Path(p).suffix == suffix] if current else []
+
+    return {
+        'text_content': result['text_content'],
+        'segments': result['segments'],
+        'metadata': result['metadata'],
+        'artifacts': {
+            'video': _paths(result['video_file'], Path(result['video_file'] or '').suffix),
+            'audio': _paths(result['audio_file'], '.mp3'),
+            'text': _paths(result['text_file'], '.txt'),
+        },
+        'created_at': time.time(),
+    }
+
+def _new_result():
+    """처리 결과 딕셔너리 초기값"""
+    return {
+        'video_file': None,
+        'audio_file': None, 
+        'text_file': None,
+        'text_content': None,
+        'segments': [],
+        'language': None,
+        'subtitle_files': {},  # 자막/세그먼트 파일 경로 {'srt', 'vtt', 'json'}
+        'archived_files': [],
+        'metadata': None,
+        'timings': {},   # 단계별 소요 시간(초), 세부 단계 metadata/model_load/save/archive 포함
+        'reused': [],    # 이전 실행의 완성본을 재사용해 건너뛴 단계
+        'model_selection': None,  # model_size="auto"일 때 고른 모델과 근거 (예상 시간, 실시간 배율 등)
+        'metrics': {},   # 전송 바이트, 음성 길이, 실시간 배율, 모델 캐시 적중 등
+        'cache_hit': False,
+        'success': False,
+        'error': None
+    }
+
+def _create_job(url, output_path="downloads", model_size="base", save_to_archive=False,
+                model_registry=None, direct_pcm=True, audio_only=False,
+                decode_options=None, use_cache=True, refresh_cache=False,
+                transcript_cache=None, long_audio_workers=None, archive_policy="link",
+                catalog=None, progress_callback=None, resume=False, segment_callback=None,
+                latency_budget=None, asr_backend=None, batch_transcriber=None, speed_profile=None,
+                allow_empty_text=False):
+    """변환 작업 상태 생성 (각 단계 함수가 이 딕셔너리를 채워 나감, url은 로컬 미디어 경로도 가능)"""
+    local_path = os.path.abspath(url) if is_local_media(url) else None
+    if local_path and Path(local_path).suffix.lower() in LOCAL_AUDIO_EXTENSIONS:
+        audio_only = True  # 음성 파일에는 영상이 없음
+    return {
+        'url': url,
+        'output_path': output_path,
+        'model_size': model_size,  # "auto"면 영상 길이를 안 뒤 실제 모델로 바뀜
+        'latency_budget': latency_budget or AUTO_MODEL_LATENCY_BUDGET_SECONDS,
+        'speed_profile': speed_profile or default_model_speed,
+        'allow_empty_text': allow_empty_text,
+        'asr_backend': asr_backend or DEFAULT_ASR_BACKEND,
+        'save_to_archive': save_to_archive,
+        'archive_policy': archive_policy,
+        'catalog': catalog,
+        'model_registry': model_registry,
+        'direct_pcm': direct_pcm,
+        'audio_only': audio_only,
+        'decode_options': decode_options,
+        'use_cache': use_cache,
+        'refresh_cache': refresh_cache,
+        'cache': transcript_cache or default_transcript_cache,
+        'cache_options': dict(decode_options or {}, direct_pcm=direct_pcm),
+        'download_cache': get_download_cache(output_path),
+        'leased_id': None,
+        'upload_lease': None,  # 업로드 파일이면 작업이 끝날 때까지 임대한 uploads 경로
+        'resume': resume and not refresh_cache,
+        'manifest': None,
+        'long_audio_workers': long_audio_workers,
+        'batch_transcriber': batch_transcriber,
+        'progress_callback': progress_callback,
+        'segment_callback': segment_callback,
+        'first_text_at': None,
+        'transcript_path': None,  # 변환 단계의 TranscriptWriter가 완성한 텍스트 파일
+        'video_id': local_media_id(local_path) if local_path else extract_video_id(url),
+        'local_path': local_path,
+        'source_file': None,
+        'pcm': None,
+        'audio_future': None,
+        'bytes_downloaded': 0,
+        'audio_duration': None,
+        'model_info': {},
+        'created_at': time.time(),
+        'result': _new_result(),
+    }
+
+# 전체 진행률 계산용 단계별 비중
+STAGE_PROGRESS_WEIGHTS = (
+    ("download", 0.30),
+    ("extract", 0.10),
+    ("transcribe", 0.55),
+    ("persist", 0.05),
+)
+
+def _stage_progress(job, stage):
+    """단계 진행 이벤트에 전체 진행률(overall)을 붙여 작업 콜백으로 전달하는 함수"""
+    if job['progress_callback'] is None:
+        return None
+    
+    weights = dict(STAGE_PROGRESS_WEIGHTS)
+    done = 0.0
+    for name, weight in STAGE_PROGRESS_WEIGHTS:
+        if name == stage:
+            break
+        done += weight
+    
+    def callback(event):
+        progress = event.get('progress') or 0.0
+        event = dict(event, overall=round(done + weights.get(stage, 0.0) * progress, 4))
+        _emit(job['progress_callback'], event)
+    
+    return callback
+
+def _stage_lookup_cache(job):
+    """0. 캐시 조회 (비디오 ID를 URL에서 알 수 있을 때만), 적중하면 True"""
+    if job['model_size'] == "auto":
+        # 받아 둔 영상 정보나 로컬 파일로 길이를 이미 알면 모델(캐시 키)을 지금 정함
+        duration = _known_duration(job)
+        if duration:
+            _resolve_auto_model(job, duration)
+    cache = job['cache']
+    if not job['use_cache'] or job['refresh_cache']:
+        cache.record_bypass()
+        return False
+    if not job['video_id'] or job['model_size'] == "auto":
+        # 길이를 모르는 자동 선택은 다운로드한 뒤에야 모델(캐시 키)이 정해짐
+        return False
+    
+    # 캐시 항목을 확인하는 사이에 폴더가 정리되지 않도록 먼저 임대 (작업이 끝나면 해제)
+    _lease_download_folder(job, job['video_id'])
+    entry = cache.get(cache.make_key(job['video_id'], _job_model_tag(job), job['cache_options']))
+    cached_result = _result_from_cache(entry, job['audio_only']) if entry else None
+    if not cached_result:
+        return False
+    
+    print(f"⚡ 캐시 적중: {job['video_id']}")
+    cached_result['model_selection'] = job['result']['model_selection']
+    job['result'] = cached_result
+    return True
+
+def _lease_download_folder(job, video_id):
+    """작업이 끝날 때까지 다운로드 폴더가 캐시 정리로 지워지지 않도록 임대"""
+    if video_id and not job['leased_id']:
+        job['download_cache'].acquire(video_id)
+        job['leased_id'] = video_id
+
+def _job_model_tag(job):
+    """작업의 모델 이름 (엔진 구분 포함, 산출물 파일/캐시 키/지표용)"""
+    return model_tag(job['model_size'], job['asr_backend'])
+
+def _job_folder(job):
+    """작업 산출물 폴더 (downloads/video_{비디오 ID}, 로컬 파일도 원본 옆이 아니라 여기에 씀)"""
+    return job['download_cache'].folder_for(job['video_id'])
+
+def _job_manifest(job):
+    """작업 체크포인트 (비디오 ID와 다운로드 폴더를 알게 된 뒤부터 사용 가능, 아니면 None)"""
+    if job['manifest'] is None and job['video_id'] and job['source_file']:
+        folder = _job_folder(job)
+        key = job['cache'].make_key(job['video_id'], _job_model_tag(job), job['cache_options'])
+        job['manifest'] = JobManifest(folder / f"{job['video_id']}_{_job_model_tag(job)}.manifest.json",
+                                      key, resume=job['resume'])
+    return job['manifest']
+
+def _checkpointed_transcript(job):
+    """이어서 실행할 때 체크포인트에 남은 변환 결과 (없으면 None)"""
+    manifest = _job_manifest(job) if job['resume'] else None
+    return manifest.stage("transcribe") if manifest else None
+
+def _stage_outputs(job, name):
+    """체크포인트에 남길 단계별 산출물"""
+    result = job['result']
+    if name == "download":
+        return {'source_file': job['source_file'], 'metadata': result['metadata']}
+    if name == "extract":
+        return {'audio_file': result['audio_file']}
+    if name == "transcribe":
+        return {'text': result['text_content'], 'segments': result['segments'],
+                'language': result['language'], 'audio_duration': job['audio_duration']}
+    return {'audio_file': result['audio_file'], 'text_file': result['text_file'],
+            'archived_files': result['archived_files']}
+
+def _reusable_source(job, folder, record):
+    """재사용할 수 있는 다운로드 파일 (음성 전용 작업은 받아 둔 영상이나 MP3도 사용)"""
+    kinds = ('audio', 'video') if job['audio_only'] else ('video',)
+    for kind in kinds:
+        name = record['sources'].get(kind)
+        if name and valid_artifact(record, folder / name):
+            return folder / name
+    mp3_path = folder / f"{job['video_id']}.mp3"
+    if job['audio_only'] and valid_artifact(record, mp3_path):
+        return mp3_path
+    return None
+
+def _set_source(job, source_file, metadata, downloaded=True):
+    """다운로드(또는 재사용) 결과를 작업에 반영"""
+    result = job['result']
+    job['source_file'] = source_file
+    job['bytes_downloaded'] = (_file_size(source_file) or 0) if downloaded else 0
+    job['video_id'] = metadata.get('id') or job['video_id']
+    _lease_download_folder(job, job['video_id'])
+    result['metadata'] = metadata
+    if not job['audio_only']:
+        result['video_file'] = source_file
+    if job['model_size'] == "auto":
+        _resolve_auto_model(job, metadata.get('duration'))
+
+def _known_duration(job):
+    """다운로드 전에 알 수 있는 길이 (로컬 파일이나 받아 둔 영상 정보, 모르면 None)"""
+    if job['local_path']:
+        return probe_media_duration(job['local_path'])
+    if job['video_id']:
+        record = load_artifact_record(job['download_cache'].folder_for(job['video_id']), job['video_id'])
+        return (record['metadata'] or {}).get('duration')
+    return None
+
+def _resolve_auto_model(job, duration):
+    """영상 길이와 남은 지연 예산(예산 - 지금까지 걸린 시간)으로 모델 선택"""
+    result = job['result']
+    remaining = max(0.0, job['latency_budget'] - (time.time() - job['created_at']))
+    selection = select_model(duration, remaining, job['speed_profile'], backend=job['asr_backend'])
+    selection.update(requested="auto", latency_budget=job['latency_budget'],
+                     remaining_budget=round(remaining, 1))
+    job['model_size'] = selection['model']
+    result['model_selection'] = selection
+    estimate = f"예상 {selection['estimated_seconds']}초" if selection['estimated_seconds'] is not None else "길이 모름"
+    print(f"🤖 자동 모델 선택: {selection['model']} ({estimate}, 남은 예산 {selection['remaining_budget']}초)")
+    if selection['meets_budget'] is False:
+        print("⚠️ 예산 안에 끝날 모델이 없어 가장 빠른 모델로 변환합니다")
+
+def _use_local_source(job):
+    """로컬 파일은 다운로드 없이 원본을 그대로 입력으로 사용 (산출물 폴더만 만들고 길이 조회)"""
+    local_path = job['local_path']
+    _lease_download_folder(job, job['video_id'])
+    if get_upload_cache().acquire_path(local_path):
+        job['upload_lease'] = local_path
+    _job_folder(job).mkdir(parents=True, exist_ok=True)
+    metadata = {
+        'id': job['video_id'],
+        'title': Path(local_path).stem,
+        'duration': probe_media_duration(local_path),
+        'filesize': _file_size(local_path),
+        'source_path': local_path,
+    }
+    _set_source(job, local_path, metadata, downloaded=False)
+    return True
+
+def _stage_download(job):
+    """1. 영상 다운로드 (audio_only면 음성 스트림만, 받아 둔 완성본이 있으면 재사용, 로컬 파일은 건너뜀)"""
+    if job['local_path']:
+        return _use_local_source(job)
+    result = job['result']
+    video_id = job['video_id']
+    _lease_download_folder(job, video_id)
+    
+    folder = Path(job['output_path']) / f"video_{video_id}" if video_id else None
+    # 같은 영상을 여러 작업이 동시에 받지 않도록 잠그고, 먼저 받은 작업의 파일을 재사용
+    with _artifact_lock(folder / "download") if folder else nullcontext():
+        if folder and not job['refresh_cache']:
+            record = load_artifact_record(folder, video_id)
+            source = _reusable_source(job, folder, record)
+            if source and record['metadata']:
+                print(f"♻️ 다운로드 재사용: {source.name}")
+                _set_source(job, str(source), record['metadata'], downloaded=False)
+                result['reused'].append("download")
+                return True
+        
+        source_file, metadata = download_youtube_video(job['url'], job['output_path'],
+                                                       audio_only=job['audio_only'], return_info=True,
+                                                       progress_callback=_stage_progress(job, "download"),
+                                                       timings=result['timings'])
+        if not source_file:
+            result['error'] = "영상 다운로드 실패"
+            return False
+        record_artifact(Path(source_file).parent, metadata.get('id') or video_id, source_file,
+                        metadata=metadata, source='audio' if job['audio_only'] else 'video')
+    
+    _set_source(job, source_file, metadata)
+    return True
+
+def _ensure_mp3(job, audio_path, progress_callback=None, duration=None):
+    """MP3 추출 (같은 영상에서 뽑아 둔 완성된 MP3가 있으면 재사용)"""
+    with _artifact_lock(audio_path):
+        record = load_artifact_record(audio_path.parent, job['video_id'])
+        if not job['refresh_cache'] and valid_artifact(record, audio_path):
+            job['result']['reused'].append("extract")
+            return str(audio_path)
+        audio_file = extract_audio_to_mp3(job['source_file'], audio_path,
+                                          progress_callback=progress_callback, duration=duration)
+        if audio_file:
+            record_artifact(audio_path.parent, job['video_id'], audio_file)
+        return audio_file
+
+def _stage_extract(job):
+    """2. 음성 추출"""
+    result = job['result']
+    progress = _stage_progress(job, "extract")
+    duration = (result['metadata'] or {}).get('duration')
+    audio_path = _job_folder(job) / f"{job['video_id']}.mp3"
+    if job['direct_pcm'] and _checkpointed_transcript(job):
+        # 변환 결과가 체크포인트에 있으면 PCM은 필요 없고 MP3만 준비
+        job['audio_future'] = _background_executor.submit(_ensure_mp3, job, audio_path)
+        return True
+    if job['direct_pcm']:
+        # MP3는 다운로드용으로 백그라운드에서 만들고, Whisper에는 PCM을 바로 전달
+        job['audio_future'] = _background_executor.submit(_ensure_mp3, job, audio_path)
+        job['pcm'] = decode_audio_to_pcm(job['source_file'], progress_callback=progress, duration=duration)
+        if job['pcm'] is None:
+            result['error'] = "음성 추출 실패"
+            return False
+        return True
+    
+    audio_file = _ensure_mp3(job, audio_path, progress, duration)
+    if not audio_file:
+        result['error'] = "음성 추출 실패"
+        return False
+    result['audio_file'] = audio_file
+    return True
+
+def _segment_sink(job, writer):
+    """세그먼트를 파일에 이어 쓰고 첫 텍스트 시각을 기록한 뒤 작업 콜백으로 넘기는 함수"""
+    def on_segment(segment):
+        if job['first_text_at'] is None:
+            job['first_text_at'] = time.time()
+        writer.add(segment)
+        _emit(job['segment_callback'], segment)
+    return on_segment
+
+def _stage_transcribe(job):
+    """3. 텍스트 변환 (긴 음성은 분할 병렬 변환, 이어서 실행하면 체크포인트의 결과 사용)"""
+    result = job['result']
+    # 세그먼트가 나오는 대로 {비디오 ID}_{모델}.txt/.srt/.vtt/.json에 이어 씀
+    writer = TranscriptWriter(_job_folder(job) / f"{job['video_id']}_{_job_model_tag(job)}")
+    result['subtitle_files'] = writer.sidecar_files()
+    job['transcript_path'] = writer.paths['txt']
+    on_segment = _segment_sink(job, writer)
+    
+    try:
+        saved = _checkpointed_transcript(job)
+        if saved:
+            print(f"⏩ 체크포인트에서 변환 결과 복원: {job['video_id']}")
+            for segment in saved['segments']:
+                on_segment(segment)
+    except Exception:
+        writer.close(complete=False)
+        raise
+    if saved:
+        writer.close(language=saved.get('language'))
+        result['text_content'] = saved['text']
+        result['segments'] = saved['segments']
+        result['language'] = saved.get('language')
+        job['audio_duration'] = saved.get('audio_duration')
+        job['pcm'] = None
+        result['reused'].append("transcribe")
+        return True
+    
+    audio_input = job['pcm'] if job['direct_pcm'] else result['audio_file']
+    progress = _stage_progress(job, "transcribe")
+    
+    workers = job['long_audio_workers'] or default_long_audio_workers()
+    duration = (result['metadata'] or {}).get('duration') or 0
+    if job['pcm'] is not None:
+        duration = len(job['pcm']) / WHISPER_SAMPLE_RATE
+    job['audio_duration'] = duration or None
+    batcher = job['batch_transcriber']
+    transcript = None
+    try:
+        if workers > 1 and duration >= LONG_AUDIO_THRESHOLD_SECONDS:
+            pcm = audio_input if job['direct_pcm'] else decode_audio_to_pcm(audio_input)
+            long_options = {'progress_callback': progress, 'checkpoint': _job_manifest(job),
+                            'segment_callback': on_segment, 'backend': job['asr_backend'],
+                            'model_registry': job['model_registry']}
+            if pcm is not None and batcher is not None:
+                # 따로 변환하는 작업의 동시 실행 수를 batch_transcriber 실행기 크기로 제한
+                transcript = batcher.run(transcribe_long_audio, pcm, job['model_size'], workers,
+                                         job['decode_options'], **long_options).result()
+            elif pcm is not None:
+                transcript = transcribe_long_audio(pcm, job['model_size'], workers, job['decode_options'],
+                                                   **long_options)
+        elif batcher is not None:
+            # 짧은 클립은 다른 작업의 클립과 묶어서 한 번에 디코딩
+            transcript = batcher.transcribe(audio_input, job['model_size'], job['decode_options'],
+                                            progress_callback=progress, segment_callback=on_segment,
+                                            backend=job['asr_backend'])
+        else:
+            transcript = transcribe_audio(audio_input, job['model_size'], job['model_registry'],
+                                          job['decode_options'], progress_callback=progress,
+                                          segment_callback=on_segment, backend=job['asr_backend'])
+    finally:
+        writer.close(complete=bool(transcript and (transcript['text'] or job['allow_empty_text'])),
+                     language=transcript.get('language') if transcript else None)
+    
+    job['pcm'] = None  # 큐에 쌓인 작업이 PCM 메모리를 오래 잡지 않도록 해제
+    if not transcript or not (transcript['text'] or job['allow_empty_text']):
+        result['error'] = "텍스트 변환 실패"
+        return False
+    job['model_info'] = {
+        'model_cache_hit': transcript.get('model_cache_hit'),
+        'model_load_seconds': transcript.get('model_load_seconds'),
+        'batch_size': transcript.get('batch_size'),
+        'decode_seconds': transcript.get('decode_seconds'),
+    }
+    if transcript.get('model_load_seconds') is not None:
+        result['timings']['model_load'] = transcript['model_load_seconds']
+    result['text_content'] = transcript['text']
+    result['segments'] = transcript['segments']
+    result['language'] = transcript.get('language')
+    return True
+
+def _stage_persist(job):
+    """4~6. MP3 완료 대기, 텍스트 파일 확인, 보관소 복사, 캐시 저장"""
+    result = job['result']
+    if job['audio_future'] is not None:
+        result['audio_file'] = job['audio_future'].result()
+    if not result['audio_file']:
+        result['error'] = "음성 추출 실패"
+        return False
+    
+    # 4. 텍스트 파일 (변환하면서 TranscriptWriter가 완성한 {비디오 ID}_{모델}.txt를 그대로 씀)
+    if not job['transcript_path'] or not os.path.exists(job['transcript_path']):
+        result['error'] = "텍스트 파일 저장 실패"
+        return False
+    result['text_file'] = job['transcript_path']
+    
+    # 5. 영구 보관소에 파일 복사 (선택적)
+    if job['save_to_archive']:
+        started = time.perf_counter()
+        result['archived_files'] = _archive_job_files(job)
+        result['timings']['archive'] = round(time.perf_counter() - started, 3)
+    
+    # 6. 변환 결과 캐시에 저장
+    if job['use_cache'] and job['video_id']:
+        cache = job['cache']
+        cache.put(cache.make_key(job['video_id'], _job_model_tag(job), job['cache_options']),
+                  _cache_entry_from_result(result))
+    
+    result['success'] = True
+    return True
+
+# Linux FICLONE ioctl 번호 (btrfs, XFS 등에서 블록을 공유하는 복사)
+_FICLONE = 0x40049409
+
+def _try_reflink(src, dest):
+    """리플링크(copy-on-write 복제) 시도, 지원하지 않는 파일시스템이면 False"""
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    
+    created = False
+    try:
+        with open(src, 'rb') as src_file, open(dest, 'xb') as dest_file:
+            created = True
+            fcntl.ioctl(dest_file.fileno(), _FICLONE, src_file.fileno())
+    except OSError:
+        # 이 호출이 만든 빈 파일만 지움 (이미 있던 dest는 다른 작업이 보관한 파일일 수 있음)
+        if created:
+            try:
+                os.remove(dest)
+            except OSError:
+                pass
+        return False
+    
+    shutil.copystat(src, dest)
+    return True
+
+def archive_file(src, dest, policy="link"):
+    """
+    파일을 보관소로 옮기거나 복제하고 사용한 방법을 반환
+
+    - link: 리플링크 → 하드링크 → 복사 순으로 시도 (같은 파일시스템이면 데이터 복사 없음)
+    - move: 이름 변경 (다른 파일시스템이면 복사 후 삭제)
+    - copy: 항상 복사
+    """
+    if policy not in ARCHIVE_POLICIES:
+        raise ValueError(f"알 수 없는 보관 정책: {policy}")
+    
+    if policy == "move":
+        try:
+            os.rename(src, dest)
+            return "rename"
+        except OSError:
+            shutil.move(src, dest)
+            return "move"
+    
+    if policy == "link":
+        if _try_reflink(src, dest):
+            return "reflink"
+        try:
+            os.link(src, dest)
+            return "hardlink"
+        except OSError:
+            pass
+    
+    shutil.copy2(src, dest)
+    return "copy"
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path) if path else None
+    except OSError:
+        return None
+
+class ArchiveCatalog:
+    """
+    영구 보관함 카탈로그 (SQLite)
+
+    보관할 때마다 실행 기록(비디오 ID, 실행 시각, 모델, 길이, 파일 크기와 경로)을
+    남겨 보관함 화면이 폴더를 훑지 않고 페이지 단위로 조회할 수 있게 합니다.
+    실행은 (비디오 ID, 소수점 이하까지의 실행 시각, 모델)로 구분합니다.
+    SQLite에 FTS5가 없으면 검색만 끄고(fts_enabled=False) 나머지 기능은 그대로 씁니다.
+    """
+
+    # 정렬에 허용하는 컬럼 (SQL에 직접 넣으므로 목록으로 제한)
+    RUN_SORT_COLUMNS = ("run_timestamp", "video_id", "model_size", "duration", "total_size", "title")
+    VIDEO_SORT_COLUMNS = ("last_run", "video_id", "runs", "duration", "total_size", "title")
+
+    def __init__(self, db_path=CATALOG_DB_PATH):
+        self.db_path = str(db_path)
+        self._lock = threading.Lock()
+        self._initialized = False
+        self.fts_enabled = True
+
+    def _connect(self):
+        """연결 열기 (호출하는 쪽에서 closing으로 닫고, 연결 자체를 with로 써서 커밋)"""
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    try:
+                        self._create_schema(conn)
+                    except Exception:
+                        conn.close()
+                        raise
+                    self._initialized = True
+        return conn
+
+    def _create_schema(self, conn):
+        conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS archive_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                video_id TEXT NOT NULL,
+                run_timestamp REAL NOT NULL,
+                model_size TEXT,
+                title TEXT,
+                duration REAL,
+                video_path TEXT,
+                audio_path TEXT,
+                text_path TEXT,
+                video_size INTEGER,
+                audio_size INTEGER,
+                text_size INTEGER,
+                total_size INTEGER,
+                recorded_at REAL,
+                UNIQUE (video_id, run_timestamp, model_size)
+            );
+            CREATE INDEX IF NOT EXISTS idx_archive_runs_video ON archive_runs (video_id);
+            CREATE INDEX IF NOT EXISTS idx_archive_runs_time ON archive_runs (run_timestamp);
+            CREATE TABLE IF NOT EXISTS transcript_segments (
+                id INTEGER PRIMARY KEY,
+                video_id TEXT NOT NULL,
+                run_timestamp REAL NOT NULL,
+                start_time REAL,
+                end_time REAL,
+                text_path TEXT,
+                text TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_transcript_segments_run
+                ON transcript_segments (video_id, run_timestamp);
+        """)
+        try:
+            conn.executescript("""
+            -- 세그먼트 테이블을 원본으로 하는 전문 검색 색인 (트리거로 동기화)
+            CREATE VIRTUAL TABLE IF NOT EXISTS transcript_fts USING fts5(
+                text,
+                content = 'transcript_segments',
+                content_rowid = 'id',
+                tokenize = 'unicode61 remove_diacritics 2'
+            );
+            CREATE TRIGGER IF NOT EXISTS transcript_segments_ai AFTER INSERT ON transcript_segments BEGIN
+                INSERT INTO transcript_fts (rowid, text) VALUES (new.id, new.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS transcript_segments_ad AFTER DELETE ON transcript_segments BEGIN
+                INSERT INTO transcript_fts (transcript_fts, rowid, text) VALUES ('delete', old.id, old.text);
+            END;
+            """)
+        except sqlite3.OperationalError as e:
+            # FTS5 없이 빌드된 SQLite: 검색만 끄고, 색인 트리거가 다른 쓰기를 막지 않도록 제거
+            print(f"⚠️ 전문 검색을 사용할 수 없습니다 (SQLite FTS5 없음): {e}")
+            self.fts_enabled = False
+            conn.executescript("""
+                DROP TRIGGER IF EXISTS transcript_segments_ai;
+                DROP TRIGGER IF EXISTS transcript_segments_ad;
+            """)
+
+    def record_run(self, video_id, run_timestamp, model_size=None, title=None, duration=None,
+                   video_path=None, audio_path=None, text_path=None):
+        """보관 실행 기록 추가 (같은 비디오 ID, 실행 시각, 모델이면 덮어씀)"""
+        sizes = [_file_size(p) for p in (video_path, audio_path, text_path)]
+        with closing(self._connect()) as conn, conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO archive_runs (
+                    video_id, run_timestamp, model_size, title, duration,
+                    video_path, audio_path, text_path,
+                    video_size, audio_size, text_size, total_size, recorded_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (video_id, float(run_timestamp), model_size, title, duration,
+                  video_path, audio_path, text_path,
+                  *sizes, sum(size or 0 for size in sizes), time.time()))
+
+    def list_runs(self, limit=20, offset=0, order_by="run_timestamp", descending=True, video_id=None):
+        """실행 기록 페이지 조회"""
+        if order_by not in self.RUN_SORT_COLUMNS:
+            raise ValueError(f"정렬할 수 없는 컬럼: {order_by}")
+        where, params = ("WHERE video_id = ?", [video_id]) if video_id else ("", [])
+        with closing(self._connect()) as conn, conn:
+            rows = conn.execute(
+                f"SELECT * FROM archive_runs {where} "
+                f"ORDER BY {order_by} {'DESC' if descending else 'ASC'}, id DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count_runs(self):
+        with closing(self._connect()) as conn, conn:
+            return conn.execute("SELECT COUNT(*) FROM archive_runs").fetchone()[0]
+
+    def list_videos(self, limit=20, offset=0, order_by="last_run", descending=True):
+        """비디오별 요약(실행 횟수, 최근 실행, 총 크기) 페이지 조회"""
+        if order_by not in self.VIDEO_SORT_COLUMNS:
+            raise ValueError(f"정렬할 수 없는 컬럼: {order_by}")
+        with closing(self._connect()) as conn, conn:
+            rows = conn.execute(f"""
+                SELECT video_id, MAX(title) AS title, COUNT(*) AS runs,
+                       MAX(run_timestamp) AS last_run, MAX(duration) AS duration,
+                       SUM(total_size) AS total_size,
+                       GROUP_CONCAT(DISTINCT model_size) AS models
+                FROM archive_runs GROUP BY video_id
+                ORDER BY {order_by} {'DESC' if descending else 'ASC'}, video_id
+                LIMIT ? OFFSET ?
+            """, (limit, offset)).fetchall()
+        return [dict(row) for row in rows]
+
+    def count_videos(self):
+        with closing(self._connect()) as conn, conn:
+            return conn.execute("SELECT COUNT(DISTINCT video_id) FROM archive_runs").fetchone()[0]
+
+    def delete_video(self, video_id):
+        """비디오의 모든 실행 기록과 검색 색인 삭제"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM archive_runs WHERE video_id = ?", (video_id,))
+            conn.execute("DELETE FROM transcript_segments WHERE video_id = ?", (video_id,))
+
+    def clear(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM archive_runs")
+            conn.execute("DELETE FROM transcript_segments")
+
+    def index_transcript(self, video_id, run_timestamp, segments=None, text=None, text_path=None):
+        """
+        변환 결과를 전문 검색 색인에 추가 (같은 실행이나 같은 텍스트 파일의 기존 색인은 교체)
+
+        세그먼트가 없으면 전체 텍스트를 시각 정보 없는 세그먼트 하나로 색인합니다.
+        """
+        if not segments:
+            segments = [{'start': None, 'end': None, 'text': text}] if text else []
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM transcript_segments WHERE video_id = ? AND run_timestamp = ?",
+                         (video_id, float(run_timestamp)))
+            if text_path:
+                conn.execute("DELETE FROM transcript_segments WHERE video_id = ? AND text_path = ?",
+                             (video_id, text_path))
+            conn.executemany(
+                "INSERT INTO transcript_segments (text, video_id, run_timestamp, start_time, end_time, text_path) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(seg['text'].strip(), video_id, float(run_timestamp), seg['start'], seg['end'], text_path)
+                 for seg in segments if seg.get('text', '').strip()]
+            )
+
+    def _search_ready(self):
+        """전문 검색 가능 여부 (스키마를 처음 만들 때 FTS5 지원을 확인)"""
+        if not self._initialized:
+            self._connect().close()
+        return self.fts_enabled
+
+    @staticmethod
+    def _match_query(query):
+        """사용자 검색어를 FTS5 질의로 변환 (각 단어를 접두어 일치로 AND 결합)"""
+        terms = [term.replace('"', '') for term in query.split()]
+        return " ".join(f'"{term}"*' for term in terms if term)
+
+    def search(self, query, limit=20, offset=0):
+        """
+        보관된 변환 결과 검색 (BM25 순위, 페이지 단위)
+
+        반환값: video_id, run_timestamp, start_time, end_time, snippet, text_path를 담은 딕셔너리 목록
+        """
+        match = self._match_query(query)
+        if not match or not self._search_ready():
+            return []
+        with closing(self._connect()) as conn, conn:
+            rows = conn.execute("""
+                SELECT s.video_id, s.run_timestamp, s.start_time, s.end_time, s.text_path,
+                       snippet(transcript_fts, 0, '[', ']', '…', 16) AS snippet,
+                       bm25(transcript_fts) AS score
+                FROM transcript_fts
+                JOIN transcript_segments AS s ON s.id = transcript_fts.rowid
+                WHERE transcript_fts MATCH ?
+                ORDER BY score
+                LIMIT ? OFFSET ?
+            """, (match, limit, offset)).fetchall()
+        return [dict(row) for row in rows]
+
+    def count_search(self, query):
+        """검색 결과 수"""
+        match = self._match_query(query)
+        if not match or not self._search_ready():
+            return 0
+        with closing(self._connect()) as conn, conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM transcript_fts WHERE transcript_fts MATCH ?", (match,)
+            ).fetchone()[0]
+
+    @staticmethod
+    def _group_archived_runs(folder, video_id):
+        """
+        보관 폴더의 파일을 실행 단위로 묶어 {실행 시각: {'model', 확장자: 경로}} 반환
+
+        예전 이름({타임스탬프}_{비디오 ID}.확장자)은 타임스탬프로 묶고, 지금 이름
+        ({비디오 ID}.확장자, {비디오 ID}_{모델}.txt)은 텍스트
+        파일마다 실행 하나로 보고 공유하는 영상/음성을 붙입니다 (실행 시각은 파일 수정 시각).
+        """
+        runs, shared, texts = {}, {}, []
+        for file_path in folder.iterdir():
+            stem, suffix = file_path.stem, file_path.suffix.lower()
+            if suffix in (".json", ".tmp") or not file_path.is_file():
+                continue
+            prefix = stem[:-len(video_id) - 1]
+            if stem.endswith("_" + video_id) and prefix.isdigit():
+                runs.setdefault(int(prefix), {'model': None})[suffix] = str(file_path)
+            elif stem == video_id:
+                shared[suffix] = str(file_path)
+            elif stem.startswith(video_id + "_") and suffix == ".txt":
+                texts.append((file_path, stem[len(video_id) + 1:]))
+        
+        for text_path, model in texts:
+            run_timestamp = int(text_path.stat().st_mtime)
+            while run_timestamp in runs:
+                run_timestamp += 1
+            runs[run_timestamp] = dict(shared, model=model, **{".txt": str(text_path)})
+        if shared and not texts:
+            runs[int(max(Path(p).stat().st_mtime for p in shared.values()))] = dict(shared, model=None)
+        return runs
+
+    def rebuild(self, archive_root=ARCHIVE_ROOT):
+        """
+        기존 보관소 폴더를 다시 훑어 카탈로그 재구성
+
+        예전 이름과 지금 이름의 파일을 모두 실행 단위로 묶고(_group_archived_runs),
+        텍스트 파일은 검색 색인에 다시 넣습니다 (세그먼트 시각 없이 전체 텍스트 단위).
+        모델 정보는 지금 이름의 텍스트 파일에서만 알 수 있습니다. 반환값: 기록한 실행 수
+        """
+        self.clear()
+        count = 0
+        for folder in sorted(Path(archive_root).glob("video_*")):
+            if not folder.is_dir():
+                continue
+            video_id = folder.name.replace("video_", "", 1)
+            for run_timestamp, files in self._group_archived_runs(folder, video_id).items():
+                video_path = next((files[ext] for ext in (".mp4", ".webm", ".mkv") if ext in files), None)
+                text_path = files.get(".txt")
+                self.record_run(video_id, run_timestamp, model_size=files['model'], video_path=video_path,
+                                audio_path=files.get(".mp3"), text_path=text_path)
+                if text_path:
+                    with open(text_path, 'r', encoding='utf-8', errors='ignore') as f:
+                        self.index_transcript(video_id, run_timestamp, text=f.read(), text_path=text_path)
+                count += 1
+        return count
+
+_default_archive_catalog = None
+_catalog_lock = threading.Lock()
+
+def get_archive_catalog():
+    """기본 보관함 카탈로그 (처음 사용할 때 생성)"""
+    global _default_archive_catalog
+    with _catalog_lock:
+        if _default_archive_catalog is None:
+            _default_archive_catalog = ArchiveCatalog()
+        return _default_archive_catalog
+
+def _same_archived(src, dest):
+    """보관본이 이미 같은 내용인지 (같은 파일이거나, 텍스트는 내용이, 미디어는 크기가 같으면 True)"""
+    try:
+        if os.path.samefile(src, dest):
+            return True
+        if Path(dest).suffix == '.txt':
+            return filecmp.cmp(src, dest, shallow=False)
+    except OSError:
+        return False
+    return _file_size(src) == _file_size(dest)
+
+def _archive_job_files(job):
+    """영구 보관소(archives)에 산출물 보관 (archive_policy에 따라 링크/이동/복사)"""
+    result = job['result']
+    archive_path = Path(ARCHIVE_ROOT)
+    archive_path.mkdir(exist_ok=True)
+    
+    video_id = job['video_id']
+    
+    # 아카이브 폴더 생성
+    archive_video_path = archive_path / f"video_{video_id}"
+    archive_video_path.mkdir(exist_ok=True)
+    
+    # 파일 보관 (음성 전용 작업은 영상 없음, 로컬 원본은 제자리에 두고 보관하지 않음)
+    # 자막/세그먼트 파일도 텍스트 옆에 보관해 보관소를 가리키는 캐시 적중에서도 찾을 수 있게 함
+    archived_files = []
+    archived_paths = {}
+    targets = [(key, result[key]) for key in ('video_file', 'audio_file', 'text_file')]
+    targets += [(f"subtitle_{ext}", path) for ext, path in (result['subtitle_files'] or {}).items()
+                if os.path.exists(path)]
+    for key, file_path in targets:
+        if not file_path or (key == 'video_file' and job['local_path']):
+            continue
+        dest = archive_video_path / Path(file_path).name
+        policy = job['archive_policy']
+        own_leases = 1 if job['leased_id'] else 0
+        if policy == "move" and job['download_cache'].lease_count(file_path) > own_leases:
+            # 같은 폴더를 임대한 다른 작업이 아직 쓰는 중이면 옮기지 않고 링크
+            policy = "link"
+        if not dest.exists():
+            archive_file(file_path, dest, policy)
+        elif not _same_archived(file_path, dest):
+            # 이름이 같은 이전 보관본(예: 다시 변환한 텍스트)은 새 내용으로 교체
+            tmp_dest = Path(f"{dest}.{threading.get_ident()}.tmp")
+            if tmp_dest.exists():
+                tmp_dest.unlink()
+            archive_file(file_path, tmp_dest, policy)
+            os.replace(tmp_dest, dest)
+        archived_files.append(str(dest))
+        archived_paths[key] = str(dest)
+        if policy == "move":
+            # 이동한 경우 결과 경로도 보관소를 가리키도록 변경
+            if key.startswith("subtitle_"):
+                result['subtitle_files'][key[len("subtitle_"):]] = str(dest)
+            else:
+                result[key] = str(dest)
+    
+    # 카탈로그에 실행 기록 및 검색 색인 갱신
+    run_timestamp = round(job['created_at'], 6)
+    metadata = result['metadata'] or {}
+    catalog = job['catalog'] or get_archive_catalog()
+    try:
+        catalog.record_run(
+            video_id,
+            run_timestamp,
+            model_size=_job_model_tag(job),
+            title=metadata.get('title'),
+            duration=metadata.get('duration'),
+            video_path=archived_paths.get('video_file'),
+            audio_path=archived_paths.get('audio_file'),
+            text_path=archived_paths.get('text_file'),
+        )
+        catalog.index_transcript(video_id, run_timestamp, result['segments'],
+                                 text=result['text_content'], text_path=archived_paths.get('text_file'))
+    except sqlite3.Error as e:
+        print(f"⚠️ 카탈로그 기록 실패: {e}")
+    
+    return archived_files
+
+# 처리 단계 (이름, 함수) 순서
+PIPELINE_STAGES = (
+    ("download", _stage_download),
+    ("extract", _stage_extract),
+    ("transcribe", _stage_transcribe),
+    ("persist", _stage_persist),
+)
+
+def _run_stage(job, name, func):
+    """단계 하나를 실행하고 소요 시간을 기록 (시작/끝에 진행 이벤트 전달)"""
+    progress = _stage_progress(job, name)
+    started = time.perf_counter()
+    try:
+        _emit(progress, {'stage': name, 'progress': 0.0})
+        ok = func(job)
+    except Exception as e:
+        job['result']['error'] = f"처리 중 오류: {str(e)}"
+        ok = False
+    job['result']['timings'][name] = round(time.perf_counter() - started, 3)
+    if ok:
+        try:
+            manifest = _job_manifest(job)
+            if manifest:
+                manifest.complete_stage(name, **_stage_outputs(job, name))
+            _emit(progress, {'stage': name, 'progress': 1.0})
+        except Exception as e:
+            # 체크포인트 기록이나 진행 콜백 실패는 이어서 실행만 못 할 뿐 작업 자체는 계속
+            print(f"⚠️ 단계 완료 기록 실패 ({name}): {e}")
+    return ok
+
+def _job_metrics(job):
+    """작업 결과에서 처리 지표(result['metrics']) 계산"""
+    result = job['result']
+    transcribe_seconds = result['timings'].get('transcribe')
+    audio_duration = job['audio_duration'] or (result['metadata'] or {}).get('duration')
+    written = [p for p in (result['audio_file'], result['text_file']) if p]
+    # 실측 속도 기록용 변환 시간: 묶음 변환 워커가 잰 값(대기 시간 제외), 직접 변환했으면 단계 시간
+    decode_seconds = job['model_info'].get('decode_seconds')
+    if decode_seconds is None and transcribe_seconds and job['batch_transcriber'] is None:
+        decode_seconds = max(0.0, transcribe_seconds - (job['model_info'].get('model_load_seconds') or 0))
+    return {
+        'bytes_downloaded': job['bytes_downloaded'],
+        'bytes_written': sum(_file_size(p) or 0 for p in written),
+        'audio_duration': round(audio_duration, 3) if audio_duration else None,
+        'real_time_factor': (round(transcribe_seconds / audio_duration, 4)
+                             if transcribe_seconds and audio_duration else None),
+        'model_cache_hit': job['model_info'].get('model_cache_hit'),
+        'model_load_seconds': job['model_info'].get('model_load_seconds'),
+        'batch_size': job['model_info'].get('batch_size'),  # 묶음 디코딩했을 때 함께 디코딩한 클립 수
+        'decode_seconds': round(decode_seconds, 3) if decode_seconds is not None else None,
+        'time_to_first_text': (round(job['first_text_at'] - job['created_at'], 3)
+                               if job['first_text_at'] else None),
+        'elapsed': round(time.time() - job['created_at'], 3),
+    }
+
+def _finish_job(job, metrics=None):
+    """작업 종료 시 다운로드 폴더 임대를 풀고, result['metrics']를 채워 전역 지표에 집계"""
+    metrics = metrics or default_metrics
+    result = job['result']
+    if job['leased_id']:
+        job['download_cache'].release(job['leased_id'])
+        job['leased_id'] = None
+        job['download_cache'].notify()
+    if job['upload_lease']:
+        get_upload_cache().release_path(job['upload_lease'])
+        job['upload_lease'] = None
+    if result['cache_hit']:
+        status = "cached"
+    elif result['success']:
+        status = "ok"
+    else:
+        status = "failed"
+    metrics.inc("jobs_total", status=status)
+    if result['cache_hit']:
+        result['metrics'] = {'elapsed': round(time.time() - job['created_at'], 3)}
+        return job
+    
+    result['metrics'] = job_metrics = _job_metrics(job)
+    for stage, seconds in result['timings'].items():
+        metrics.observe("stage_seconds", seconds, stage=stage)
+    metrics.observe("job_seconds", job_metrics['elapsed'])
+    for stage in result['reused']:
+        metrics.inc("stages_reused_total", stage=stage)
+    metrics.inc("bytes_downloaded_total", job_metrics['bytes_downloaded'])
+    metrics.inc("bytes_written_total", job_metrics['bytes_written'])
+    if job_metrics['audio_duration']:
+        metrics.inc("audio_seconds_total", job_metrics['audio_duration'])
+    if job_metrics['time_to_first_text'] is not None:
+        metrics.observe("time_to_first_text_seconds", job_metrics['time_to_first_text'])
+    if job_metrics['real_time_factor'] is not None:
+        metrics.observe("real_time_factor", job_metrics['real_time_factor'],
+                        buckets=REAL_TIME_FACTOR_BUCKETS, model=_job_model_tag(job))
+    if job_metrics['model_cache_hit'] is not None:
+        metrics.inc("model_cache_hits_total" if job_metrics['model_cache_hit'] else "model_cache_misses_total",
+                    model=_job_model_tag(job))
+    if (result['success'] and "transcribe" not in result['reused']
+            and job_metrics['decode_seconds'] is not None and job_metrics['audio_duration']):
+        # 다음 자동 모델 선택에 쓰도록 이 서버의 실측 실시간 배율 누적
+        # (calibrate_model_speed처럼 모델 로드 시간은 빼고, 묶음 변환 워커의 대기 시간도 뺀 변환 시간)
+        job['speed_profile'].record(_job_model_tag(job),
+                                    round(job_metrics['decode_seconds'] / job_metrics['audio_duration'], 4),
+                                    audio_seconds=job_metrics['audio_duration'])
+    return job
+
+class StagedPipeline:
+    """
+    단계별 작업 파이프라인
+
+    각 단계마다 전용 워커 스레드와 크기 제한 큐를 두어, 여러 작업이 흘러갈 때
+    전체 처리량이 단계 소요 시간의 합이 아니라 가장 느린 단계에 가까워지도록 합니다.
+
+    stages: (이름, 함수, 워커 수, 입력 큐 크기) 목록. 함수는 작업 딕셔너리를 받아
+    성공 여부를 반환합니다. 큐 크기 0은 제한 없음을 뜻합니다.
+    """
+
+    _STOP = object()
+
+    def __init__(self, stages):
+        self._stages = []
+        self._started_at = time.perf_counter()
+        self._lock = threading.Lock()
+        for index, (name, func, workers, queue_size) in enumerate(stages):
+            stage = {
+                'name': name,
+                'func': func,
+                'queue': queue.Queue(maxsize=queue_size),
+                'threads': [],
+                'busy': 0,
+                'busy_seconds': 0.0,
+                'processed': 0,
+                'failed': 0,
+            }
+            for i in range(max(1, workers)):
+                thread = threading.Thread(target=self._worker, args=(index, stage),
+                                          name=f"{name}-{i}", daemon=True)
+                stage['threads'].append(thread)
+            self._stages.append(stage)
+        for stage in self._stages:
+            for thread in stage['threads']:
+                thread.start()
+
+    def submit(self, job):
+        """작업 제출 (완료 시 작업 딕셔너리를 결과로 갖는 Future 반환)"""
+        future = Future()
+        self._stages[0]['queue'].put((job, future))
+        return future
+
+    def _worker(self, index, stage):
+        while True:
+            item = stage['queue'].get()
+            if item is self._STOP:
+                break
+            job, future = item
+            
+            with self._lock:
+                stage['busy'] += 1
+            started = time.perf_counter()
+            try:
+                ok = _run_stage(job, stage['name'], stage['func'])
+            except Exception as e:
+                # 워커 스레드가 죽거나 작업 Future가 끝나지 않는 일이 없도록 실패로 처리
+                job['result']['error'] = f"처리 중 오류: {str(e)}"
+                ok = False
+            with self._lock:
+                stage['busy'] -= 1
+                stage['busy_seconds'] += time.perf_counter() - started
+                stage['processed'] += 1
+                if not ok:
+                    stage['failed'] += 1
+            
+            if ok and index + 1 < len(self._stages):
+                # 다음 단계 큐가 가득 차면 대기 (앞 단계가 너무 앞서가지 않도록)
+                self._stages[index + 1]['queue'].put(item)
+            else:
+                future.set_result(job)
+
+    def stats(self):
+        """단계별 큐 길이, 사용 중인 워커 수, 처리 건수, 가동률"""
+        elapsed = max(time.perf_counter() - self._started_at, 1e-9)
+        with self._lock:
+            return {
+                stage['name']: {
+                    'queue_depth': stage['queue'].qsize(),
+                    'workers': len(stage['threads']),
+                    'busy': stage['busy'],
+                    'processed': stage['processed'],
+                    'failed': stage['failed'],
+                    'busy_seconds': round(stage['busy_seconds'], 3),
+                    'utilization': round(stage['busy_seconds'] / (elapsed * len(stage['threads'])), 3),
+                }
+                for stage in self._stages
+            }
+
+    def shutdown(self):
+        """남은 작업을 모두 처리한 뒤 워커 종료 (앞 단계부터 차례로)"""
+        for stage in self._stages:
+            for _ in stage['threads']:
+                stage['queue'].put(self._STOP)
+            for thread in stage['threads']:
+                thread.join()
+
+def create_youtube_pipeline(download_workers=3, extract_workers=2, transcribe_workers=1,
+                            persist_workers=1, queue_size=4, batch_transcriber=None):
+    """
+    유튜브 변환용 파이프라인 생성 (다운로드 → 음성 추출 → 텍스트 변환 → 저장)
+
+    작업에 batch_transcriber를 쓸 거라면 함께 넘겨 주세요. 변환 단계 워커를 묶음 크기와 따로 변환
+    실행기 크기만큼 늘려, 긴 작업이 변환 중이어도 여러 짧은 클립이 함께 묶음 변환 워커에 들어가게 합니다
+    (변환 단계 워커는 결과를 기다리기만 하고 실제 변환은 batch_transcriber가 실행).
+    """
+    if batch_transcriber is not None:
+        transcribe_workers = max(transcribe_workers,
+                                 batch_transcriber.max_batch_size + batch_transcriber.single_workers)
+    workers = {
+        'download': download_workers,
+        'extract': extract_workers,
+        'transcribe': transcribe_workers,
+        'persist': persist_workers,
+    }
+    return StagedPipeline([
+        # 첫 단계 입력 큐는 제출이 막히지 않도록 제한 없음
+        (name, func, workers[name], queue_size if index else 0)
+        for index, (name, func) in enumerate(PIPELINE_STAGES)
+    ])
+
+def process_youtube_to_text(url, output_path="downloads", model_size="base", save_to_archive=False,
+                            model_registry=None, direct_pcm=True, audio_only=False,
+                            decode_options=None, use_cache=True, refresh_cache=False,
+                            transcript_cache=None, pipeline=None, long_audio_workers=None,
+                            archive_policy="link", catalog=None, progress_callback=None, resume=False,
+                            segment_callback=None, latency_budget=None, asr_backend=None,
+                            batch_transcriber=None, speed_profile=None, allow_empty_text=False):
+    """
+    전체 프로세스: 유튜브 URL → 영상 → 음성 → 텍스트
+    
+    Parameters:
+    - url: 유튜브 URL 또는 로컬 미디어 파일 경로 (로컬 파일은 다운로드 없이 원본에서 바로 추출)
+    - output_path: 임시 출력 경로
+    - model_size: Whisper 모델 크기 ("auto"면 영상 길이, 이 서버의 모델별 실시간 배율,
+      latency_budget으로 예산 안에 끝날 가장 정확한 모델을 골라 result['model_selection']에 기록)
+    - save_to_archive: 영구 보관소에 저장 여부
+    - model_registry: 공유 모델 레지스트리 (None이면 기본 전역 레지스트리)
+    - direct_pcm: 원본을 16 kHz PCM으로 바로 디코딩해 변환 (MP3는 병렬로 생성)
+    - audio_only: 영상 없이 음성 스트림만 다운로드 (텍스트만 필요한 경우)
+    - decode_options: Whisper transcribe 옵션 (language, task 등)
+    - use_cache: 변환 캐시 사용 여부 (False면 조회/저장 모두 건너뜀)
+    - refresh_cache: 캐시를 조회하지 않고 새로 변환해 덮어쓰기
+    - transcript_cache: 사용할 캐시 (None이면 기본 전역 캐시)
+    - pipeline: 공유 StagedPipeline (주면 다른 작업과 단계별로 겹쳐서 실행)
+    - long_audio_workers: 긴 음성 분할 변환 프로세스 수 (None이면 CPU 수에 맞춤, 1이면 분할 안 함)
+    - archive_policy: 보관 방법 ("link": 리플링크/하드링크, "move": 이동, "copy": 복사)
+    - catalog: 보관 기록을 남길 ArchiveCatalog (None이면 기본 카탈로그)
+    - progress_callback: 진행 이벤트(딕셔너리)를 받을 함수. stage, progress(0~1),
+      overall(전체 0~1)와 단계별 정보(downloaded_bytes, eta, processed_seconds 등)가 담김
+    - resume: 이전 실행이 남긴 체크포인트(JobManifest)에서 이어서 실행
+      (변환을 마친 결과나 긴 음성의 끝낸 구간은 다시 변환하지 않음)
+    - segment_callback: 변환된 세그먼트({'id', 'start', 'end', 'text'})를 나오는 대로 받을 함수
+      (세그먼트는 .txt와 .srt/.vtt/.json 파일에도 바로 이어 써짐)
+    - latency_budget: model_size="auto"일 때 작업 전체 지연 예산(초, None이면 기본값)
+    - asr_backend: 음성 인식 엔진 ("whisper" 또는 "faster-whisper", None이면 DEFAULT_ASR_BACKEND).
+      기본 엔진이 아니면 산출물 이름과 캐시 키의 모델 이름에 엔진 구분자가 붙음 (예: base-int8)
+    - batch_transcriber: 공유 BatchTranscriber (주면 변환을 이 워커에 맡겨, 짧은 클립은 다른 작업의
+      클립과 묶어서 한 번에 디코딩. 묶음 디코딩 모델은 batch_transcriber의 레지스트리에서 가져옴)
+    - speed_profile: 자동 모델 선택에 쓰고 이 작업의 실시간 배율을 기록할 ModelSpeedProfile
+      (None이면 default_model_speed, 벤치마크나 테스트는 따로 만든 기록을 넘김)
+    - allow_empty_text: 변환 결과가 빈 텍스트여도 성공으로 처리 (무음/톤 테스트 음성 벤치마크용)
+    """
+    job = _create_job(url, output_path, model_size, save_to_archive, model_registry, direct_pcm,
+                      audio_only, decode_options, use_cache, refresh_cache, transcript_cache,
+                      long_audio_workers, archive_policy, catalog, progress_callback, resume,
+                      segment_callback, latency_budget, asr_backend, batch_transcriber, speed_profile,
+                      allow_empty_text)
+    
+    if _stage_lookup_cache(job):
+        return _finish_job(job)['result']
+    
+    if pipeline is not None:
+        return _finish_job(pipeline.submit(job).result())['result']
+    
+    for name, func in PIPELINE_STAGES:
+        if not _run_stage(job, name, func):
+            break
+    
+    return _finish_job(job)['result']
+
+# 재생목록/채널 URL 판별
+_COLLECTION_URL_PATTERN = re.compile(r'[?&]list=|/playlist|/channel/|/c/|/user/|/@')
+
+def read_url_file(file_path):
+    """URL 목록 파일 읽기 (빈 줄과 # 주석 제외)"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+
+def is_playlist_url(url):
+    """재생목록/채널 URL 여부 (개별 영상 URL이면 False)"""
+    return not extract_video_id(url) and bool(_COLLECTION_URL_PATTERN.search(url))
+
+def expand_youtube_urls(urls, max_depth=2):
+    """재생목록/채널 URL을 개별 영상 URL 목록으로 펼침"""
+    expanded = []
+    for url in urls:
+        if not is_playlist_url(url):
+            expanded.append(url)
+            continue
+        
+        try:
+            with lazy_import("yt_dlp").YoutubeDL({'quiet': True, 'extract_flat': 'in_playlist'}) as ydl:
+                info = ydl.extract_info(url, download=False)
+        except Exception as e:
+            print(f"❌ 재생목록 정보 추출 실패: {e}")
+            continue
+        
+        for entry in info.get('entries') or []:
+            if not entry:
+                continue
+            entry_url = entry.get('url') or entry.get('webpage_url') or ''
+            entry_id = entry.get('id') or ''
+            if len(entry_id) == 11 and entry.get('ie_key', 'Youtube') == 'Youtube':
+                expanded.append(f"https://www.youtube.com/watch?v={entry_id}")
+            elif entry_url and max_depth > 1:
+                # 채널의 탭(동영상, Shorts 등)은 한 단계 더 펼침
+                expanded.extend(expand_youtube_urls([entry_url], max_depth - 1))
+    
+    return expanded
+
+def _summary_record(index, job):
+    """일괄 처리 요약(JSONL) 한 줄"""
+    result = job['result']
+    if result['cache_hit']:
+        status = "cached"
+    elif result['success']:
+        status = "ok"
+    else:
+        status = "failed"
+    return {
+        'index': index,
+        'url': job['url'],
+        'video_id': job['video_id'],
+        'model_size': _job_model_tag(job),
+        'status': status,
+        'error': result['error'],
+        'timings': result['timings'],
+        'metrics': result['metrics'],
+        'reused': result['reused'],
+        'elapsed': round(time.time() - job['created_at'], 3),
+        'video_file': result['video_file'],
+        'audio_file': result['audio_file'],
+        'text_file': result['text_file'],
+    }
+
+def process_youtube_batch(urls, download_workers=3, transcribe_workers=1, queue_size=4,
+                          summary_path=None, on_result=None, extract_workers=None,
+                          pipeline=None, **options):
+    """
+    여러 URL(또는 로컬 미디어 파일 경로) 일괄 처리
+
+    작업을 StagedPipeline에 넣어 다운로드, 음성 추출, 텍스트 변환, 저장 단계가
+    서로 겹쳐 실행되도록 합니다 (다음 영상 다운로드가 현재 영상 변환과 동시에 진행).
+    pipeline을 주면 그 파이프라인을 사용하고 종료하지 않습니다.
+    options는 process_youtube_to_text의 키워드 인자와 같습니다 (batch_transcriber를 주면
+    짧은 클립들이 묶음 변환되도록 파이프라인 변환 워커를 늘림, create_youtube_pipeline 참고).
+
+    반환값: 입력 순서대로 정렬된 결과 딕셔너리 목록
+    """
+    results = [None] * len(urls)
+    summary_lock = threading.Lock()
+    summary_file = open(summary_path, 'a', encoding='utf-8') if summary_path else None
+    own_pipeline = pipeline is None
+    if own_pipeline:
+        pipeline = create_youtube_pipeline(
+            download_workers=download_workers,
+            extract_workers=extract_workers or download_workers,
+            transcribe_workers=transcribe_workers,
+            queue_size=queue_size,
+            batch_transcriber=options.get('batch_transcriber'),
+        )
+    
+    def finish(index, job):
+        _finish_job(job)
+        results[index] = job['result']
+        record = _summary_record(index, job)
+        with summary_lock:
+            if summary_file:
+                summary_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                summary_file.flush()
+            if on_result:
+                on_result(record, job['result'])
+    
+    try:
+        futures = {}
+        for index, url in enumerate(urls):
+            job = _create_job(url, **options)
+            if _stage_lookup_cache(job):
+                finish(index, job)
+                continue
+            futures[pipeline.submit(job)] = index
+        for future in as_completed(futures):
+            finish(futures[future], future.result())
+    finally:
+        if own_pipeline:
+            pipeline.shutdown()
+        if summary_file:
+            summary_file.close()
+
+    return results
+
+def process_local_media(paths, recursive=True, extract_workers=None, **options):
+    """
+    로컬 미디어 파일/폴더 일괄 변환 (NFS 등에 이미 있는 미디어 보관소용)
+
+    폴더는 하위 폴더까지 훑어 지원하는 미디어 파일을 모으고, 다운로드 없이
+    process_youtube_batch 파이프라인에 넣습니다. 음성 추출(PCM 디코딩/MP3 인코딩)은
+    CPU 수와 저장소 읽기 상한에 맞춘 워커 수로 병렬 실행되어 텍스트 변환 워커에 이어집니다.
+    변환 캐시와 downloads/archives 폴더 구조는 유튜브 작업과 같습니다 (비디오 ID 대신 local_ ID).
+    options는 process_youtube_batch의 키워드 인자와 같습니다.
+
+    반환값: (미디어 파일 목록, 파일 순서대로의 결과 딕셔너리 목록)
+    """
+    files = find_local_media(paths, recursive)
+    if not files:
+        return files, []
+    options.setdefault('download_workers', 1)  # 로컬 파일은 길이만 조회하므로 워커 하나면 충분
+    return files, process_youtube_batch(files, extract_workers=extract_workers or default_extract_workers(),
+                                        **options)
+
+class JobManager:
+    """
+    백그라운드 변환 작업 관리자
+
+    제출된 작업에 ID를 발급하고 스크립트 실행과 무관한 워커 풀에서 실행합니다.
+    화면은 ID로 상태와 저장된 결과를 조회하므로 재실행해도 결과가 사라지지 않습니다.
+    """
+
+    def __init__(self, max_concurrent_jobs=MAX_CONCURRENT_JOBS, max_finished_jobs=200):
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.max_finished_jobs = max_finished_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_jobs, thread_name_prefix="job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, func=None, **kwargs):
+        """작업 제출 후 작업 ID 반환 (func 기본값: process_youtube_to_text)"""
+        job_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._jobs[job_id] = {
+                'id': job_id,
+                'state': 'queued',
+                'url': kwargs.get('url'),
+                'submitted_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+                'progress': None,
+                'partial_text': "",
+                'result': None,
+                'error': None,
+            }
+            self._prune_locked()
+        if 'progress_callback' not in kwargs:
+            # 최근 진행 이벤트를 작업 기록에 보관 (화면은 폴링해서 표시)
+            kwargs['progress_callback'] = lambda event: self._update(job_id, progress=event)
+        if 'segment_callback' not in kwargs:
+            # 변환된 세그먼트를 이어 붙여 진행 중에도 텍스트를 보여 줄 수 있게 함
+            kwargs['segment_callback'] = lambda segment: self._append_text(job_id, segment['text'])
+        self._executor.submit(self._run, job_id, func or process_youtube_to_text, kwargs)
+        return job_id
+
+    def _run(self, job_id, func, kwargs):
+        self._update(job_id, state='running', started_at=time.time())
+        try:
+            result = func(**kwargs)
+            state = 'done' if result.get('success') else 'failed'
+            self._update(job_id, state=state, result=result, error=result.get('error'),
+                         finished_at=time.time())
+        except Exception as e:
+            self._update(job_id, state='failed', error=f"처리 중 오류: {str(e)}", finished_at=time.time())
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def _append_text(self, job_id, text):
+        with self._lock:
+            if job_id in self._jobs:
+                job = self._jobs[job_id]
+                job['partial_text'] = job['partial_text'] + (text if job['partial_text'] else text.lstrip())
+
+    def _prune_locked(self):
+        """끝난 작업이 너무 많으면 오래된 것부터 정리"""
+        finished = [job_id for job_id, job in self._jobs.items() if job['state'] in ('done', 'failed')]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        """작업 상태 조회 (없으면 None)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def active_count(self):
+        """대기 중이거나 실행 중인 작업 수"""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job['state'] in ('queued', 'running'))
+
+class _ArtifactRequestHandler(BaseHTTPRequestHandler):
+    """허용된 폴더의 파일을 Range 요청을 지원하며 청크 단위로 전송"""
+
+    roots = {}  # URL 첫 경로 이름 -> 실제 폴더 (ArtifactServer가 설정)
+
+    def _resolve(self):
+        parts = unquote(urlsplit(self.path).path).lstrip("/").split("/", 1)
+        if len(parts) != 2 or parts[0] not in self.roots:
+            return None
+        root = Path(self.roots[parts[0]]).resolve()
+        target = (root / parts[1]).resolve()
+        try:
+            target.relative_to(root)  # 폴더 밖 경로 접근 차단
+        except ValueError:
+            return None
+        if target.suffix.lower() not in ARTIFACT_SERVED_EXTENSIONS:
+            return None
+        return target if target.is_file() else None
+
+    def _parse_range(self, size):
+        """Range 헤더 해석 → (시작, 끝) 또는 None (전체), 잘못된 범위면 False"""
+        header = self.headers.get("Range")
+        if not header or not header.startswith("bytes="):
+            return None
+        first = header[len("bytes="):].split(",")[0].strip()
+        start_text, _, end_text = first.partition("-")
+        try:
+            if start_text:
+                start = int(start_text)
+                end = min(int(end_text), size - 1) if end_text else size - 1
+            else:
+                start = max(0, size - int(end_text))
+                end = size - 1
+        except ValueError:
+            return False
+        return (start, end) if start <= end < size else False
+
+    def _send(self, with_body):
+        target = self._resolve()
+        if target is None:
+            self.send_error(404)
+            return
+        
+        size = target.stat().st_size
+        byte_range = self._parse_range(size)
+        if byte_range is False:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.end_headers()
+            return
+        start, end = byte_range or (0, size - 1)
+        
+        self.send_response(206 if byte_range else 200)
+        self.send_header("Content-Type", mimetypes.guess_type(target.name)[0] or "application/octet-stream")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1 if size else 0))
+        if byte_range:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        if "download=1" in (urlsplit(self.path).query or ""):
+            self.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(target.name)}")
+        self.end_headers()
+        
+        if not with_body or not size:
+            return
+        with open(target, 'rb') as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(ARTIFACT_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                try:
+                    self.wfile.write(chunk)
+                except (BrokenPipeError, ConnectionResetError):
+                    return  # 브라우저가 재생 위치를 옮기면 연결을 끊는 것이 정상
+                remaining -= len(chunk)
+
+    def do_GET(self):
+        self._send(with_body=True)
+
+    def do_HEAD(self):
+        self._send(with_body=False)
+
+    def log_message(self, format, *args):
+        pass  # 요청마다 로그를 남기지 않음
+
+class ArtifactServer:
+    """
+    산출물 파일 서버
+
+    영상/음성을 세션 메모리에 올리지 않고 브라우저가 HTTP Range 요청으로
+    디스크에서 직접 받아 가도록 백그라운드 스레드에서 파일을 제공합니다.
+    인증이 없으므로 허용된 폴더 안의 ARTIFACT_SERVED_EXTENSIONS 파일만 제공합니다.
+    """
+
+    def __init__(self, roots=("downloads", ARCHIVE_ROOT), host=ARTIFACT_SERVER_HOST,
+                 port=ARTIFACT_SERVER_PORT, public_url=ARTIFACT_PUBLIC_URL):
+        self.roots = {Path(root).name: str(Path(root).resolve()) for root in roots}
+        self.host = host
+        self.port = port
+        self.public_url = public_url
+        self._server = None
+
+    def start(self):
+        """서버 시작 (포트를 열 수 없으면 False)"""
+        handler = type("ArtifactRequestHandler", (_ArtifactRequestHandler,), {'roots': self.roots})
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        except OSError as e:
+            print(f"⚠️ 파일 서버 시작 실패: {e}")
+            return False
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="artifact-server", daemon=True).start()
+        return True
+
+    @property
+    def running(self):
+        return self._server is not None
+
+    def url_for(self, file_path, base_url=None, download=False):
+        """파일의 URL 반환 (허용된 폴더 밖이거나 제공하지 않는 확장자면 None)"""
+        target = Path(file_path).resolve()
+        if target.suffix.lower() not in ARTIFACT_SERVED_EXTENSIONS:
+            return None
+        for name, root in self.roots.items():
+            try:
+                relative = target.relative_to(root)
+            except ValueError:
+                continue
+            base = (base_url or self.public_url or f"http://localhost:{self.port}").rstrip("/")
+            url = f"{base}/{quote(name)}/{quote(relative.as_posix())}"
+            return url + "?download=1" if download else url
+        return None
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -4,36 +4,282 @@
 유튜브 쇼츠 → mp4, mp3, text 변환기 (CLI 버전)
 """
 
-from utils import process_youtube_to_text
+import argparse
+import os
+from utils import (
+    process_youtube_to_text, process_youtube_batch, expand_youtube_urls, read_url_file,
+    is_playlist_url, create_youtube_pipeline, get_archive_catalog, throttle_progress, ARCHIVE_POLICIES,
+    default_metrics, get_download_cache, find_local_media, is_local_media, default_extract_workers,
+    calibrate_model_speed, default_model_speed, MODEL_SIZES, ASR_BACKENDS, model_tag,
+    available_asr_backends, BatchTranscriber, SHORT_CLIP_BATCH_WAIT_SECONDS, SHORT_CLIP_MAX_SECONDS
+)
+
+def parse_args():
+    """명령행 인자 파싱"""
+    parser = argparse.ArgumentParser(description="유튜브 쇼츠 → mp4, mp3, text 변환기 (CLI)")
+    parser.add_argument("urls", nargs="*", help="유튜브 URL 또는 로컬 미디어 파일/폴더 경로 (여러 개, 재생목록/채널/폴더 가능. 생략하면 입력 요청)")
+    parser.add_argument("--file", help="URL 목록 파일 (한 줄에 하나, #은 주석)")
+    parser.add_argument("--model", default="base",
+                        help="Whisper 모델 크기 (기본: base, auto면 영상 길이와 --latency-budget에 맞춰 자동 선택)")
+    parser.add_argument("--backend", choices=ASR_BACKENDS, default=None,
+                        help="음성 인식 엔진: whisper(기본, fp32) 또는 faster-whisper(int8 CPU, 별도 설치 필요)")
+    parser.add_argument("--latency-budget", type=float, default=None,
+                        help="--model auto일 때 작업 하나의 지연 예산(초) (기본: 300)")
+    parser.add_argument("--calibrate", metavar="AUDIO_FILE",
+                        help="음성 파일로 --model의 실시간 배율을 측정해 자동 선택에 쓰도록 저장하고 종료 "
+                             "(--model auto면 모든 모델 측정)")
+    parser.add_argument("--audio-only", action="store_true",
+                        help="영상 없이 음성만 다운로드하여 텍스트로 변환")
+    parser.add_argument("--archive", action="store_true",
+                        help="변환 결과를 영구 보관함(archives 폴더)에 저장")
+    parser.add_argument("--archive-policy", choices=ARCHIVE_POLICIES, default="link",
+                        help="보관 방법: link(리플링크/하드링크), move(이동), copy(복사) (기본: link)")
+    parser.add_argument("--rebuild-catalog", action="store_true",
+                        help="archives 폴더를 다시 훑어 보관함 카탈로그를 재구성하고 종료")
+    parser.add_argument("--search", help="보관된 변환 텍스트에서 검색하고 종료")
+    parser.add_argument("--page", type=int, default=1, help="검색 결과 페이지 (기본: 1)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="변환 캐시를 조회하거나 저장하지 않음")
+    parser.add_argument("--refresh", action="store_true",
+                        help="캐시를 무시하고 다시 변환한 뒤 캐시 갱신")
+    parser.add_argument("--resume", action="store_true",
+                        help="중단된 작업을 체크포인트(마지막으로 끝낸 단계/구간)부터 이어서 실행")
+    parser.add_argument("--long-audio-workers", type=int, default=None,
+                        help="긴 음성(10분 이상) 분할 병렬 변환 프로세스 수 (기본: CPU 수에 맞춤, 1이면 분할 안 함)")
+    parser.add_argument("--jobs", type=int, default=3,
+                        help="일괄 처리 시 동시 다운로드 수 (기본: 3)")
+    parser.add_argument("--extract-workers", type=int, default=None,
+                        help="일괄 처리 시 동시 음성 추출 수 (기본: 2, 로컬 파일은 CPU 수와 저장소 읽기 상한에 맞춤)")
+    parser.add_argument("--asr-workers", type=int, default=1,
+                        help="일괄 처리 시 텍스트 변환 워커 수 (기본: 1)")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help=f"일괄 처리 시 {SHORT_CLIP_MAX_SECONDS}초 이하 짧은 클립을 N개까지 모아 "
+                             "한 번에 디코딩 (whisper 엔진, 기본: 묶지 않음)")
+    parser.add_argument("--batch-wait-ms", type=float, default=SHORT_CLIP_BATCH_WAIT_SECONDS * 1000,
+                        help=f"묶음을 채우려고 기다리는 최대 시간(ms) (기본: {SHORT_CLIP_BATCH_WAIT_SECONDS * 1000:.0f})")
+    parser.add_argument("--queue-size", type=int, default=4,
+                        help="변환 대기 큐 크기 (기본: 4)")
+    parser.add_argument("--summary", help="일괄 처리 결과 요약을 저장할 JSONL 파일")
+    parser.add_argument("--metrics", choices=("json", "prometheus"),
+                        help="작업이 끝난 뒤 처리 지표(단계별 시간, 전송량, 실시간 배율 등)를 출력")
+    parser.add_argument("--metrics-file", help="처리 지표를 화면 대신 저장할 파일")
+    return parser.parse_args()
+
+STAGE_LABELS = {
+    "download": "📥 다운로드",
+    "extract": "🎵 음성 추출",
+    "transcribe": "📝 텍스트 변환",
+    "persist": "💾 저장",
+}
+
+def print_progress(event):
+    """진행 이벤트를 한 줄로 덮어쓰며 출력"""
+    line = f"{STAGE_LABELS.get(event.get('stage'), event.get('stage'))} {int((event.get('overall') or 0) * 100):3d}%"
+    if event.get('stage') == 'download' and event.get('total_bytes'):
+        line += f" ({event.get('downloaded_bytes', 0) / (1024 * 1024):.1f}/{event['total_bytes'] / (1024 * 1024):.1f} MB"
+        line += f", 남은 시간 {event['eta']}초)" if event.get('eta') is not None else ")"
+    elif event.get('processed_seconds') is not None and event.get('duration'):
+        line += f" ({event['processed_seconds']:.0f}/{event['duration']:.0f}초)"
+    print("\r" + line.ljust(70), end="", flush=True)
+
+def run_single(url, args):
+    """URL 하나 변환"""
+    result = process_youtube_to_text(url, model_size=args.model, audio_only=args.audio_only,
+                                     progress_callback=throttle_progress(print_progress),
+                                     use_cache=not args.no_cache, refresh_cache=args.refresh,
+                                     long_audio_workers=args.long_audio_workers, resume=args.resume,
+                                     save_to_archive=args.archive, archive_policy=args.archive_policy,
+                                     latency_budget=args.latency_budget, asr_backend=args.backend)
+    print()
 
-def main():
-    """CLI 버전 메인 함수"""
-    print("🎬 유튜브 쇼츠 → mp4, mp3, text 변환기 (CLI)")
-    print("=" * 50)
-    
-    # URL 입력
-    url = input("📎 유튜브 URL 입력: ").strip()
-    
-    if not url:
-        print("❌ URL이 입력되지 않았습니다.")
-        return
-    
-    # 변환 실행
-    result = process_youtube_to_text(url)
-    
     if result['success']:
         print("\n" + "=" * 50)
         print("📄 변환된 텍스트:")
         print("-" * 50)
         print(result['text_content'])
         print("-" * 50)
-        
-        print(f"\n🎉 모든 작업 완료!")
-        print(f"📁 영상: {result['video_file']}")
+
+        print(f"\n🎉 모든 작업 완료!{' (캐시 사용)' if result.get('cache_hit') else ''}")
+        if result['model_selection']:
+            selection = result['model_selection']
+            print(f"🤖 자동 선택 모델: {selection['model']} (실시간 배율 {selection['real_time_factor']}, "
+                  f"{'측정값' if selection['rtf_source'] != 'default' else '기본 추정치'})")
+        if result['video_file']:
+            print(f"📁 영상: {result['video_file']}")
         print(f"🎵 음성: {result['audio_file']}")
         print(f"📄 텍스트: {result['text_file']}")
+        for ext, path in result['subtitle_files'].items():
+            print(f"🎞️ {ext.upper()}: {path}")
+        print_timings(result)
     else:
         print(f"❌ 변환 실패: {result['error']}")
 
+def print_timings(result):
+    """단계별 소요 시간과 실시간 배율 출력"""
+    if not result['timings']:
+        return
+    print("\n⏱️ 단계별 소요 시간: " + ", ".join(f"{name} {seconds}초" for name, seconds in result['timings'].items()))
+    if result['metrics'].get('time_to_first_text') is not None:
+        print(f"💬 첫 텍스트까지: {result['metrics']['time_to_first_text']}초")
+    rtf = result['metrics'].get('real_time_factor')
+    if rtf is not None:
+        print(f"⚡ 실시간 배율: {rtf}x (음성 {result['metrics']['audio_duration']:.0f}초)")
+
+def write_metrics(args):
+    """--metrics 형식으로 처리 지표 출력 또는 저장"""
+    text = default_metrics.to_json() if args.metrics == "json" else default_metrics.to_prometheus()
+    if args.metrics_file:
+        with open(args.metrics_file, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"📊 처리 지표 저장: {args.metrics_file}")
+    else:
+        print("\n" + text)
+
+def run_batch(urls, args):
+    """여러 URL 일괄 변환"""
+    urls = expand_youtube_urls(urls)
+    if not urls:
+        print("❌ 처리할 영상이 없습니다.")
+        return
+
+    print(f"📋 총 {len(urls)}개 영상 일괄 처리 시작")
+
+    def on_result(record, result):
+        icon = {"ok": "✅", "cached": "⚡", "failed": "❌"}[record['status']]
+        print(f"{icon} [{record['index'] + 1}/{len(urls)}] {record['url']} "
+              f"({record['elapsed']}초){' - ' + record['error'] if record['error'] else ''}")
+
+    extract_workers = args.extract_workers
+    if extract_workers is None:
+        # 로컬 파일은 다운로드가 없어 음성 추출이 병목이므로 추출 워커를 늘림
+        extract_workers = default_extract_workers() if any(is_local_media(url) for url in urls) else 2
+    batcher = None
+    if args.batch_size and args.batch_size > 1:
+        batcher = BatchTranscriber(max_batch_size=args.batch_size, max_wait=args.batch_wait_ms / 1000,
+                                   single_workers=args.asr_workers)
+    pipeline = create_youtube_pipeline(
+        download_workers=args.jobs,
+        extract_workers=extract_workers,
+        transcribe_workers=args.asr_workers,
+        queue_size=args.queue_size,
+        batch_transcriber=batcher,
+    )
+    try:
+        results = process_youtube_batch(
+            urls,
+            pipeline=pipeline,
+            summary_path=args.summary,
+            on_result=on_result,
+            model_size=args.model,
+            audio_only=args.audio_only,
+            use_cache=not args.no_cache,
+            refresh_cache=args.refresh,
+            long_audio_workers=args.long_audio_workers,
+            resume=args.resume,
+            save_to_archive=args.archive,
+            archive_policy=args.archive_policy,
+            latency_budget=args.latency_budget,
+            asr_backend=args.backend,
+            batch_transcriber=batcher,
+        )
+    finally:
+        pipeline.shutdown()
+        if batcher:
+            batcher.shutdown()
+
+    succeeded = sum(1 for r in results if r and r['success'])
+    print("\n" + "=" * 50)
+    print(f"🎉 일괄 처리 완료: 성공 {succeeded}개 / 실패 {len(urls) - succeeded}개")
+    if args.summary:
+        print(f"📄 요약: {args.summary}")
+
+    print("\n⏱️ 단계별 가동률:")
+    for name, stats in pipeline.stats().items():
+        print(f"  - {name}: {stats['utilization'] * 100:.0f}% "
+              f"(워커 {stats['workers']}개, 처리 {stats['processed']}건, {stats['busy_seconds']}초)")
+    if batcher:
+        stats = batcher.stats()
+        print(f"📦 묶음 변환: {stats['batches']}번에 클립 {stats['batched_clips']}개 "
+              f"(평균 {stats['mean_batch_size'] or 0}개), 따로 변환 {stats['single_runs']}건")
+
+def run_search(query, page=1, page_size=20):
+    """보관함 전문 검색 결과 출력"""
+    catalog = get_archive_catalog()
+    total = catalog.count_search(query)
+    if not total:
+        print("🔍 검색 결과가 없습니다.")
+        return
+
+    pages = (total + page_size - 1) // page_size
+    print(f"🔍 '{query}' 검색 결과 {total}건 ({page}/{pages} 페이지)")
+    print("-" * 50)
+    for hit in catalog.search(query, limit=page_size, offset=(page - 1) * page_size):
+        if hit['start_time'] is not None:
+            start = int(hit['start_time'])
+            position = f"[{start // 60:02d}:{start % 60:02d}] "
+        else:
+            position = ""
+        print(f"📄 {hit['video_id']} {position}{hit['snippet']}")
+
+def main():
+    """CLI 버전 메인 함수"""
+    args = parse_args()
+
+    print("🎬 유튜브 쇼츠 → mp4, mp3, text 변환기 (CLI)")
+    print("=" * 50)
+
+    if args.search:
+        run_search(args.search, args.page)
+        return
+
+    if args.backend and args.backend not in available_asr_backends():
+        print(f"❌ {args.backend} 엔진이 설치되어 있지 않습니다 (pip install {args.backend})")
+        return
+
+    if args.calibrate:
+        models = MODEL_SIZES if args.model == "auto" else (args.model,)
+        calibrate_model_speed(args.calibrate, models, backend=args.backend)
+        print("📋 모델별 실시간 배율: " + ", ".join(
+            f"{model_tag(model, args.backend)} {estimate['real_time_factor']}"
+            for model, estimate in default_model_speed.estimates(args.backend).items()))
+        return
+
+    if args.rebuild_catalog:
+        count = get_archive_catalog().rebuild()
+        print(f"📋 보관함 카탈로그 재구성 완료: {count}개 실행 기록")
+        return
+
+    urls = [url.strip() for url in args.urls if url.strip()]
+    if args.file:
+        urls.extend(read_url_file(args.file))
+
+    # URL 입력
+    if not urls:
+        url = input("📎 유튜브 URL 또는 파일/폴더 경로 입력: ").strip()
+        if url:
+            urls.append(url)
+
+    # 로컬 경로는 미디어 파일 목록으로 펼침 (폴더는 하위 폴더까지)
+    has_folder = any(os.path.isdir(url) for url in urls)
+    urls = [item for url in urls
+            for item in (find_local_media([url]) if os.path.exists(url) else [url])]
+
+    if not urls:
+        print("❌ 처리할 URL이나 미디어 파일이 없습니다.")
+        return
+
+    # 변환 실행 (URL이나 파일 하나면 단일 변환, 여러 개/재생목록/폴더면 일괄 처리)
+    if (len(urls) == 1 and not args.file and not args.summary and not has_folder
+            and not is_playlist_url(urls[0])):
+        run_single(urls[0], args)
+    else:
+        run_batch(urls, args)
+
+    # 용량 예산이나 보관 기간을 넘은 임시 다운로드 폴더 정리
+    get_download_cache().sweep()
+
+    if args.metrics:
+        write_metrics(args)
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()